@@ -1,59 +1,327 @@
+import asyncio
+import functools
+import json
+import logging
 from aiohttp import web             # Viết và gọi API
 import aiohttp_cors                 # Thay đổi quyền truy cập khi client gọi API
 
 import config
-from module.RouterMikrotik import RouterMikrotik
+from module.RouterPool import RouterPool
+from module.RouterRegistry import RouterRegistry
+from module.LHUClient import LHUClient
+from module.LoginScheduler import LoginScheduler
+from module.LoginCache import LoginCache
+from module.Attendance import AttendanceSchedule
+from module.AttendanceStore import AttendanceStore
+from module.Presence import Presence, PresenceGroup
+from module.SharedCache import SharedCache
+from module.Supervisor import Supervisor, canReusePort
+from module.Metrics import metricsMiddleware, getMetrics
+from module.Logging import setupLogging, requestLogMiddleware
+from module.HTTPCache import ResponseCache
+from module.Tracing import Tracer
 from module.Wifi import Wifi
 
-# Khởi tạo object routerAPI và kết nối đến router
-# routerAPI = RouterMikrotik(
-#     host=config.ROUTER,
-#     username=config.USERNAME,
-#     password=config.PASSWORD
-# )
-
-# Khởi tạo object wifi với tham số truyền vào là object routerAPI
-# Object wifi được dùng để xử lý request từ client
-# wifi = Wifi(router=routerAPI)
-
-# Khởi tạo webapp
-app = web.Application()
-# app.add_routes([
-#     web.get('/', wifi.getHomepage),
-#     web.get('/lay-danh-sach-dang-nhap/{date}', wifi.getLoggonListByDate),
-#     web.get('/lay-so-luong-thanh-vien', wifi.getTotalNumberOfMembers),
-#     web.get('/lay-danh-sach-thanh-vien', wifi.getMemberList),
-#     web.get('/lay-danh-sach-user', wifi.getHotspotUserList),
-#     #####################
-#     web.post('/login', wifi.loginHotspot),
-#     web.post('/lay-thong-tin-thanh-vien', wifi.getMemberInfo),
-#     web.post('/them-thanh-vien', wifi.addMember),
-#     web.post('/lay-danh-sach-dang-nhap', wifi.getLoggonListByDate),
-#     web.post('/lay-user-id', wifi.getHotspotUserID),
-#     web.post('/xoa-thanh-vien', wifi.removeMember),
-#     web.post('/tao-user', wifi.createHotspotUser),
-#     web.post('/chinh-sua-thanh-vien', wifi.editMember),
-#     web.post('/doi-mat-khau', wifi.changePassword),
-#     web.post('/xoa-tai-khoan', wifi.removeHotspotUser)
-# ])
-
-async def home(request):
-    return web.HTTPOk(text="Home")
-
-app.add_routes([web.get('/', home)])
-
-# Khởi tạo Cross-Origin Resource Sharing (cors)
-cors = aiohttp_cors.setup(app, defaults={
-    "*": aiohttp_cors.ResourceOptions(
-        allow_credentials=True,
-        expose_headers="*",
-        allow_headers="*"
+
+def createRouterPool(host, username, password, port=None, sharedCache=None):
+    """Tạo pool kết nối đến router, kết nối chỉ được tạo khi có lệnh đầu tiên nên không chặn lúc khởi động
+    """
+    return RouterPool(
+        host=host,
+        port=port,
+        username=username,
+        password=password,
+        size=getattr(config, 'ROUTER_POOL_SIZE', 4),
+        timeout=getattr(config, 'ROUTER_TIMEOUT', 10.0),
+        userResyncInterval=getattr(config, 'ROUTER_USER_RESYNC', None),
+        keepaliveInterval=getattr(config, 'ROUTER_KEEPALIVE', 30.0),
+        failureThreshold=getattr(config, 'ROUTER_FAILURE_THRESHOLD', 3),
+        resetTimeout=getattr(config, 'ROUTER_RESET_TIMEOUT', 5.0),
+        sharedCache=sharedCache
+    )
+
+
+def createRouter(sharedCache=None):
+    # Nhiều router: login theo mạng con của client, các lệnh khác gửi đến mọi router
+    routers = getattr(config, 'ROUTERS', None)
+    if routers:
+        return RouterRegistry(
+            routers={router['name']: createRouterPool(router['host'], router.get('username', config.USERNAME),
+                                                      router.get('password', config.PASSWORD), router.get('port'),
+                                                      sharedCache)
+                     for router in routers},
+            subnets={router['name']: router.get('subnets', []) for router in routers},
+            default=getattr(config, 'ROUTER_DEFAULT', None)
+        )
+    return createRouterPool(config.ROUTER, config.USERNAME, config.PASSWORD, getattr(config, 'ROUTER_PORT', None),
+                            sharedCache)
+
+
+def createPresence():
+    # Nhiều router: mỗi router một kết nối listen, các phiên có thêm key 'router'
+    def create(host, port, username, password, name=None):
+        return Presence(
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            queueSize=getattr(config, 'PRESENCE_QUEUE_SIZE', 100),
+            heartbeat=getattr(config, 'PRESENCE_HEARTBEAT', 15.0),
+            name=name
+        )
+
+    routers = getattr(config, 'ROUTERS', None)
+    if routers:
+        return PresenceGroup({router['name']: create(router['host'], router.get('port'),
+                                                     router.get('username', config.USERNAME),
+                                                     router.get('password', config.PASSWORD), router['name'])
+                              for router in routers})
+    if not hasattr(config, 'ROUTER'):
+        return None
+    return create(config.ROUTER, getattr(config, 'ROUTER_PORT', None), config.USERNAME, config.PASSWORD)
+
+
+def createApp(argv=None, worker=0) -> web.Application:
+    """Tạo webapp. Không có kết nối nào được mở ở đây, router và tapi được kết nối khi webapp khởi động
+    và cache được tải trong background nên webapp sẵn sàng nhận request ngay
+
+    Có thể chạy bằng: python -m aiohttp.web -H 0.0.0.0 -P 8000 app:createApp
+
+    Args:
+        worker (int): Số thứ tự worker khi chạy nhiều process, chỉ worker 0 chạy các tác vụ định kỳ
+    """
+    # Cache dùng chung giữa các worker process nếu có khai báo SHARED_CACHE_DB
+    sharedCachePath = getattr(config, 'SHARED_CACHE_DB', None)
+    sharedCache = SharedCache(path=sharedCachePath) if sharedCachePath else None
+
+    routerAPI = createRouter(sharedCache)
+
+    # Client dùng chung để gọi API tapi.lhu.edu.vn, session được tạo khi webapp khởi động
+    lhuClient = LHUClient(
+        baseUrl=getattr(config, 'LHU_API_URL', 'https://tapi.lhu.edu.vn/nema/auth'),
+        limit=getattr(config, 'LHU_POOL_LIMIT', 20),
+        keepaliveTimeout=getattr(config, 'LHU_KEEPALIVE_TIMEOUT', 30.0),
+        dnsCacheTtl=getattr(config, 'LHU_DNS_CACHE_TTL', 300),
+        timeouts=getattr(config, 'LHU_TIMEOUTS', None),
+        policies=getattr(config, 'LHU_POLICIES', None)
+    )
+
+    # Hàng đợi đăng nhập, giới hạn số lệnh login gửi đồng thời đến router
+    loginScheduler = LoginScheduler(
+        router=routerAPI,
+        concurrency=getattr(config, 'LOGIN_CONCURRENCY', 4),
+        maxQueue=getattr(config, 'LOGIN_QUEUE_SIZE', 200),
+        retryAfter=getattr(config, 'LOGIN_RETRY_AFTER', 2)
+    )
+
+    # Theo dõi các phiên đăng nhập trên router bằng một kết nối listen riêng
+    presence = createPresence() if getattr(config, 'PRESENCE_FEED', True) else None
+
+    # Lưu dữ liệu điểm danh của các ngày đã qua
+    attendanceStore = AttendanceStore(path=getattr(config, 'ATTENDANCE_DB', 'attendance.db'))
+
+    loginCacheTtl = getattr(config, 'LOGIN_CACHE_TTL', 30.0)
+
+    # Object wifi được dùng để xử lý request từ client
+    wifi = Wifi(
+        router=routerAPI,
+        client=lhuClient,
+        memberCacheTtl=getattr(config, 'MEMBER_CACHE_TTL', 60.0),
+        loginScheduler=loginScheduler,
+        attendanceSchedule=AttendanceSchedule(getattr(config, 'ATTENDANCE_WINDOWS', None)),
+        attendanceStore=attendanceStore,
+        bulkConcurrency=getattr(config, 'BULK_CONCURRENCY', 8),
+        bulkChunkSize=getattr(config, 'BULK_CHUNK_SIZE', 50),
+        presence=presence,
+        loginCache=LoginCache(ttl=loginCacheTtl) if loginCacheTtl else None,
+        sharedCache=sharedCache,
+        statsStartDate=getattr(config, 'ATTENDANCE_STATS_FROM', None),
+        reconcileProfiles=getattr(config, 'RECONCILE_PROFILES', None),
+        fetchConcurrency=getattr(config, 'ATTENDANCE_FETCH_CONCURRENCY', 8)
     )
-})
 
-# Thêm cors vào từng route
-for route in list(app.router.routes()):
-    cors.add(route)
+    shutdownTimeout = getattr(config, 'SHUTDOWN_TIMEOUT', 30.0)
+    # Trạng thái của webapp cho endpoint kiểm tra sẵn sàng
+    state = {'started': False, 'draining': False, 'warmed': False}
+    tasks = []
+
+    async def warmUp():
+        """Tải trước danh sách thành viên, bảng tài khoản trên router và thống kê điểm danh, lỗi không ảnh hưởng webapp
+        """
+        results = await asyncio.gather(wifi.members.get(), routerAPI.getHotspotUserList(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logging.warning('Không tải trước được dữ liệu: %s', result)
+        state['warmed'] = True
+        # Cộng dồn thống kê điểm danh sau khi đã sẵn sàng, có thể mất vài phút ở lần chạy đầu.
+        # Worker khác đọc kết quả đã lưu khi có request đầu tiên
+        if worker == 0:
+            await wifi.attendanceStats.start()
+
+    async def startUpstream(app):
+        await lhuClient.start()
+        await routerAPI.start()
+        if presence is not None:
+            await presence.start()
+        tasks.append(asyncio.ensure_future(warmUp()))
+        # Đồng bộ tài khoản định kỳ nếu có khai báo RECONCILE_INTERVAL
+        interval = getattr(config, 'RECONCILE_INTERVAL', None)
+        if interval and worker == 0:
+            tasks.append(asyncio.ensure_future(wifi.reconciler.runPeriodically(interval)))
+        state['started'] = True
+
+    async def drain(app):
+        # Chạy khi webapp ngừng nhận kết nối mới: báo chưa sẵn sàng, chờ các lần đăng nhập đang xử lý
+        state['draining'] = True
+        if presence is not None:
+            # Ngắt các client đang theo dõi để request của chúng kết thúc
+            await presence.close()
+        if not await loginScheduler.drain(shutdownTimeout):
+            logging.warning('Hết thời gian chờ các lần đăng nhập đang xử lý')
+
+    async def closeUpstream(app):
+        for task in tasks:
+            task.cancel()
+        # Cộng dồn thống kê có thể được bắt đầu từ request ở worker khác worker 0
+        await wifi.attendanceStats.close()
+        await routerAPI.close()
+        await lhuClient.close()
+        await attendanceStore.close()
+        if sharedCache is not None:
+            await sharedCache.close()
+
+    async def ready(request):
+        """Kiểm tra webapp đã sẵn sàng nhận request hay chưa (cho load balancer)
+
+        Returns:
+            web.HTTPException: HTTP 200 khi sẵn sàng, HTTP 503 khi chưa khởi động xong hoặc đang dừng
+        """
+        body = json.dumps({
+            'SanSang': state['started'] and not state['draining'],
+            'DangDung': state['draining'],
+            'DaTaiCache': state['warmed'],
+            'Router': routerAPI.isHealthy()
+        })
+        if not state['started'] or state['draining']:
+            return web.HTTPServiceUnavailable(body=body, content_type='application/json')
+        return web.HTTPOk(body=body, content_type='application/json')
+
+    # Lưu body của các endpoint đọc dữ liệu, trả HTTP 304 khi client đã có nội dung mới nhất
+    responseCache = ResponseCache(maxEntries=getattr(config, 'HTTP_CACHE_SIZE', 256))
+    pastMaxAge = getattr(config, 'HTTP_CACHE_PAST_MAX_AGE', 86400)
+    responseCache.add(wifi.getMemberList, version=wifi.memberListVersion)
+    responseCache.add(wifi.getHotspotUserList)
+    responseCache.add(wifi.getLoggonListByDate, version=wifi.attendanceVersion,
+                      cacheControl=lambda request, version: f'public, max-age={pastMaxAge}' if version else 'no-cache')
+
+    # Giữ lại trace của các request chậm và profile mẫu một số request, xem qua /quan-tri/...
+    tracer = Tracer(
+        slowThreshold=getattr(config, 'TRACE_SLOW_THRESHOLD', 1.0),
+        bufferSize=getattr(config, 'TRACE_BUFFER_SIZE', 100),
+        profileEvery=getattr(config, 'PROFILE_EVERY', None),
+        profileBufferSize=getattr(config, 'PROFILE_BUFFER_SIZE', 10),
+        adminToken=getattr(config, 'ADMIN_TOKEN', None)
+    )
+
+    # Khởi tạo webapp
+    app = web.Application(middlewares=[requestLogMiddleware, tracer.middleware, metricsMiddleware,
+                                       responseCache.middleware])
+    app.on_startup.append(startUpstream)
+    app.on_shutdown.append(drain)
+    app.on_cleanup.append(closeUpstream)
+    app.add_routes([
+        web.get('/', wifi.getHomepage),
+        web.get('/san-sang', ready),
+        web.get('/metrics', getMetrics),
+        web.get('/lay-danh-sach-dang-nhap/{date}', wifi.getLoggonListByDate),
+        web.get('/lay-danh-sach-dang-nhap/{tuNgay}/{denNgay}', wifi.getLoggonListByRange),
+        web.get('/lay-so-luong-thanh-vien', wifi.getTotalNumberOfMembers),
+        web.get('/lay-danh-sach-thanh-vien', wifi.getMemberList),
+        web.get('/lay-danh-sach-user', wifi.getHotspotUserList),
+        web.get('/thong-ke-diem-danh', wifi.getAttendanceStats),
+        web.get('/thong-ke-diem-danh/{mssv}', wifi.getMemberAttendanceStats),
+        web.get('/hang-doi-dang-nhap', wifi.getLoginQueueStats),
+        web.get('/trang-thai-router', wifi.getRouterStatus),
+        web.get('/danh-sach-truc-tuyen', wifi.getOnlineList),
+        web.get('/theo-doi-truc-tuyen', wifi.streamPresence),
+        #####################
+        web.post('/login', wifi.loginHotspot),
+        web.post('/lay-thong-tin-thanh-vien', wifi.getMemberInfo),
+        web.post('/them-thanh-vien', wifi.addMember),
+        web.post('/them-danh-sach-thanh-vien', wifi.addMembers),
+        web.post('/lay-danh-sach-dang-nhap', wifi.getLoggonListByDate),
+        web.post('/lay-user-id', wifi.getHotspotUserID),
+        web.post('/xoa-thanh-vien', wifi.removeMember),
+        web.post('/tao-user', wifi.createHotspotUser),
+        web.post('/chinh-sua-thanh-vien', wifi.editMember),
+        web.post('/doi-mat-khau', wifi.changePassword),
+        web.post('/xoa-tai-khoan', wifi.removeHotspotUser),
+        web.post('/chinh-sua-nhieu-tai-khoan', wifi.editHotspotUsers),
+        web.post('/dat-lai-mat-khau', wifi.resetPasswords),
+        web.post('/xoa-nhieu-tai-khoan', wifi.removeHotspotUsers),
+        web.post('/dong-bo-tai-khoan', wifi.syncHotspotUsers)
+    ])
+    # Endpoint quản trị chỉ được bật khi có ADMIN_TOKEN, trace và profile có thể chứa dữ liệu của người dùng
+    if tracer.adminToken:
+        app.add_routes([
+            web.get('/quan-tri/truy-vet', tracer.getSlowTraces),
+            web.get('/quan-tri/profile', tracer.getProfiles),
+            web.get('/quan-tri/profile/{id}', tracer.getProfile)
+        ])
+
+    # Khởi tạo Cross-Origin Resource Sharing (cors)
+    cors = aiohttp_cors.setup(app, defaults={
+        "*": aiohttp_cors.ResourceOptions(
+            allow_credentials=True,
+            expose_headers="*",
+            allow_headers="*"
+        )
+    })
+
+    # Thêm cors vào từng route
+    for route in list(app.router.routes()):
+        cors.add(route)
+
+    return app
+
+
+def configureLogging():
+    return setupLogging(
+        level=getattr(config, 'LOG_LEVEL', 'INFO'),
+        format=getattr(config, 'LOG_FORMAT', 'json'),
+        sampleRate=getattr(config, 'LOG_SAMPLE_RATE', 1.0)
+    )
+
+
+def runWorker(worker=0, host=None, port=8000, reusePort=False):
+    """Chạy webapp trong process hiện tại, mỗi worker có pool kết nối router và client tapi riêng
+    """
+    # Mỗi process cần thread ghi log riêng
+    listener = configureLogging()
+    try:
+        # Dòng log của từng request do requestLogMiddleware ghi thay cho access log của aiohttp
+        web.run_app(createApp(worker=worker), host=host, port=port, reuse_port=reusePort or None,
+                    shutdown_timeout=getattr(config, 'SHUTDOWN_TIMEOUT', 30.0), access_log=None)
+    finally:
+        listener.stop()
+
 
 if __name__ == '__main__':
-    web.run_app(app, port=8000)
+    host = getattr(config, 'HOST', None)
+    port = getattr(config, 'PORT', 8000)
+    workers = getattr(config, 'WORKERS', 1)
+    if workers > 1 and not canReusePort():
+        logging.warning('Hệ điều hành không hỗ trợ SO_REUSEPORT, chỉ chạy một worker')
+        workers = 1
+    if workers > 1:
+        listener = configureLogging()
+        try:
+            Supervisor(
+                target=functools.partial(runWorker, host=host, port=port, reusePort=True),
+                workers=workers,
+                stopTimeout=getattr(config, 'SHUTDOWN_TIMEOUT', 30.0) + 5.0
+            ).run()
+        finally:
+            listener.stop()
+    else:
+        runWorker(host=host, port=port)
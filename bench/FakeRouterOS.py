@@ -0,0 +1,207 @@
+import asyncio
+import random
+from typing import Dict, List, Optional, Tuple
+
+
+def encodeLength(length: int) -> bytes:
+    if length < 0x80:
+        return length.to_bytes(1, 'big')
+    if length < 0x4000:
+        return (length | 0x8000).to_bytes(2, 'big')
+    if length < 0x200000:
+        return (length | 0xC00000).to_bytes(3, 'big')
+    if length < 0x10000000:
+        return (length | 0xE0000000).to_bytes(4, 'big')
+    return b'\xf0' + length.to_bytes(4, 'big')
+
+
+async def readLength(reader: asyncio.StreamReader) -> int:
+    first = (await reader.readexactly(1))[0]
+    if first < 0x80:
+        return first
+    if first < 0xC0:
+        return ((first & 0x3F) << 8) | (await reader.readexactly(1))[0]
+    if first < 0xE0:
+        return ((first & 0x1F) << 16) | int.from_bytes(await reader.readexactly(2), 'big')
+    if first < 0xF0:
+        return ((first & 0x0F) << 24) | int.from_bytes(await reader.readexactly(3), 'big')
+    return int.from_bytes(await reader.readexactly(4), 'big')
+
+
+async def readSentence(reader: asyncio.StreamReader) -> List[str]:
+    words = []
+    while True:
+        length = await readLength(reader)
+        if length == 0:
+            return words
+        words.append((await reader.readexactly(length)).decode())
+
+
+def encodeSentence(words: List[str]) -> bytes:
+    data = bytearray()
+    for word in words:
+        raw = word.encode()
+        data += encodeLength(len(raw)) + raw
+    data += b'\x00'
+    return bytes(data)
+
+
+class FakeRouterOS:
+    def __init__(self, latency: float = 0.0, errorRate: float = 0.0, users: int = 0, seed: int = 1) -> None:
+        """Router Mikrotik giả lập, nói đúng giao thức API mà routeros_api sử dụng
+
+        Hỗ trợ các lệnh ứng dụng đang dùng: /login, /system/identity/print,
+        /ip/hotspot/active/login|print|listen|remove, /cancel, /ip/hotspot/user/print|add|set|remove.
+        Mỗi lệnh chờ latency giây, lệnh login có errorRate khả năng trả về lỗi sai mật khẩu.
+
+        Args:
+            latency (float): Độ trễ (giây) của mỗi lệnh
+            errorRate (float): Tỉ lệ lệnh login bị lỗi
+            users (int): Số tài khoản hotspot có sẵn
+            seed (int): Seed cho random
+        """
+        self.latency = latency
+        self.errorRate = errorRate
+        self.random = random.Random(seed)
+        self.nextId = 1
+        self.users: Dict[str, Dict[str, str]] = {}
+        # Các phiên đăng nhập đang hoạt động và các lệnh listen đang chờ thay đổi
+        self.sessions: Dict[str, Dict[str, str]] = {}
+        self.listeners: Dict[Tuple[asyncio.StreamWriter, Optional[str]], None] = {}
+        for i in range(users):
+            self.addUser({'name': str(100000000 + i), 'password': '1', 'profile': 'student'})
+        self.commands = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    def addUser(self, attributes: Dict[str, str]) -> str:
+        id = f'*{self.nextId:X}'
+        self.nextId += 1
+        self.users[id] = dict(attributes, **{'.id': id})
+        return id
+
+    def addSession(self, user: str, address: str, mac: str) -> str:
+        # Mỗi địa chỉ MAC chỉ có một phiên, đăng nhập lại sẽ thay phiên cũ
+        for id, session in list(self.sessions.items()):
+            if session['mac-address'].lower() == mac.lower():
+                self.removeSession(id)
+        id = f'*{self.nextId:X}'
+        self.nextId += 1
+        self.sessions[id] = {'.id': id, 'server': 'hotspot1', 'user': user, 'address': address,
+                             'mac-address': mac, 'login-by': 'api', 'uptime': '0s'}
+        self.notify(self.sessions[id])
+        return id
+
+    def removeSession(self, id: str) -> bool:
+        session = self.sessions.pop(id, None)
+        if session is None:
+            return False
+        self.notify({'.id': id, '.dead': 'yes'})
+        return True
+
+    def notify(self, row: Dict[str, str]) -> None:
+        reply = ['!re'] + [f'={key}={value}' for key, value in row.items()]
+        for writer, tag in list(self.listeners):
+            if writer.is_closing():
+                self.listeners.pop((writer, tag), None)
+                continue
+            writer.write(encodeSentence(reply + [f'.tag={tag}'] if tag is not None else reply))
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                words = await readSentence(reader)
+                if not words:
+                    continue
+                command, attributes, queries, tag = self.parse(words)
+                self.commands += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if command == '/ip/hotspot/active/listen':
+                    # Không trả lời ngay, các thay đổi được gửi qua notify cho tới khi bị /cancel
+                    self.listeners[(writer, tag)] = None
+                    continue
+                if command == '/cancel':
+                    if self.listeners.pop((writer, attributes.get('tag')), None) is not None:
+                        writer.write(encodeSentence(['!trap', '=category=2', '=message=interrupted',
+                                                     f".tag={attributes['tag']}"]))
+                        writer.write(encodeSentence(['!done', f".tag={attributes['tag']}"]))
+                for reply in self.execute(command, attributes, queries):
+                    if tag is not None:
+                        reply = reply + [f'.tag={tag}']
+                    writer.write(encodeSentence(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # CancelledError khi server dừng trong lúc client (như lệnh listen) vẫn giữ kết nối
+            pass
+        finally:
+            for key in [key for key in self.listeners if key[0] is writer]:
+                del self.listeners[key]
+            writer.close()
+
+    @staticmethod
+    def parse(words: List[str]) -> Tuple[str, Dict[str, str], Dict[str, str], Optional[str]]:
+        attributes: Dict[str, str] = {}
+        queries: Dict[str, str] = {}
+        tag = None
+        for word in words[1:]:
+            if word.startswith('='):
+                key, _, value = word[1:].partition('=')
+                attributes[key] = value
+            elif word.startswith('?'):
+                key, _, value = word[1:].partition('=')
+                queries[key] = value
+            elif word.startswith('.tag='):
+                tag = word[5:]
+        return words[0], attributes, queries, tag
+
+    @staticmethod
+    def trap(message: str) -> List[List[str]]:
+        return [['!trap', f'=message={message}'], ['!done']]
+
+    def execute(self, command: str, attributes: Dict[str, str], queries: Dict[str, str]) -> List[List[str]]:
+        if command == '/login':
+            return [['!done']]
+        if command == '/system/identity/print':
+            return [['!re', '=name=FakeRouterOS'], ['!done']]
+        if command == '/ip/hotspot/active/login':
+            if self.errorRate and self.random.random() < self.errorRate:
+                return self.trap('invalid username or password')
+            self.addSession(attributes.get('user', ''), attributes.get('ip', ''), attributes.get('mac-address', ''))
+            return [['!done']]
+        if command == '/ip/hotspot/active/print':
+            return [['!re'] + [f'={key}={value}' for key, value in row.items()]
+                    for row in self.sessions.values()] + [['!done']]
+        if command == '/ip/hotspot/active/remove':
+            if not self.removeSession(attributes.get('numbers', '')):
+                return self.trap('no such item')
+            return [['!done']]
+        if command == '/cancel':
+            return [['!done']]
+        if command == '/ip/hotspot/user/print':
+            rows = [user for user in self.users.values()
+                    if all(user.get(key) == value for key, value in queries.items())]
+            return [['!re'] + [f'={key}={value}' for key, value in row.items()] for row in rows] + [['!done']]
+        if command == '/ip/hotspot/user/add':
+            name = attributes.get('name', '')
+            if any(user['name'] == name for user in self.users.values()):
+                return self.trap('failure: already have user with this name for this server')
+            return [['!done', f'=ret={self.addUser(attributes)}']]
+        if command in ('/ip/hotspot/user/set', '/ip/hotspot/user/remove'):
+            id = attributes.pop('numbers', '')
+            if id not in self.users:
+                return self.trap('no such item')
+            if command.endswith('remove'):
+                del self.users[id]
+            else:
+                self.users[id].update(attributes)
+            return [['!done']]
+        return self.trap('no such command')
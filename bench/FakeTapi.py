@@ -0,0 +1,79 @@
+import asyncio
+import random
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+class FakeTapi:
+    def __init__(self, members: int = 500, attendance: int = 2000, latency: float = 0.0, seed: int = 1) -> None:
+        """API tapi.lhu.edu.vn/nema/auth giả lập với dữ liệu sinh ngẫu nhiên
+
+        Args:
+            members (int): Số thành viên trả về từ CLB_Select_AllThanhVien
+            attendance (int): Số lượt điểm danh mỗi ngày trả về từ CLB_DiemDanh_Select_byDate
+            latency (float): Độ trễ (giây) của mỗi request
+            seed (int): Seed cho random
+        """
+        self.latency = latency
+        self.attendance = attendance
+        self.random = random.Random(seed)
+        self.members: List[Dict] = [{
+            'UserID': i,
+            'MSSV': str(100000000 + i),
+            'HoTen': f'Nguyễn Văn {i}',
+            'NgaySinh': '2000-01-22',
+            'Lop': f'22CT{i % 10}',
+            'Email': f'sv{i}@lhu.edu.vn',
+            'DienThoai': '0987654321'
+        } for i in range(members)]
+        self.requests = 0
+        self.runner: Optional[web.AppRunner] = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/nema/auth/{name}', self.handle)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        return self.runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def attendanceByDate(self, date: str) -> List[Dict]:
+        rows = []
+        for i in range(self.attendance):
+            member = self.members[i % len(self.members)] if self.members else {'MSSV': str(i), 'HoTen': ''}
+            minutes = self.random.randint(0, 90)
+            rows.append({
+                'MSSV': member['MSSV'],
+                'HoTen': member['HoTen'],
+                'ThoiGian': f'{date}T00:00:00',
+                'ThoiGianDiemDanh': f'{17 + (minutes + 30) // 60:02d}:{(minutes + 30) % 60:02d}:00'
+            })
+        return rows
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        name = request.match_info['name']
+        data = await request.json() if request.can_read_body else {}
+
+        if name == 'CLB_Select_AllThanhVien':
+            # Trả về bản sao vì ứng dụng chỉnh sửa trực tiếp dữ liệu nhận được
+            return web.json_response({'data': [dict(member) for member in self.members]})
+        if name == 'CLB_DiemDanh_Select_byDate':
+            return web.json_response({'data': self.attendanceByDate(data.get('Date', '2023-03-17'))})
+        if name == 'CLB_Select_ThanhVien_byMSSV':
+            rows = [dict(member) for member in self.members if member['MSSV'] == data.get('MSSV')]
+            return web.json_response({'data': rows})
+        if name in ('CLB_ThanhVien_Insert', 'CLB_ThanhVien_Update', 'CLB_ThanhVien_Delete'):
+            return web.json_response({'data': 1})
+        return web.json_response({'Message': 'Not found'}, status=404)
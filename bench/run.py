@@ -0,0 +1,227 @@
+"""Benchmark các API chính với router Mikrotik và tapi.lhu.edu.vn giả lập
+
+Chạy từ thư mục gốc của project:
+
+    python -m bench.run                          # Chạy tất cả kịch bản
+    python -m bench.run login-storm -n 2000 -c 200
+    python -m bench.run --json after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from datetime import date
+from typing import Callable, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from bench.FakeRouterOS import FakeRouterOS
+from bench.FakeTapi import FakeTapi
+from module.LHUClient import LHUClient
+from module.Metrics import metricsMiddleware
+from module.RouterPool import RouterPool
+from module.Wifi import Wifi
+
+try:
+    import resource
+except ImportError:                 # Windows không có module resource
+    resource = None
+
+
+def buildApp(routerPort: int, tapiPort: int, args) -> web.Application:
+    router = RouterPool(host='127.0.0.1', port=routerPort, username='admin', password='',
+                        size=args.pool_size, keepaliveInterval=None)
+    client = LHUClient(baseUrl=f'http://127.0.0.1:{tapiPort}/nema/auth')
+    wifi = Wifi(router=router, client=client)
+
+    async def start(app):
+        await client.start()
+
+    async def close(app):
+        await client.close()
+        await router.close()
+
+    app = web.Application(middlewares=[metricsMiddleware])
+    app.on_startup.append(start)
+    app.on_cleanup.append(close)
+    app.add_routes([
+        web.get('/lay-danh-sach-dang-nhap/{date}', wifi.getLoggonListByDate),
+        web.get('/lay-so-luong-thanh-vien', wifi.getTotalNumberOfMembers),
+        web.get('/lay-danh-sach-thanh-vien', wifi.getMemberList),
+        web.get('/lay-danh-sach-user', wifi.getHotspotUserList),
+        web.post('/login', wifi.loginHotspot)
+    ])
+    return app
+
+
+def loginStorm(i: int) -> Dict:
+    return {
+        'method': 'POST', 'path': '/login',
+        'json': {
+            'IP': f'10.0.{i // 250 % 250}.{i % 250 + 1}',
+            'Mac-Address': f'AA:BB:CC:{i // 65536 % 256:02X}:{i // 256 % 256:02X}:{i % 256:02X}',
+            'Username': str(100000000 + i),
+            'Password': '1'
+        }
+    }
+
+
+def memberPolling(i: int) -> Dict:
+    return {'method': 'GET', 'path': '/lay-danh-sach-thanh-vien' if i % 2 == 0 else '/lay-so-luong-thanh-vien'}
+
+
+def attendance(i: int) -> Dict:
+    return {'method': 'GET', 'path': f'/lay-danh-sach-dang-nhap/{date.today().isoformat()}'}
+
+
+def hotspotUsers(i: int) -> Dict:
+    return {'method': 'GET', 'path': '/lay-danh-sach-user'}
+
+
+SCENARIOS: Dict[str, Callable[[int], Dict]] = {
+    'login-storm': loginStorm,
+    'member-polling': memberPolling,
+    'attendance': attendance,
+    'hotspot-users': hotspotUsers
+}
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def peakRss() -> float:
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+async def runScenario(name: str, args) -> Dict:
+    router = FakeRouterOS(latency=args.router_latency, errorRate=args.router_error_rate, users=args.users)
+    tapi = FakeTapi(members=args.members, attendance=args.attendance, latency=args.tapi_latency)
+    routerPort = await router.start()
+    tapiPort = await tapi.start()
+
+    runner = web.AppRunner(buildApp(routerPort, tapiPort, args), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    baseUrl = f'http://127.0.0.1:{runner.addresses[0][1]}'
+
+    makeRequest = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(session: aiohttp.ClientSession, i: int) -> None:
+        nonlocal errors
+        spec = makeRequest(i)
+        async with semaphore:
+            startedAt = time.perf_counter()
+            try:
+                async with session.request(spec['method'], baseUrl + spec['path'], json=spec.get('json')) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - startedAt)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        startedAt = time.perf_counter()
+        await asyncio.gather(*[one(session, i) for i in range(args.requests)])
+        elapsed = time.perf_counter() - startedAt
+    tracedPeak = 0.0
+    if args.trace_memory:
+        tracedPeak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    await runner.cleanup()
+    await tapi.stop()
+    await router.stop()
+
+    return {
+        'scenario': name,
+        'requests': args.requests,
+        'errors': errors,
+        'throughput': args.requests / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'traced_peak_mb': tracedPeak,
+        'peak_rss_mb': peakRss(),
+        'router_commands': router.commands,
+        'tapi_requests': tapi.requests
+    }
+
+
+def printResults(results: List[Dict], baseline: Dict[str, Dict]) -> None:
+    header = f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'rss MB':>9}{'router':>8}{'tapi':>7}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(f"{result['scenario']:<16}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['errors']:>8}{result['peak_rss_mb']:>9.1f}"
+              f"{result['router_commands']:>8}{result['tapi_requests']:>7}")
+        before = baseline.get(result['scenario'])
+        if before:
+            def delta(key: str) -> str:
+                return f"{(result[key] - before[key]) / before[key] * 100:+.1f}%" if before[key] else 'n/a'
+            print(f"{'  vs baseline':<16}{delta('throughput'):>10}{delta('p50_ms'):>10}{delta('p99_ms'):>10}")
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark LoginWiFi với router và tapi giả lập')
+    parser.add_argument('scenarios', nargs='*', default=[],
+                        help=f"Các kịch bản cần chạy ({', '.join(SCENARIOS)}), mặc định chạy tất cả")
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-c', '--concurrency', type=int, default=100)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--users', type=int, default=2000, help='Số tài khoản có sẵn trên router giả lập')
+    parser.add_argument('--members', type=int, default=2000)
+    parser.add_argument('--attendance', type=int, default=5000, help='Số lượt điểm danh mỗi ngày')
+    parser.add_argument('--router-latency', type=float, default=0.005)
+    parser.add_argument('--router-error-rate', type=float, default=0.0)
+    parser.add_argument('--tapi-latency', type=float, default=0.02)
+    parser.add_argument('--trace-memory', action='store_true', help='Đo bộ nhớ cấp phát bằng tracemalloc (chậm hơn)')
+    parser.add_argument('--json', help='Lưu kết quả ra file JSON')
+    parser.add_argument('--compare', help='So sánh với file JSON kết quả trước đó')
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'Không có kịch bản {name}')
+    return args
+
+
+async def main(argv=None) -> None:
+    args = parseArgs(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for name in args.scenarios or list(SCENARIOS):
+        results.append(await runScenario(name, args))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result['scenario']: result for result in json.load(f)}
+    printResults(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -25,6 +25,26 @@ class APIException:
         {
             "errStr": ".target machine actively refused it.*",
             "reason": "Sai hostname hoặc địa chỉ IP của router"
+        },
+        {
+            "errStr": ".*Router timed out.*",
+            "reason": "Router không phản hồi, vui lòng thử lại"
+        },
+        {
+            "errStr": ".*Router circuit open.*",
+            "reason": "Router đang mất kết nối, vui lòng thử lại sau"
+        },
+        {
+            "errStr": ".*All routers failed.*",
+            "reason": "Tất cả router đều không phản hồi"
+        },
+        {
+            "errStr": ".*Router connection lost.*(refused|No route to host|Name or service not known).*",
+            "reason": "Sai hostname hoặc địa chỉ IP của router"
+        },
+        {
+            "errStr": ".*Router connection lost.*",
+            "reason": "Mất kết nối đến router"
         }
     ]
 
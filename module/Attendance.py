@@ -0,0 +1,139 @@
+from datetime import date, time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Trạng thái điểm danh của một lượt đăng nhập
+EARLY = 'early'
+ON_TIME = 'on-time'
+LATE = 'late'
+
+DEFAULT_WINDOW = ('18:00:00', '18:30:00')
+
+
+class AttendanceWindow:
+    __slots__ = ('checkinTime', 'lateTime')
+
+    def __init__(self, checkinTime: str = DEFAULT_WINDOW[0], lateTime: str = DEFAULT_WINDOW[1]) -> None:
+        """Khung giờ điểm danh của một buổi sinh hoạt
+
+        Args:
+            checkinTime (str): Giờ bắt đầu điểm danh (HH:MM:SS), đăng nhập trước giờ này không được tính
+            lateTime (str): Đăng nhập sau giờ này (HH:MM:SS) bị tính là đi trễ
+        """
+        self.checkinTime = time.fromisoformat(checkinTime)
+        self.lateTime = time.fromisoformat(lateTime)
+
+
+class AttendanceSchedule:
+    def __init__(self, windows: Optional[Dict] = None) -> None:
+        """Bảng khung giờ điểm danh theo buổi
+
+        Args:
+            windows (Dict, optional): Khung giờ (giờ điểm danh, giờ trễ) theo key:
+                - 'yyyy-MM-dd': áp dụng cho một ngày cụ thể
+                - 0..6: áp dụng theo thứ trong tuần (0 là thứ Hai)
+                - 'default': áp dụng cho các ngày còn lại, mặc định là 18:00:00 - 18:30:00
+        """
+        windows = dict(windows or {})
+        self.default = AttendanceWindow(*windows.pop('default', DEFAULT_WINDOW))
+        self.windows = {key: AttendanceWindow(*value) for key, value in windows.items()}
+        self.cache: Dict[str, AttendanceWindow] = {}
+
+    def windowFor(self, ngay: str) -> AttendanceWindow:
+        """Lấy khung giờ điểm danh của một ngày
+
+        Args:
+            ngay (str): Ngày có format là yyyy-MM-dd
+
+        Returns:
+            AttendanceWindow: Khung giờ áp dụng cho ngày đó
+        """
+        window = self.cache.get(ngay)
+        if window is None:
+            window = self.windows.get(ngay)
+            if window is None:
+                try:
+                    weekday = date.fromisoformat(ngay).weekday()
+                except ValueError:
+                    weekday = None
+                window = self.windows.get(weekday, self.default)
+            self.cache[ngay] = window
+        return window
+
+
+class AttendanceResult:
+    def __init__(self) -> None:
+        self.present: List[Dict] = []
+        self.early: List[Dict] = []
+        self.lateCount = 0
+
+    def toDict(self) -> Dict:
+        return {
+            'SoLuongCoMat': len(self.present),
+            'SoLuongTre': self.lateCount,
+            'DanhSachCoMat': self.present
+        }
+
+
+def classify(records: Iterable[Dict], schedule: AttendanceSchedule) -> Iterator[Tuple[str, Dict]]:
+    """Phân loại từng lượt đăng nhập, chạy một lượt qua dữ liệu và không giữ lại danh sách
+
+    Args:
+        records (Iterable[Dict]): Dữ liệu từ CLB_DiemDanh_Select_byDate, có ThoiGian và ThoiGianDiemDanh
+        schedule (AttendanceSchedule): Khung giờ điểm danh
+
+    Yields:
+        Tuple[str, Dict]: Trạng thái (EARLY, ON_TIME, LATE) và bản ghi đã có Ngay, Gio, DiTre
+    """
+    parseTime = time.fromisoformat
+    for record in records:
+        row = {key: value for key, value in record.items() if key != 'ThoiGian' and key != 'ThoiGianDiemDanh'}
+        ngay = record['ThoiGian'].split('T', 1)[0]
+        loggonTime = parseTime(record['ThoiGianDiemDanh'])
+        row['Ngay'] = ngay
+        row['Gio'] = str(loggonTime)
+
+        window = schedule.windowFor(ngay)
+        if loggonTime < window.checkinTime:
+            yield EARLY, row
+        elif loggonTime > window.lateTime:
+            row['DiTre'] = True
+            yield LATE, row
+        else:
+            row['DiTre'] = False
+            yield ON_TIME, row
+
+
+def presentRows(records: Iterable[Dict], schedule: AttendanceSchedule) -> Iterator[Dict]:
+    """Lọc ra các lượt đăng nhập được tính là có mặt (đúng giờ hoặc trễ)
+
+    Args:
+        records (Iterable[Dict]): Dữ liệu điểm danh
+        schedule (AttendanceSchedule): Khung giờ điểm danh
+
+    Yields:
+        Dict: Bản ghi đã có Ngay, Gio, DiTre
+    """
+    for status, row in classify(records, schedule):
+        if status != EARLY:
+            yield row
+
+
+def summarize(records: Iterable[Dict], schedule: AttendanceSchedule) -> AttendanceResult:
+    """Tổng hợp danh sách có mặt, đi trễ và đến sớm
+
+    Args:
+        records (Iterable[Dict]): Dữ liệu điểm danh
+        schedule (AttendanceSchedule): Khung giờ điểm danh
+
+    Returns:
+        AttendanceResult: Kết quả điểm danh
+    """
+    result = AttendanceResult()
+    for status, row in classify(records, schedule):
+        if status == EARLY:
+            result.early.append(row)
+            continue
+        if status == LATE:
+            result.lateCount += 1
+        result.present.append(row)
+    return result
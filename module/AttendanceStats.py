@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import logging
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .Attendance import AttendanceSchedule, EARLY, ON_TIME, classify
+from .AttendanceStore import AttendanceStore
+
+# Tiêu chí xếp hạng -> thuộc tính của MemberStats
+RANKINGS = {
+    'comat': 'present',
+    'tre': 'late',
+    'vang': 'absent',
+    'chuoi': 'streak',
+    'vanglientiep': 'absentStreak'
+}
+
+
+class MemberStats:
+    __slots__ = ('sessions', 'present', 'late', 'absent', 'streak', 'longestStreak', 'absentStreak', 'lastSeen')
+
+    def __init__(self, sessions: int = 0, present: int = 0, late: int = 0, absent: int = 0, streak: int = 0,
+                 longestStreak: int = 0, absentStreak: int = 0, lastSeen: Optional[str] = None) -> None:
+        """Số liệu cộng dồn của một thành viên qua các buổi sinh hoạt
+
+        Args:
+            sessions (int): Số buổi tính từ khi thống kê
+            present (int): Số buổi có mặt (đúng giờ hoặc trễ)
+            late (int): Số buổi đi trễ
+            absent (int): Số buổi vắng
+            streak (int): Số buổi có mặt liên tiếp tính đến buổi gần nhất
+            longestStreak (int): Chuỗi có mặt dài nhất
+            absentStreak (int): Số buổi vắng liên tiếp tính đến buổi gần nhất
+            lastSeen (str, optional): Ngày có mặt gần nhất
+        """
+        self.sessions = sessions
+        self.present = present
+        self.late = late
+        self.absent = absent
+        self.streak = streak
+        self.longestStreak = longestStreak
+        self.absentStreak = absentStreak
+        self.lastSeen = lastSeen
+
+    def attend(self, ngay: str, late: bool) -> None:
+        self.sessions += 1
+        self.present += 1
+        self.late += late
+        self.streak += 1
+        self.longestStreak = max(self.longestStreak, self.streak)
+        self.absentStreak = 0
+        self.lastSeen = ngay
+
+    def miss(self) -> None:
+        self.sessions += 1
+        self.absent += 1
+        self.streak = 0
+        self.absentStreak += 1
+
+    def toRow(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def copy(self) -> 'MemberStats':
+        return MemberStats(**self.toRow())
+
+    def toDict(self) -> Dict:
+        return {
+            'SoBuoi': self.sessions,
+            'CoMat': self.present,
+            'DiTre': self.late,
+            'Vang': self.absent,
+            'TiLeCoMat': round(self.present / self.sessions, 4) if self.sessions else None,
+            'ChuoiCoMat': self.streak,
+            'ChuoiDaiNhat': self.longestStreak,
+            'VangLienTiep': self.absentStreak,
+            'LanCuoiCoMat': self.lastSeen
+        }
+
+
+def dayResult(records: Iterable[Dict], schedule: AttendanceSchedule) -> Dict[str, bool]:
+    """Kết quả của từng thành viên trong một ngày, một thành viên có thể đăng nhập nhiều lần
+
+    Returns:
+        Dict[str, bool]: MSSV có mặt -> True nếu đi trễ (không có lượt đăng nhập nào đúng giờ)
+    """
+    result: Dict[str, bool] = {}
+    for status, row in classify(records, schedule):
+        mssv = row.get('MSSV')
+        if status == EARLY or mssv is None:
+            continue
+        result[mssv] = result.get(mssv, True) and status != ON_TIME
+    return result
+
+
+class AttendanceStats:
+    def __init__(self, loadDay: Callable[[str], Awaitable[List[Dict]]], loadRoster: Callable[[], Awaitable[List[Dict]]],
+                 schedule: AttendanceSchedule, store: Optional[AttendanceStore] = None,
+                 startDate: Optional[str] = None, fetchConcurrency: int = 8) -> None:
+        """Thống kê điểm danh theo thành viên, cộng dồn từng ngày thay vì tính lại toàn bộ lịch sử
+
+        Mỗi ngày đã qua chỉ được cộng một lần, theo thứ tự ngày để tính được chuỗi có mặt. Ngày không có
+        lượt đăng nhập nào được xem là không có buổi sinh hoạt. Thành viên vắng được tính theo danh sách
+        thành viên tại thời điểm cộng dồn.
+
+        Args:
+            loadDay (Callable): Coroutine function lấy dữ liệu điểm danh của một ngày
+            loadRoster (Callable): Coroutine function lấy danh sách thành viên hiện tại (có MSSV)
+            schedule (AttendanceSchedule): Khung giờ điểm danh
+            store (AttendanceStore, optional): Nơi lưu thống kê để không phải cộng dồn lại khi khởi động
+            startDate (str, optional): Ngày bắt đầu thống kê (yyyy-MM-dd), mặc định 180 ngày trước
+            fetchConcurrency (int): Số ngày được tải đồng thời khi cần cộng dồn nhiều ngày
+        """
+        self.loadDay = loadDay
+        self.loadRoster = loadRoster
+        self.schedule = schedule
+        self.store = store
+        self.startDate = startDate or (date.today() - timedelta(days=180)).isoformat()
+        self.fetchConcurrency = fetchConcurrency
+        self.members: Dict[str, MemberStats] = {}
+        self.lastDate: Optional[str] = None
+        self.loaded = False
+        # True khi đã cộng dồn xong lần đầu, trước đó request nhận HTTP 503 thay vì chờ cộng dồn nhiều ngày
+        self.ready = False
+        self.task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def reload(self) -> None:
+        if self.store is None:
+            self.loaded = True
+            return
+        self.lastDate, rows = await self.store.loadStats()
+        self.members = {mssv: MemberStats(**row) for mssv, row in rows.items()}
+        self.loaded = True
+
+    def fold(self, ngay: str, attended: Dict[str, bool],
+             roster: Set[str]) -> Tuple[Dict[str, MemberStats], Dict[str, MemberStats]]:
+        """Cộng kết quả của một buổi vào bản sao của thống kê, thống kê hiện tại không bị thay đổi
+        để chỉ được thay khi đã lưu thành công
+
+        Returns:
+            Tuple: Thống kê mới của mọi thành viên và các thành viên đã thay đổi
+        """
+        members = dict(self.members)
+        changed: Dict[str, MemberStats] = {}
+        for mssv in roster | attended.keys():
+            stats = members.get(mssv)
+            stats = members[mssv] = stats.copy() if stats is not None else MemberStats()
+            if mssv in attended:
+                stats.attend(ngay, attended[mssv])
+            else:
+                stats.miss()
+            changed[mssv] = stats
+        return members, changed
+
+    async def update(self) -> None:
+        """Cộng dồn các ngày đã qua chưa được thống kê, thường chỉ là ngày hôm qua
+        """
+        async with self.lock:
+            if not self.loaded or (self.store is not None and await self.store.lastStatsDate() != self.lastDate):
+                # Lần đầu, hoặc worker khác đã cộng dồn thêm ngày
+                await self.reload()
+            first = date.fromisoformat(self.startDate)
+            if self.lastDate is not None:
+                first = max(first, date.fromisoformat(self.lastDate) + timedelta(days=1))
+            yesterday = date.today() - timedelta(days=1)
+            ngays = [(first + timedelta(days=i)).isoformat() for i in range((yesterday - first).days + 1)]
+            if not ngays:
+                return
+
+            roster = None
+            for start in range(0, len(ngays), self.fetchConcurrency):
+                chunk = ngays[start:start + self.fetchConcurrency]
+                days = await asyncio.gather(*[self.loadDay(ngay) for ngay in chunk])
+                for ngay, records in zip(chunk, days):
+                    attended = dayResult(records, self.schedule)
+                    if attended and roster is None:
+                        roster = {member['MSSV'] for member in await self.loadRoster() if member.get('MSSV')}
+                    members, changed = self.fold(ngay, attended, roster) if attended else (self.members, {})
+                    if self.store is not None and not await self.store.saveStats(
+                            ngay, {mssv: stats.toRow() for mssv, stats in changed.items()}):
+                        # Worker khác đã cộng dồn ngày này, đọc lại kết quả đã lưu
+                        await self.reload()
+                        continue
+                    self.members = members
+                    self.lastDate = ngay
+
+    def start(self) -> asyncio.Task:
+        """Chạy cộng dồn lần đầu trong background nếu chưa chạy (khi khởi động webapp hoặc lần trước bị lỗi)
+        """
+        if self.task is None or (self.task.done() and not self.ready):
+            self.task = asyncio.ensure_future(self.warmUp())
+        return self.task
+
+    async def warmUp(self) -> None:
+        try:
+            await self.update()
+            self.ready = True
+        except Exception as ex:
+            logging.warning('Không cộng dồn được thống kê điểm danh: %s', ex)
+
+    async def close(self) -> None:
+        """Dừng cộng dồn lần đầu nếu đang chạy (khi tắt webapp)
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def refresh(self) -> bool:
+        """Cập nhật thống kê trong request: khi đã sẵn sàng thì thường chỉ còn ngày hôm qua cần cộng dồn.
+        Nếu chưa sẵn sàng thì chạy cộng dồn lần đầu trong background và không chờ
+
+        Returns:
+            bool: True nếu thống kê đã sẵn sàng để trả về
+        """
+        if not self.ready:
+            self.start()
+            return False
+        await self.update()
+        return True
+
+    def sessions(self) -> int:
+        return max((stats.sessions for stats in self.members.values()), default=0)
+
+    def summary(self, mssv: str) -> Optional[Dict]:
+        stats = self.members.get(mssv)
+        return stats.toDict() if stats is not None else None
+
+    def leaderboard(self, by: str = 'comat', top: int = 20) -> List[Dict]:
+        """Xếp hạng thành viên theo một tiêu chí trong RANKINGS
+
+        Returns:
+            List[Dict]: Tối đa top thành viên, mỗi phần tử có MSSV và thống kê
+        """
+        attribute = RANKINGS[by]
+        best = heapq.nlargest(top, self.members.items(), key=lambda item: getattr(item[1], attribute))
+        return [dict(stats.toDict(), MSSV=mssv) for mssv, stats in best]
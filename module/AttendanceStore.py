@@ -0,0 +1,184 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class AttendanceStore:
+    def __init__(self, path: str = 'attendance.db') -> None:
+        """Lưu dữ liệu điểm danh của các ngày đã qua vào SQLite
+
+        Dữ liệu của một ngày đã qua không thay đổi nên chỉ cần lấy từ tapi một lần.
+        Mọi truy vấn chạy trên một thread riêng để không chặn event loop.
+
+        Args:
+            path (str): Đường dẫn đến file SQLite
+        """
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='attendance-store')
+        self.db: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            # WAL để các worker process cùng đọc/ghi một file
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript('''
+                CREATE TABLE IF NOT EXISTS attendance (
+                    ngay TEXT NOT NULL,
+                    mssv TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_attendance_ngay ON attendance (ngay);
+                CREATE INDEX IF NOT EXISTS idx_attendance_mssv ON attendance (mssv, ngay);
+                CREATE TABLE IF NOT EXISTS attendance_dates (
+                    ngay TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS member_stats (
+                    mssv TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS stats_dates (
+                    ngay TEXT PRIMARY KEY
+                );
+            ''')
+        return self.db
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _getDate(self, ngay: str) -> Optional[List[Dict]]:
+        db = self.connect()
+        if db.execute('SELECT 1 FROM attendance_dates WHERE ngay = ?', (ngay,)).fetchone() is None:
+            return None
+        rows = db.execute('SELECT data FROM attendance WHERE ngay = ?', (ngay,))
+        return [json.loads(data) for (data,) in rows]
+
+    def _saveDate(self, ngay: str, records: List[Dict]) -> None:
+        db = self.connect()
+        with db:
+            db.execute('DELETE FROM attendance WHERE ngay = ?', (ngay,))
+            db.executemany(
+                'INSERT INTO attendance (ngay, mssv, data) VALUES (?, ?, ?)',
+                [(ngay, record.get('MSSV'), json.dumps(record)) for record in records])
+            db.execute('INSERT OR IGNORE INTO attendance_dates (ngay) VALUES (?)', (ngay,))
+
+    def _missingDates(self, ngays: List[str]) -> List[str]:
+        db = self.connect()
+        stored = set()
+        # SQLite giới hạn số tham số trong một câu lệnh nên chia nhỏ danh sách
+        for i in range(0, len(ngays), 500):
+            chunk = ngays[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            stored.update(ngay for (ngay,) in db.execute(
+                f'SELECT ngay FROM attendance_dates WHERE ngay IN ({placeholders})', chunk))
+        return [ngay for ngay in ngays if ngay not in stored]
+
+    def _getRange(self, tuNgay: str, denNgay: str, mssv: Optional[str]) -> List[Dict]:
+        db = self.connect()
+        if mssv is None:
+            rows = db.execute(
+                'SELECT data FROM attendance WHERE ngay BETWEEN ? AND ? ORDER BY ngay',
+                (tuNgay, denNgay))
+        else:
+            rows = db.execute(
+                'SELECT data FROM attendance WHERE mssv = ? AND ngay BETWEEN ? AND ? ORDER BY ngay',
+                (mssv, tuNgay, denNgay))
+        return [json.loads(data) for (data,) in rows]
+
+    def _lastStatsDate(self) -> Optional[str]:
+        return self.connect().execute('SELECT MAX(ngay) FROM stats_dates').fetchone()[0]
+
+    def _loadStats(self) -> Tuple[Optional[str], Dict[str, Dict]]:
+        db = self.connect()
+        rows = {mssv: json.loads(data) for mssv, data in db.execute('SELECT mssv, data FROM member_stats')}
+        return self._lastStatsDate(), rows
+
+    def _saveStats(self, ngay: str, rows: Dict[str, Dict]) -> bool:
+        db = self.connect()
+        try:
+            with db:
+                # Khoá chính của stats_dates bảo đảm mỗi ngày chỉ được cộng dồn một lần
+                db.execute('INSERT INTO stats_dates (ngay) VALUES (?)', (ngay,))
+                db.executemany('INSERT OR REPLACE INTO member_stats (mssv, data) VALUES (?, ?)',
+                               [(mssv, json.dumps(row)) for mssv, row in rows.items()])
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    async def getDate(self, ngay: str) -> Optional[List[Dict]]:
+        """Lấy dữ liệu điểm danh đã lưu của một ngày
+
+        Args:
+            ngay (str): Ngày có format là yyyy-MM-dd
+
+        Returns:
+            Optional[List[Dict]]: Dữ liệu điểm danh, None nếu ngày này chưa được lưu
+        """
+        return await self.run(self._getDate, ngay)
+
+    async def saveDate(self, ngay: str, records: Iterable[Dict]) -> None:
+        """Lưu dữ liệu điểm danh của một ngày đã qua
+
+        Args:
+            ngay (str): Ngày có format là yyyy-MM-dd
+            records (Iterable[Dict]): Dữ liệu nhận được từ CLB_DiemDanh_Select_byDate
+        """
+        await self.run(self._saveDate, ngay, list(records))
+
+    async def missingDates(self, ngays: List[str]) -> List[str]:
+        """Lọc ra các ngày chưa có trong store
+
+        Args:
+            ngays (List[str]): Danh sách ngày có format là yyyy-MM-dd
+
+        Returns:
+            List[str]: Các ngày chưa được lưu
+        """
+        return await self.run(self._missingDates, ngays)
+
+    async def getRange(self, tuNgay: str, denNgay: str, mssv: Optional[str] = None) -> List[Dict]:
+        """Lấy dữ liệu điểm danh trong một khoảng ngày bằng một truy vấn
+
+        Args:
+            tuNgay (str): Ngày bắt đầu (yyyy-MM-dd)
+            denNgay (str): Ngày kết thúc (yyyy-MM-dd), tính cả ngày này
+            mssv (str, optional): Chỉ lấy dữ liệu của một thành viên
+
+        Returns:
+            List[Dict]: Dữ liệu điểm danh sắp xếp theo ngày
+        """
+        return await self.run(self._getRange, tuNgay, denNgay, mssv)
+
+    async def lastStatsDate(self) -> Optional[str]:
+        """Ngày cuối cùng đã được cộng vào thống kê theo thành viên
+        """
+        return await self.run(self._lastStatsDate)
+
+    async def loadStats(self) -> Tuple[Optional[str], Dict[str, Dict]]:
+        """Đọc thống kê theo thành viên đã lưu
+
+        Returns:
+            Tuple[Optional[str], Dict[str, Dict]]: Ngày cuối cùng đã cộng dồn và thống kê theo MSSV
+        """
+        return await self.run(self._loadStats)
+
+    async def saveStats(self, ngay: str, rows: Dict[str, Dict]) -> bool:
+        """Lưu thống kê sau khi cộng dồn một ngày
+
+        Args:
+            ngay (str): Ngày vừa được cộng dồn
+            rows (Dict[str, Dict]): Thống kê đã thay đổi theo MSSV
+
+        Returns:
+            bool: False nếu ngày này đã được cộng dồn trước đó (bởi worker khác)
+        """
+        return await self.run(self._saveStats, ngay, rows)
+
+    async def close(self) -> None:
+        if self.db is not None:
+            await self.run(self.db.close)
+            self.db = None
+        self.executor.shutdown(wait=False)
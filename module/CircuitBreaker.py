@@ -0,0 +1,80 @@
+import time
+from typing import Dict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    def __init__(self, failureThreshold: int = 3, resetTimeout: float = 5.0, maxResetTimeout: float = 60.0) -> None:
+        """Ngắt mạch khi router liên tục lỗi kết nối để các request báo lỗi ngay thay vì chờ timeout
+
+        Sau resetTimeout giây cho phép một lần thử lại (half-open). Nếu lần thử lại vẫn lỗi thì
+        thời gian chờ tăng gấp đôi, tối đa maxResetTimeout.
+
+        Args:
+            failureThreshold (int): Số lỗi kết nối liên tiếp trước khi ngắt mạch
+            resetTimeout (float): Thời gian chờ (giây) ban đầu trước khi thử lại
+            maxResetTimeout (float): Thời gian chờ (giây) tối đa
+        """
+        self.failureThreshold = failureThreshold
+        self.baseResetTimeout = resetTimeout
+        self.resetTimeout = resetTimeout
+        self.maxResetTimeout = maxResetTimeout
+        self.state = CLOSED
+        self.failures = 0
+        self.openedAt = 0.0
+        self.lastFailure = ''
+        self.lastSuccessAt = 0.0
+
+    def allow(self) -> bool:
+        """Kiểm tra có được gửi lệnh đến router hay không
+
+        Returns:
+            bool: False nếu mạch đang ngắt
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.openedAt < self.resetTimeout:
+                return False
+            # Cho một request đi qua để thử lại
+            self.state = HALF_OPEN
+            return True
+        # Đang có một request thử lại, các request khác báo lỗi ngay
+        return self.state == CLOSED
+
+    def recordSuccess(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.resetTimeout = self.baseResetTimeout
+        self.lastSuccessAt = time.time()
+
+    def recordFailure(self, reason: str = '') -> None:
+        self.failures += 1
+        self.lastFailure = reason
+        if self.state == HALF_OPEN:
+            # Thử lại vẫn lỗi, chờ lâu hơn trước khi thử tiếp
+            self.resetTimeout = min(self.resetTimeout * 2, self.maxResetTimeout)
+            self.trip()
+        elif self.failures >= self.failureThreshold:
+            self.trip()
+
+    def trip(self) -> None:
+        self.state = OPEN
+        self.openedAt = time.monotonic()
+
+    def retryIn(self) -> float:
+        """Số giây còn lại trước lần thử lại tiếp theo
+        """
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.resetTimeout - (time.monotonic() - self.openedAt))
+
+    def stats(self) -> Dict:
+        return {
+            'TrangThai': self.state,
+            'LoiLienTiep': self.failures,
+            'LoiGanNhat': self.lastFailure,
+            'ThuLaiSau': self.retryIn(),
+            'LanThanhCongCuoi': self.lastSuccessAt
+        }
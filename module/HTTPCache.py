@@ -0,0 +1,127 @@
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from aiohttp import web
+
+from .JSONStream import streamMode
+
+# Hàm tính phiên bản dữ liệu của một request, None nếu không dùng được body đã lưu
+VersionFunc = Callable[[web.Request], Awaitable[Optional[Hashable]]]
+# Hàm tạo header Cache-Control từ request và phiên bản dữ liệu
+CacheControlFunc = Callable[[web.Request, Optional[Hashable]], str]
+
+
+class CachedBody:
+    __slots__ = ('version', 'body', 'contentType', 'etag', 'lastModified')
+
+    def __init__(self, version: Optional[Hashable], body: bytes, contentType: str, etag: str,
+                 lastModified: datetime) -> None:
+        self.version = version
+        self.body = body
+        self.contentType = contentType
+        self.etag = etag
+        self.lastModified = lastModified
+
+
+class Rule:
+    __slots__ = ('version', 'cacheControl')
+
+    def __init__(self, version: Optional[VersionFunc], cacheControl: CacheControlFunc) -> None:
+        self.version = version
+        self.cacheControl = cacheControl
+
+
+class ResponseCache:
+    def __init__(self, maxEntries: int = 256) -> None:
+        """Cache body đã serialize của các endpoint đọc dữ liệu, hỗ trợ ETag / Last-Modified và HTTP 304
+
+        Với mỗi handler được đăng ký, body được lưu cùng phiên bản dữ liệu tạo ra nó. Khi phiên bản không đổi,
+        body đã lưu được trả lại mà không gọi handler. ETag là hash của body nên client chỉ nhận HTTP 304
+        khi nội dung không đổi, kể cả khi phiên bản không xác định được.
+
+        Args:
+            maxEntries (int): Số body tối đa được lưu, body ít dùng nhất bị bỏ trước
+        """
+        self.maxEntries = maxEntries
+        self.rules: Dict[Any, Rule] = {}
+        self.entries: 'OrderedDict[Tuple[str, str], CachedBody]' = OrderedDict()
+
+    def add(self, handler: Callable, version: Optional[VersionFunc] = None,
+            cacheControl: Optional[CacheControlFunc] = None) -> None:
+        """Bật cache cho một handler
+
+        Args:
+            handler (Callable): Handler của route (GET)
+            version (Callable, optional): Coroutine trả về phiên bản của dữ liệu. Không có thì handler luôn được gọi,
+                                          chỉ tiết kiệm băng thông bằng HTTP 304
+            cacheControl (Callable, optional): Tạo header Cache-Control, mặc định 'no-cache' (luôn hỏi lại server)
+        """
+        self.rules[handler] = Rule(version, cacheControl or (lambda request, version: 'no-cache'))
+
+    @staticmethod
+    def etagOf(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    @staticmethod
+    def notModified(request: web.Request, entry: CachedBody) -> bool:
+        """Kiểm tra If-None-Match, nếu không có thì If-Modified-Since
+        """
+        ifNoneMatch = request.headers.get('If-None-Match')
+        if ifNoneMatch is not None:
+            tags = {tag.strip().removeprefix('W/') for tag in ifNoneMatch.split(',')}
+            return '*' in tags or entry.etag in tags
+        since = request.if_modified_since
+        return since is not None and entry.lastModified <= since
+
+    def store(self, key: Tuple[str, str], version: Optional[Hashable], response: web.Response) -> Optional[CachedBody]:
+        body = response.body
+        if not isinstance(body, bytes):
+            return None
+        etag = self.etagOf(body)
+        previous = self.entries.get(key)
+        if previous is not None and previous.etag == etag:
+            lastModified = previous.lastModified
+        else:
+            lastModified = datetime.now(timezone.utc).replace(microsecond=0)
+        entry = CachedBody(version, body, response.content_type, etag, lastModified)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self) -> None:
+        self.entries.clear()
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        rule = self.rules.get(request.match_info.handler)
+        # Chỉ cache GET, bỏ qua các response dạng stream (?stream=... hoặc Accept: application/x-ndjson)
+        if rule is None or request.method != 'GET' or streamMode(request):
+            return await handler(request)
+
+        key = (request.path, request.query_string)
+        version = await rule.version(request) if rule.version is not None else None
+        entry = self.entries.get(key)
+        if entry is None or version is None or entry.version != version:
+            response = await handler(request)
+            if response.status != 200 or response.prepared:
+                return response
+            entry = self.store(key, version, response)
+            if entry is None:
+                return response
+        else:
+            self.entries.move_to_end(key)
+
+        headers = {
+            'ETag': entry.etag,
+            'Last-Modified': entry.lastModified.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+            'Cache-Control': rule.cacheControl(request, version),
+            # Cùng URL nhưng Accept khác có thể là response dạng stream
+            'Vary': 'Accept'
+        }
+        if self.notModified(request, entry):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=entry.body, content_type=entry.contentType, headers=headers)
@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .SharedCache import SharedCache
+
+
+class HotspotUserIndex:
+    def __init__(self, resyncInterval: Optional[float] = None, shared: Optional[SharedCache] = None,
+                 sharedName: str = '') -> None:
+        """Bảng tra cứu username -> ID của tài khoản trên router Mikrotik
+
+        Bảng được dùng chung giữa các kết nối trong RouterPool nên mọi thao tác đều có khoá.
+        Khi có SharedCache, mọi thay đổi được ghi xuống để các worker khác tra được mà không cần
+        tải lại toàn bộ danh sách từ router.
+
+        Args:
+            resyncInterval (float, optional): Sau bao nhiêu giây thì tải lại toàn bộ danh sách tài khoản.
+                                              None nếu chỉ tải một lần khi dùng lần đầu
+            shared (SharedCache, optional): Cache dùng chung giữa các worker
+            sharedName (str): Tên phân biệt router trong SharedCache khi có nhiều router
+        """
+        self.resyncInterval = resyncInterval
+        self.shared = shared
+        self.sharedName = sharedName
+        self.ids: Dict[str, str] = {}
+        self.loaded = False
+        self.syncedAt = 0.0
+        self.lock = threading.Lock()
+
+    def needsResync(self) -> bool:
+        """Kiểm tra bảng đã cần tải lại toàn bộ hay chưa
+
+        Returns:
+            bool: True nếu chưa tải lần nào hoặc đã quá resyncInterval
+        """
+        if not self.loaded and self.shared is not None:
+            # Worker khác đã tải gần đây thì chỉ cần tra SharedCache khi không có trong bộ nhớ
+            loadedAt = self.shared.userIDsLoadedAt(self.sharedName)
+            if loadedAt is not None and (self.resyncInterval is None
+                                         or time.time() - loadedAt <= self.resyncInterval):
+                with self.lock:
+                    self.loaded = True
+                    self.syncedAt = time.monotonic() - (time.time() - loadedAt)
+        if not self.loaded:
+            return True
+        if self.resyncInterval is None:
+            return False
+        return time.monotonic() - self.syncedAt > self.resyncInterval
+
+    def load(self, userList: List[Dict]) -> None:
+        """Nạp lại toàn bộ bảng từ kết quả print của ip/hotspot/user
+
+        Args:
+            userList (List[Dict]): Danh sách tài khoản lấy từ router
+        """
+        ids = {user['name']: user['id'] for user in userList}
+        if self.shared is not None:
+            self.shared.loadUserIDs(self.sharedName, ids)
+        with self.lock:
+            self.ids = ids
+            self.loaded = True
+            self.syncedAt = time.monotonic()
+
+    def get(self, username: str) -> Optional[str]:
+        with self.lock:
+            id = self.ids.get(username)
+        if id is None and self.shared is not None:
+            id = self.shared.userID(self.sharedName, username)
+            if id is not None:
+                with self.lock:
+                    self.ids[username] = id
+        return id
+
+    def set(self, username: str, id: str) -> None:
+        with self.lock:
+            self.ids[username] = id
+        if self.shared is not None:
+            self.shared.setUserID(self.sharedName, username, id)
+
+    def remove(self, username: str) -> None:
+        with self.lock:
+            self.ids.pop(username, None)
+        if self.shared is not None:
+            self.shared.removeUserID(self.sharedName, username)
@@ -0,0 +1,90 @@
+import json
+from typing import Iterable, Optional
+
+from aiohttp import web
+
+from .Tracing import span
+
+try:
+    import orjson                   # Thư viện JSON nhanh hơn, không bắt buộc
+except ImportError:
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """Chuyển object thành JSON, dùng orjson nếu đã được cài đặt
+
+    Args:
+        obj: Object cần chuyển
+
+    Returns:
+        bytes: Dữ liệu JSON dạng UTF-8
+    """
+    with span('encode'):
+        return encode(obj)
+
+
+def encode(obj) -> bytes:
+    """Giống dumps nhưng không đo thời gian, dùng khi serialize từng phần tử của danh sách
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def streamMode(request) -> Optional[str]:
+    """Kiểm tra client có yêu cầu trả về dạng stream hay không
+
+    Client chọn bằng query ?stream=ndjson, ?stream=json hoặc header Accept: application/x-ndjson
+
+    Returns:
+        Optional[str]: 'ndjson', 'json' hoặc None nếu không dùng stream
+    """
+    mode = request.query.get('stream')
+    if mode == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if mode in ('1', 'true', 'json'):
+        return 'json'
+    return None
+
+
+async def streamList(request, records: Iterable, mode: str, batchSize: int = 200) -> web.StreamResponse:
+    """Gửi danh sách về client theo từng phần ngay khi được tạo ra, không giữ toàn bộ kết quả trong bộ nhớ
+
+    Args:
+        request (_type_): HTTP Request
+        records (Iterable): Các phần tử cần gửi, có thể là generator
+        mode (str): 'ndjson' để gửi mỗi dòng một object, 'json' để gửi một mảng JSON
+        batchSize (int): Số phần tử được gộp lại trong mỗi lần ghi
+
+    Returns:
+        web.StreamResponse: Response dạng chunked
+    """
+    ndjson = mode == 'ndjson'
+    response = web.StreamResponse(headers={
+        'Content-Type': 'application/x-ndjson' if ndjson else 'application/json'
+    })
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+
+    separator = b'\n' if ndjson else b','
+    buffer = bytearray() if ndjson else bytearray(b'[')
+    first = True
+    count = 0
+    for record in records:
+        if ndjson:
+            buffer += encode(record) + separator
+        else:
+            if not first:
+                buffer += separator
+            buffer += encode(record)
+            first = False
+        count += 1
+        if count % batchSize == 0:
+            await response.write(bytes(buffer))
+            buffer.clear()
+    if not ndjson:
+        buffer += b']'
+    await response.write(bytes(buffer))
+    await response.write_eof()
+    return response
@@ -0,0 +1,219 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import aiohttp
+
+from .LHURequest import LRequest
+from .Metrics import metrics
+from .Tracing import span
+
+# Số mẫu thời gian phản hồi giữ lại cho mỗi endpoint để tính p95
+LATENCY_SAMPLES = 100
+# Số mẫu tối thiểu trước khi bắt đầu gửi request dự phòng
+MIN_HEDGE_SAMPLES = 20
+
+
+class UpstreamError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        """Lỗi từ tapi có thể gọi lại: HTTP 5xx hoặc hết thời gian cho phép của request
+        """
+        super().__init__(message)
+        self.status = status
+
+
+# Các lỗi tạm thời, endpoint idempotent được gọi lại khi gặp
+RETRYABLE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, UpstreamError)
+
+
+class LHUClient:
+    def __init__(self, baseUrl: str = 'https://tapi.lhu.edu.vn/nema/auth', limit: int = 20,
+                 keepaliveTimeout: float = 30.0, dnsCacheTtl: int = 300,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 policies: Optional[Dict[str, Dict[str, Any]]] = None,
+                 backoff: float = 0.2, maxBackoff: float = 2.0, minHedgeDelay: float = 0.05) -> None:
+        """Client dùng chung để gọi API tapi.lhu.edu.vn
+
+        Session và connection pool chỉ được tạo khi gọi start(), nên object có thể được tạo trước khi
+        event loop chạy. Endpoint idempotent được gọi lại với thời gian chờ ngẫu nhiên khi gặp lỗi tạm thời
+        và có thể gửi thêm một request dự phòng khi request đầu chậm, trong giới hạn deadline của endpoint.
+
+        Args:
+            baseUrl (str): Đường dẫn gốc của API
+            limit (int): Số kết nối tối đa đến server
+            keepaliveTimeout (float): Thời gian (giây) giữ lại kết nối không dùng đến
+            dnsCacheTtl (int): Thời gian (giây) lưu kết quả phân giải DNS
+            timeouts (Dict[str, float], optional): Timeout riêng theo tên endpoint, ghi đè timeout của LRequest
+            policies (Dict[str, Dict], optional): Ghi đè retries, deadline, hedge, hedgeDelay theo tên endpoint
+            backoff (float): Thời gian chờ (giây) cơ bản trước lần gọi lại đầu tiên, tăng gấp đôi mỗi lần
+            maxBackoff (float): Thời gian chờ tối đa (giây) giữa hai lần gọi
+            minHedgeDelay (float): Thời gian (giây) tối thiểu trước khi gửi request dự phòng
+        """
+        self.baseUrl = baseUrl.rstrip('/')
+        self.limit = limit
+        self.keepaliveTimeout = keepaliveTimeout
+        self.dnsCacheTtl = dnsCacheTtl
+        self.timeouts = timeouts or {}
+        self.policies = policies or {}
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.minHedgeDelay = minHedgeDelay
+        # Thời gian phản hồi gần đây của từng endpoint
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """Tạo session và connection pool, được gọi trong on_startup của webapp
+        """
+        if self.session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            ttl_dns_cache=self.dnsCacheTtl,
+            keepalive_timeout=self.keepaliveTimeout
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        """Đóng session, được gọi trong on_cleanup của webapp
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def url(self, request: LRequest) -> str:
+        return f'{self.baseUrl}/{request.name}'
+
+    def policy(self, request: LRequest) -> Dict[str, Any]:
+        """Chính sách gọi của endpoint: giá trị của LRequest ghi đè bởi LHU_POLICIES
+
+        Returns:
+            Dict[str, Any]: timeout, deadline, retries, hedge, hedgeDelay
+        """
+        override = self.policies.get(request.name, {})
+        timeout = self.timeouts.get(request.name, request.timeout)
+        policy = {
+            'timeout': timeout,
+            'deadline': override.get('deadline', max(request.deadline, timeout)),
+            'retries': override.get('retries', request.retries),
+            'hedge': override.get('hedge', request.hedge),
+            'hedgeDelay': override.get('hedgeDelay')
+        }
+        if not request.idempotent:
+            # Gọi lại endpoint thay đổi dữ liệu có thể thêm hoặc xoá hai lần
+            policy['retries'] = 0
+            policy['hedge'] = False
+        return policy
+
+    def hedgeDelay(self, name: str, policy: Dict[str, Any]) -> Optional[float]:
+        """Thời gian chờ trước khi gửi request dự phòng: hedgeDelay nếu có khai báo, nếu không là p95
+        thời gian phản hồi gần đây của endpoint
+
+        Returns:
+            Optional[float]: None nếu không gửi request dự phòng
+        """
+        if not policy['hedge']:
+            return None
+        if policy['hedgeDelay'] is not None:
+            return policy['hedgeDelay']
+        samples = self.latencies.get(name)
+        if samples is None or len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return max(ordered[int(0.95 * (len(ordered) - 1))], self.minHedgeDelay)
+
+    async def call(self, request: LRequest, data: Optional[Dict] = None) -> Any:
+        """Gọi một endpoint và trả về dữ liệu JSON nhận được
+
+        Args:
+            request (LRequest): Endpoint cần gọi
+            data (Dict, optional): Dữ liệu gửi đi dưới dạng JSON
+
+        Returns:
+            Any: Dữ liệu JSON server trả về
+
+        Raises:
+            UpstreamError, aiohttp.ClientError, asyncio.TimeoutError khi hết số lần gọi lại hoặc hết deadline
+        """
+        if self.session is None:
+            await self.start()
+        policy = self.policy(request)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy['deadline']
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise UpstreamError(f'tapi deadline exceeded: {request.name}')
+            try:
+                return await self.attempt(request, data, min(policy['timeout'], remaining),
+                                          self.hedgeDelay(request.name, policy))
+            except RETRYABLE_ERRORS:
+                if attempt >= policy['retries']:
+                    raise
+                # Full jitter để các request cùng lỗi không gọi lại cùng lúc
+                delay = random.uniform(0, min(self.maxBackoff, self.backoff * 2 ** attempt))
+                if loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                metrics.increment('upstream_retries', request.name)
+                await asyncio.sleep(delay)
+
+    async def attempt(self, request: LRequest, data: Optional[Dict], timeout: float,
+                      hedgeDelay: Optional[float]) -> Any:
+        """Gọi endpoint một lần, gửi thêm request dự phòng nếu chưa có kết quả sau hedgeDelay giây
+        và lấy kết quả thành công đầu tiên
+        """
+        if hedgeDelay is None or hedgeDelay >= timeout:
+            return await self.send(request, data, timeout)
+        first = asyncio.ensure_future(self.send(request, data, timeout))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedgeDelay)
+            if done:
+                return first.result()
+            metrics.increment('upstream_hedges', request.name)
+            second = asyncio.ensure_future(self.send(request, data, timeout - hedgeDelay))
+            pending.add(second)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            metrics.increment('upstream_hedge_wins', request.name)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def send(self, request: LRequest, data: Optional[Dict], timeout: float) -> Any:
+        """Gửi một request HTTP đến endpoint
+
+        Raises:
+            UpstreamError nếu endpoint idempotent trả về HTTP 5xx, endpoint khác vẫn trả về dữ liệu lỗi như cũ
+        """
+        with span(f'tapi.{request.name}'):
+            startedAt = time.perf_counter()
+            try:
+                async with self.session.request(request.method, self.url(request), json=data, headers=request.headers,
+                                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status >= 500 and request.idempotent:
+                        raise UpstreamError(f'tapi {request.name} returned HTTP {response.status}', response.status)
+                    result = await response.json()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                metrics.observe('upstream', request.name, time.perf_counter() - startedAt, True)
+                raise
+            duration = time.perf_counter() - startedAt
+            metrics.observe('upstream', request.name, duration, False)
+            samples = self.latencies.get(request.name)
+            if samples is None:
+                samples = self.latencies[request.name] = deque(maxlen=LATENCY_SAMPLES)
+            samples.append(duration)
+            return result
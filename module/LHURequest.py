@@ -1,9 +1,44 @@
+from typing import Optional
+
+
 class LRequest:
-    def __init__(self, url=None, contentType="application/json", accept="application/json") -> None:
-        self.url = url
+    def __init__(self, name: str, method: str = 'POST', timeout: float = 10.0, contentType="application/json", accept="application/json",
+                 idempotent: bool = False, retries: int = 0, deadline: Optional[float] = None, hedge: bool = False) -> None:
+        """Mô tả một endpoint của API tapi.lhu.edu.vn, được chạy bởi LHUClient
+
+        Args:
+            name (str): Tên endpoint, ví dụ 'CLB_Select_AllThanhVien'
+            method (str): HTTP method
+            timeout (float): Timeout mặc định (giây) của mỗi lần gọi
+            contentType (str): Header content-type
+            accept (str): Header accept
+            idempotent (bool): Endpoint chỉ đọc dữ liệu, gọi lại nhiều lần không gây thay đổi.
+                               Chỉ endpoint idempotent mới được gọi lại hoặc gửi thêm request dự phòng
+            retries (int): Số lần gọi lại tối đa khi lỗi kết nối, timeout hoặc HTTP 5xx
+            deadline (float, optional): Tổng thời gian (giây) cho mọi lần gọi, mặc định bằng timeout
+            hedge (bool): Gửi thêm một request dự phòng khi request đầu chậm hơn p95 của endpoint
+        """
+        self.name = name
+        self.method = method
+        self.timeout = timeout
+        self.idempotent = idempotent
+        self.retries = retries
+        self.deadline = deadline if deadline is not None else timeout
+        self.hedge = hedge
         self.contentType = contentType
         self.accept = accept
         self.headers = {
             'accept': self.accept,
             'content-type': self.contentType
-        }
\ No newline at end of file
+        }
+
+
+# Các endpoint đang được sử dụng
+SELECT_ALL_MEMBERS = LRequest('CLB_Select_AllThanhVien', method='GET', timeout=15.0,
+                              idempotent=True, retries=2, deadline=30.0, hedge=True)
+SELECT_MEMBER_BY_MSSV = LRequest('CLB_Select_ThanhVien_byMSSV', idempotent=True, retries=2, deadline=15.0, hedge=True)
+SELECT_ATTENDANCE_BY_DATE = LRequest('CLB_DiemDanh_Select_byDate', timeout=15.0,
+                                     idempotent=True, retries=2, deadline=30.0, hedge=True)
+INSERT_MEMBER = LRequest('CLB_ThanhVien_Insert')
+UPDATE_MEMBER = LRequest('CLB_ThanhVien_Update')
+DELETE_MEMBER = LRequest('CLB_ThanhVien_Delete')
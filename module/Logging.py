@@ -0,0 +1,144 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from typing import Optional
+
+from aiohttp import web
+
+# ID của request đang được xử lý, được gắn vào mọi dòng log ghi trong request đó
+requestID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('requestID', default=None)
+
+EXCEPTION_FORMATTER = logging.Formatter()
+
+# Các thuộc tính có sẵn của LogRecord, không đưa vào dòng log JSON
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'sample'}
+
+
+class ContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Gắn ID của request hiện tại vào record, chạy ở thread gọi log trước khi record vào hàng đợi
+        """
+        if not hasattr(record, 'requestId'):
+            record.requestId = requestID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float = 1.0) -> None:
+        """Chỉ giữ lại một phần các dòng log được đánh dấu extra={'sample': True} (log thành công số lượng lớn)
+
+        Args:
+            rate (float): Tỉ lệ giữ lại, từ 0 đến 1
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or not getattr(record, 'sample', False):
+            return True
+        return random.random() < self.rate
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Chuẩn bị record trước khi vào hàng đợi. QueueHandler gốc định dạng cả record và gộp traceback
+        vào message, nên formatter của listener không còn biết record có lỗi. Ở đây chỉ tính sẵn message
+        và traceback (exc_text) để các tham số và traceback không bị giữ lại trong hàng đợi
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        """Mỗi record là một dòng JSON gồm thời gian, mức log, nội dung và các thuộc tính truyền qua extra
+        """
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Traceback đã được định dạng trước khi vào hàng đợi
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setupLogging(level: str = 'INFO', format: str = 'json', sampleRate: float = 1.0) -> logging.handlers.QueueListener:
+    """Cấu hình root logger: record được đưa vào hàng đợi và một thread riêng ghi ra stderr,
+    nên việc ghi log không chặn event loop. Được gọi khi khởi động webapp, không gọi khi import module
+
+    Args:
+        level (str): Mức log tối thiểu
+        format (str): 'json' để ghi mỗi dòng một object JSON, 'text' để ghi dạng đọc được
+        sampleRate (float): Tỉ lệ giữ lại các dòng log thành công số lượng lớn
+
+    Returns:
+        logging.handlers.QueueListener: Thread ghi log, cần gọi stop() khi tắt để ghi hết hàng đợi
+    """
+    stream = logging.StreamHandler(sys.stderr)
+    if format == 'json':
+        stream.setFormatter(JSONFormatter())
+    else:
+        stream.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - [%(requestId)s] %(message)s',
+                                              datefmt='%y-%m-%d %H:%M:%S'))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    handler.addFilter(SamplingFilter(sampleRate))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+@web.middleware
+async def requestLogMiddleware(request, handler):
+    """Gán ID cho request (lấy từ header X-Request-ID nếu có), trả ID về trong header
+    và ghi một dòng log gồm method, đường dẫn, mã trả về và thời gian xử lý
+    """
+    id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+    token = requestID.set(id)
+    startedAt = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        if not response.prepared:
+            response.headers['X-Request-ID'] = id
+        return response
+    except web.HTTPException as ex:
+        status = ex.status
+        ex.headers['X-Request-ID'] = id
+        raise
+    finally:
+        logging.log(logging.WARNING if status >= 500 else logging.INFO, '%s %s %s', request.method, request.path, status,
+                    extra={'status': status, 'durationMs': round((time.perf_counter() - startedAt) * 1000, 2),
+                           'sample': status < 400})
+        requestID.reset(token)
@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from .model.UserHotspot import UserHotspot
+
+LoginKey = Tuple[str, str, str]
+
+
+def loginKey(mac, ip, username) -> LoginKey:
+    """Khoá của một lần đăng nhập, dùng chung cho LoginScheduler và LoginCache
+    """
+    return (str(mac).lower(), str(ip), str(username))
+
+
+class LoginCache:
+    def __init__(self, ttl: float = 30.0, maxSize: int = 10000) -> None:
+        """Bảng các client vừa đăng nhập thành công, client bấm đăng nhập lại được trả kết quả ngay
+        mà không gửi lệnh đến router
+
+        Bảng được cập nhật từ kết quả login và từ Presence (phiên bắt đầu, phiên kết thúc) nếu có.
+
+        Args:
+            ttl (float): Thời gian (giây) một lần đăng nhập được giữ trong bảng
+            maxSize (int): Số client tối đa trong bảng, client cũ nhất bị xoá trước
+        """
+        self.ttl = ttl
+        self.maxSize = maxSize
+        # (MAC, IP, username) -> thời điểm hết hạn, sắp xếp theo thời điểm thêm vào
+        self.entries: 'OrderedDict[LoginKey, float]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def check(self, user: UserHotspot) -> bool:
+        """Kiểm tra client đã đăng nhập thành công gần đây hay chưa
+
+        Args:
+            user (UserHotspot): Thông tin đăng nhập
+
+        Returns:
+            bool: True nếu đã đăng nhập và chưa hết hạn
+        """
+        key = loginKey(user.mac, user.ip, user.username)
+        expiresAt = self.entries.get(key)
+        if expiresAt is not None:
+            if expiresAt > time.monotonic():
+                self.hits += 1
+                return True
+            del self.entries[key]
+        self.misses += 1
+        return False
+
+    def add(self, mac, ip, username) -> None:
+        key = loginKey(mac, ip, username)
+        self.entries.pop(key, None)
+        self.entries[key] = time.monotonic() + self.ttl
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def discard(self, mac, ip, username) -> None:
+        self.entries.pop(loginKey(mac, ip, username), None)
+
+    def discardUser(self, username: str) -> None:
+        """Xoá mọi client của một tài khoản (khi tài khoản bị xoá)
+        """
+        username = str(username)
+        for key in [key for key in self.entries if key[2] == username]:
+            del self.entries[key]
+
+    def observe(self, kind: str, session: Dict) -> None:
+        """Nhận sự kiện từ Presence: phiên mới được thêm vào bảng, phiên kết thúc bị xoá khỏi bảng
+
+        Args:
+            kind (str): 'join', 'leave' hoặc 'update'
+            session (Dict): Phiên đăng nhập trên router, có mac-address, address, user
+        """
+        mac = session.get('mac-address')
+        ip = session.get('address')
+        username = session.get('user')
+        if mac is None or ip is None or username is None:
+            return
+        if kind == 'leave':
+            self.discard(mac, ip, username)
+        else:
+            self.add(mac, ip, username)
+
+    def stats(self) -> Dict:
+        return {
+            'SoClient': len(self.entries),
+            'TraNgay': self.hits,
+            'GuiRouter': self.misses,
+            'ThoiGianGiu': self.ttl
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import time
+from typing import Dict, Optional, Tuple
+
+from .LoginCache import loginKey
+from .model.UserHotspot import UserHotspot
+from .RouterPool import RouterPool
+
+
+class LoginQueueFull(Exception):
+    def __init__(self, retryAfter: int) -> None:
+        super().__init__('Login queue is full')
+        self.retryAfter = retryAfter
+
+
+class PendingLogin:
+    __slots__ = ('user', 'enqueuedAt', 'queued')
+
+    def __init__(self, user: UserHotspot) -> None:
+        self.user = user
+        self.enqueuedAt = time.monotonic()
+        # True khi còn được tính trong số yêu cầu đang chờ
+        self.queued = True
+
+
+class LoginScheduler:
+    def __init__(self, router: RouterPool, concurrency: int = 4, maxQueue: int = 200, retryAfter: int = 2) -> None:
+        """Hàng đợi đăng nhập, giới hạn số lệnh login được gửi đồng thời đến router
+
+        Args:
+            router (RouterPool): Pool kết nối đến router
+            concurrency (int): Số lệnh login được gửi đồng thời
+            maxQueue (int): Số yêu cầu tối đa được chờ trong hàng đợi, vượt quá sẽ bị từ chối
+            retryAfter (int): Số giây client nên chờ trước khi gửi lại khi hàng đợi đầy
+        """
+        self.router = router
+        self.concurrency = concurrency
+        self.maxQueue = maxQueue
+        self.retryAfter = retryAfter
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        # Các lần đăng nhập đang chạy theo (MAC, IP, username, hash mật khẩu), yêu cầu trùng sẽ chờ chung kết quả
+        self.inFlight: Dict[Tuple[str, str, str, str], asyncio.Future] = {}
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.collapsed = 0
+        self.rejected = 0
+        self.totalWait = 0.0
+        self.maxWait = 0.0
+        # Khi đang tắt webapp thì từ chối yêu cầu mới để client gửi sang instance khác
+        self.draining = False
+
+    async def login(self, user: UserHotspot) -> bool:
+        """Đưa yêu cầu đăng nhập vào hàng đợi và chờ kết quả
+
+        Args:
+            user (UserHotspot): Thông tin đăng nhập
+
+        Returns:
+            bool: Trả về True nếu đăng nhập thành công
+        Raises:
+            LoginQueueFull nếu hàng đợi đã đầy hoặc đang dừng, Exception nếu router báo lỗi
+        """
+        # Mật khẩu khác nhau có thể cho kết quả khác nhau nên không được gộp chung
+        password = hashlib.blake2b(str(user.password).encode(), digest_size=16).hexdigest()
+        key = loginKey(user.mac, user.ip, user.username) + (password,)
+        future = self.inFlight.get(key)
+        if future is not None:
+            self.collapsed += 1
+            return await asyncio.shield(future)
+
+        if self.draining or self.waiting >= self.maxQueue:
+            self.rejected += 1
+            raise LoginQueueFull(self.retryAfter)
+
+        # Đếm ngay khi nhận yêu cầu, vì task chỉ bắt đầu chạy ở vòng lặp sau
+        self.waiting += 1
+        pending = PendingLogin(user)
+        future = asyncio.ensure_future(self.run(pending))
+        self.inFlight[key] = future
+        future.add_done_callback(lambda done: self.finish(key, pending, done))
+        return await asyncio.shield(future)
+
+    def dequeue(self, pending: PendingLogin) -> None:
+        if pending.queued:
+            pending.queued = False
+            self.waiting -= 1
+
+    def finish(self, key: Tuple[str, str, str, str], pending: PendingLogin, future: asyncio.Future) -> None:
+        self.inFlight.pop(key, None)
+        # Task bị huỷ trước khi chạy thì không tự bỏ khỏi số yêu cầu đang chờ
+        self.dequeue(pending)
+        # Lấy lỗi ra để asyncio không báo 'Future exception was never retrieved' khi mọi request chờ đã bị huỷ
+        if not future.cancelled():
+            future.exception()
+
+    async def run(self, pending: PendingLogin) -> bool:
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.dequeue(pending)
+
+        wait = time.monotonic() - pending.enqueuedAt
+        self.totalWait += wait
+        self.maxWait = max(self.maxWait, wait)
+        self.running += 1
+        try:
+            return await self.router.login(user=pending.user)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.semaphore.release()
+
+    async def drain(self, timeout: float) -> bool:
+        """Ngừng nhận yêu cầu mới và chờ các lần đăng nhập đang chờ hoặc đang chạy hoàn thành
+
+        Args:
+            timeout (float): Thời gian chờ tối đa (giây)
+
+        Returns:
+            bool: True nếu mọi lần đăng nhập đã hoàn thành trước khi hết thời gian
+        """
+        self.draining = True
+        pending = list(self.inFlight.values())
+        if not pending:
+            return True
+        _, notDone = await asyncio.wait(pending, timeout=timeout)
+        return not notDone
+
+    def stats(self) -> Dict:
+        """Thông số của hàng đợi để theo dõi và chọn kích thước phù hợp
+
+        Returns:
+            Dict: Số yêu cầu đang chờ, đang xử lý, đã gộp, đã từ chối và thời gian chờ (giây)
+        """
+        return {
+            'DangCho': self.waiting,
+            'DangXuLy': self.running,
+            'HoanThanh': self.completed,
+            'DaGop': self.collapsed,
+            'TuChoi': self.rejected,
+            'ThoiGianChoTrungBinh': self.totalWait / self.completed if self.completed else 0.0,
+            'ThoiGianChoToiDa': self.maxWait,
+            'GioiHanDongThoi': self.concurrency,
+            'GioiHanHangDoi': self.maxQueue,
+            'DangDung': self.draining
+        }
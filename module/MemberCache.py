@@ -0,0 +1,105 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .SharedCache import SharedCache
+
+# Khoá của danh sách thành viên trong SharedCache
+SHARED_KEY = 'members'
+
+
+class MemberCache:
+    def __init__(self, loader: Callable[[], Awaitable[List[Dict]]], ttl: float = 60.0,
+                 shared: Optional[SharedCache] = None, sharedCheckInterval: float = 2.0) -> None:
+        """Cache danh sách thành viên trong bộ nhớ
+
+        Các request cùng lúc gặp cache hết hạn sẽ dùng chung một lần gọi loader.
+        Khi chạy nhiều worker, danh sách được lấy từ SharedCache trước khi gọi loader và bản trong
+        bộ nhớ được so lại với SharedCache sau mỗi sharedCheckInterval giây để thấy thay đổi của worker khác.
+
+        Args:
+            loader (Callable): Coroutine function lấy danh sách thành viên từ database
+            ttl (float): Thời gian (giây) danh sách được giữ trong cache
+            shared (SharedCache, optional): Cache dùng chung giữa các worker
+            sharedCheckInterval (float): Chu kỳ (giây) so bản trong bộ nhớ với SharedCache
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.shared = shared
+        self.sharedCheckInterval = sharedCheckInterval
+        # Thời điểm ghi vào SharedCache của bản đang giữ trong bộ nhớ
+        self.sharedStamp: Optional[float] = None
+        self.members: Optional[List[Dict]] = None
+        # Thời điểm danh sách trong bộ nhớ được thay bằng bản mới, chỉ đổi khi dữ liệu có thể đã thay đổi
+        self.loadedAt = 0.0
+        # Thời điểm so lần cuối với loader hoặc SharedCache
+        self.checkedAt = 0.0
+        self.pending: Optional[asyncio.Future] = None
+        # Tăng mỗi lần invalidate để bỏ kết quả của lần tải đang chạy dở
+        self.generation = 0
+
+    def isFresh(self) -> bool:
+        if self.members is None:
+            return False
+        ttl = self.ttl if self.shared is None else min(self.ttl, self.sharedCheckInterval)
+        return time.monotonic() - self.checkedAt < ttl
+
+    async def get(self) -> List[Dict]:
+        """Lấy danh sách thành viên, tải lại nếu cache đã hết hạn
+
+        Returns:
+            List[Dict]: Danh sách thành viên, không được chỉnh sửa trực tiếp
+        """
+        if self.isFresh():
+            return self.members
+        if self.pending is None:
+            self.pending = asyncio.ensure_future(self.refresh())
+        # shield để một request bị huỷ không huỷ lần tải mà các request khác đang chờ
+        return await asyncio.shield(self.pending)
+
+    async def refresh(self) -> List[Dict]:
+        generation = self.generation
+        try:
+            members = await self.loadShared() if self.shared is not None else None
+            if members is None:
+                members = await self.loader()
+                if self.shared is not None and generation == self.generation:
+                    self.sharedStamp = await self.shared.set(SHARED_KEY, members)
+            if generation == self.generation:
+                # SharedCache chưa có bản mới thì giữ nguyên loadedAt để phiên bản của danh sách không đổi
+                if members is not self.members:
+                    self.members = members
+                    self.loadedAt = time.monotonic()
+                self.checkedAt = time.monotonic()
+            return members
+        finally:
+            if self.pending is asyncio.current_task():
+                self.pending = None
+
+    async def loadShared(self) -> Optional[List[Dict]]:
+        """Lấy danh sách từ SharedCache, chỉ đọc lại toàn bộ khi worker khác đã ghi bản mới
+
+        Returns:
+            Optional[List[Dict]]: None nếu SharedCache không có hoặc đã hết hạn
+        """
+        stamp = await self.shared.stamp(SHARED_KEY, self.ttl)
+        if stamp is None:
+            return None
+        if stamp == self.sharedStamp and self.members is not None:
+            return self.members
+        result = await self.shared.get(SHARED_KEY, self.ttl)
+        if result is None:
+            return None
+        members, self.sharedStamp = result
+        return members
+
+    def invalidate(self) -> None:
+        """Xoá cache sau khi thêm, sửa, xoá thành viên
+        """
+        self.generation += 1
+        self.members = None
+        self.pending = None
+        if self.shared is not None:
+            # Các worker khác sẽ tải lại ở lần so tiếp theo
+            self.sharedStamp = None
+            asyncio.ensure_future(self.shared.delete(SHARED_KEY))
@@ -0,0 +1,139 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from aiohttp import web
+
+from .Tracing import isLongLived
+
+# Các mốc (giây) của histogram thời gian xử lý
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Loại số liệu -> tên label trong Prometheus
+KINDS = {
+    'handler': 'handler',
+    'router': 'command',
+    'upstream': 'endpoint'
+}
+
+# Bộ đếm -> tên label trong Prometheus
+COUNTERS = {
+    'upstream_retries': 'endpoint',
+    'upstream_hedges': 'endpoint',
+    'upstream_hedge_wins': 'endpoint'
+}
+
+
+class Series:
+    __slots__ = ('count', 'errors', 'sum', 'buckets')
+
+    def __init__(self, size: int) -> None:
+        self.count = 0
+        self.errors = 0
+        self.sum = 0.0
+        self.buckets = [0] * size
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Thu thập số request, số lỗi và histogram thời gian xử lý theo handler, lệnh router và endpoint tapi
+
+        Args:
+            buckets (Tuple[float, ...]): Các mốc (giây) của histogram
+        """
+        self.bucketBounds = buckets
+        self.series: Dict[Tuple[str, str], Series] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, kind: str, name: str, duration: float, error: bool = False) -> None:
+        """Ghi nhận một lần xử lý
+
+        Args:
+            kind (str): 'handler', 'router' hoặc 'upstream'
+            name (str): Tên handler, lệnh router hoặc endpoint
+            duration (float): Thời gian xử lý (giây)
+            error (bool): True nếu lần xử lý bị lỗi
+        """
+        series = self.series.get((kind, name))
+        if series is None:
+            series = self.series[(kind, name)] = Series(len(self.bucketBounds) + 1)
+        series.count += 1
+        series.sum += duration
+        series.buckets[bisect_left(self.bucketBounds, duration)] += 1
+        if error:
+            series.errors += 1
+
+    def increment(self, counter: str, name: str) -> None:
+        """Tăng một bộ đếm, ví dụ số lần gọi lại endpoint tapi
+
+        Args:
+            counter (str): Tên bộ đếm trong COUNTERS
+            name (str): Tên endpoint
+        """
+        key = (counter, name)
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+    def render(self) -> str:
+        """Xuất số liệu theo định dạng text của Prometheus
+
+        Returns:
+            str: Nội dung cho endpoint /metrics
+        """
+        lines: List[str] = []
+        for kind, label in KINDS.items():
+            items = sorted((name, series) for (k, name), series in self.series.items() if k == kind)
+            prefix = f'loginwifi_{kind}'
+            lines.append(f'# TYPE {prefix}_requests_total counter')
+            for name, series in items:
+                lines.append(f'{prefix}_requests_total{{{label}="{name}"}} {series.count}')
+            lines.append(f'# TYPE {prefix}_errors_total counter')
+            for name, series in items:
+                lines.append(f'{prefix}_errors_total{{{label}="{name}"}} {series.errors}')
+            lines.append(f'# TYPE {prefix}_duration_seconds histogram')
+            for name, series in items:
+                cumulative = 0
+                for bound, count in zip(self.bucketBounds, series.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_duration_seconds_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_duration_seconds_bucket{{{label}="{name}",le="+Inf"}} {series.count}')
+                lines.append(f'{prefix}_duration_seconds_sum{{{label}="{name}"}} {series.sum}')
+                lines.append(f'{prefix}_duration_seconds_count{{{label}="{name}"}} {series.count}')
+        for counter, label in COUNTERS.items():
+            prefix = f'loginwifi_{counter}_total'
+            lines.append(f'# TYPE {prefix} counter')
+            for (c, name), value in sorted(self.counters.items()):
+                if c == counter:
+                    lines.append(f'{prefix}{{{label}="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Object dùng chung cho toàn bộ ứng dụng
+metrics = Metrics()
+
+
+@web.middleware
+async def metricsMiddleware(request, handler):
+    """Middleware đo thời gian xử lý của từng handler
+    """
+    # Thời gian của kết nối SSE là thời gian client theo dõi, không phải thời gian xử lý
+    if isLongLived(request):
+        return await handler(request)
+    name = getattr(request.match_info.handler, '__name__', 'unknown')
+    startedAt = time.perf_counter()
+    try:
+        response = await handler(request)
+    except web.HTTPException as ex:
+        metrics.observe('handler', name, time.perf_counter() - startedAt, ex.status >= 500)
+        raise
+    except Exception:
+        metrics.observe('handler', name, time.perf_counter() - startedAt, True)
+        raise
+    metrics.observe('handler', name, time.perf_counter() - startedAt, response.status >= 500)
+    return response
+
+
+async def getMetrics(request) -> 'web.Response':
+    """Trả về số liệu cho Prometheus
+    """
+    return web.Response(body=metrics.render().encode(),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
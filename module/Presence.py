@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from .JSONStream import dumps
+from .RouterMikrotik import RouterMikrotik
+
+# Loại sự kiện gửi đến client
+JOIN = 'join'
+LEAVE = 'leave'
+UPDATE = 'update'
+
+
+class Presence:
+    def __init__(self, host: str, username: str, password: str, port: Optional[int] = None,
+                 reconnectDelay: float = 5.0, maxEvents: int = 10000, queueSize: int = 100,
+                 heartbeat: float = 15.0, name: Optional[str] = None) -> None:
+        """Bảng các phiên đăng nhập đang hoạt động trên router, cập nhật theo thời gian thực
+
+        Chỉ giữ một kết nối riêng đến router với lệnh listen trên /ip/hotspot/active. Mọi client
+        theo dõi đều đọc từ bảng trong bộ nhớ nên số client không làm tăng tải lên router.
+
+        Args:
+            host (str): Hostname hoặc địa chỉ IP của router
+            username (str): Tên đăng nhập vào router
+            password (str): Mật khẩu đăng nhập vào router
+            port (int, optional): Cổng API của router, mặc định 8728
+            reconnectDelay (float): Thời gian chờ (giây) trước khi kết nối lại khi mất kết nối
+            maxEvents (int): Số thay đổi nhận được trước khi đăng ký listen lại để giải phóng bộ nhớ
+            queueSize (int): Số sự kiện tối đa chờ gửi cho mỗi client, client chậm hơn sẽ bị ngắt
+            heartbeat (float): Chu kỳ (giây) gửi tín hiệu giữ kết nối cho client khi không có sự kiện
+            name (str, optional): Tên router khi có nhiều router, được thêm vào mỗi phiên với key 'router'
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.reconnectDelay = reconnectDelay
+        self.maxEvents = maxEvents
+        self.queueSize = queueSize
+        self.heartbeat = heartbeat
+        self.name = name
+        # ID phiên trên router -> thông tin phiên
+        self.sessions: Dict[str, Dict] = {}
+        self.subscribers: Set[asyncio.Queue] = set()
+        # Các hàm được gọi với mỗi sự kiện trong cùng process (vd: LoginCache.observe)
+        self.listeners: List[Callable[[str, Dict], None]] = []
+        self.connected = False
+        self.events = 0
+        self.dropped = 0
+        self.lastEventAt: Optional[float] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='presence')
+        self.lock = threading.Lock()
+        self.router: Optional[RouterMikrotik] = None
+        self.closing = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Chạy background task theo dõi router
+        """
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.watch())
+
+    async def close(self) -> None:
+        """Dừng theo dõi, đóng kết nối và ngắt các client đang theo dõi
+        """
+        with self.lock:
+            self.closing = True
+            router = self.router
+        if router is not None:
+            router.interrupt()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for queue in list(self.subscribers):
+            self.drop(queue)
+        self.executor.shutdown(wait=False)
+
+    async def watch(self) -> None:
+        """Giữ lệnh listen trên router, tự kết nối lại khi mất kết nối
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self.executor, self.watchOnce, loop)
+            except Exception as ex:
+                self.connected = False
+                logging.warning('Mất kết nối theo dõi phiên đăng nhập: %s', ex)
+                await asyncio.sleep(self.reconnectDelay)
+
+    def watchOnce(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Kết nối và theo dõi router cho tới khi mất kết nối hoặc đủ maxEvents (chạy trong thread riêng)
+
+        Args:
+            loop (asyncio.AbstractEventLoop): Event loop nhận các thay đổi
+        """
+        router = RouterMikrotik(host=self.host, username=self.username, password=self.password, port=self.port)
+        with self.lock:
+            if self.closing:
+                router.disconnect()
+                return
+            self.router = router
+        try:
+            router.watchHotspotActive(
+                onSnapshot=lambda rows: loop.call_soon_threadsafe(self.applySnapshot, rows),
+                onChange=lambda change: loop.call_soon_threadsafe(self.applyChange, change),
+                maxEvents=self.maxEvents)
+        finally:
+            with self.lock:
+                self.router = None
+            router.disconnect()
+
+    def applySnapshot(self, rows: List[Dict]) -> None:
+        """Thay bảng phiên bằng danh sách mới từ router, gửi sự kiện cho các phiên khác với bảng cũ
+
+        Args:
+            rows (List[Dict]): Danh sách phiên đang hoạt động
+        """
+        if self.name is not None:
+            for row in rows:
+                row['router'] = self.name
+        sessions = {row['id']: row for row in rows}
+        previous = self.sessions
+        self.sessions = sessions
+        self.connected = True
+        for id, session in previous.items():
+            if id not in sessions:
+                self.publish(LEAVE, session)
+        for id, session in sessions.items():
+            if id not in previous:
+                self.publish(JOIN, session)
+
+    def applyChange(self, change: Dict) -> None:
+        """Cập nhật bảng phiên với một thay đổi nhận được từ lệnh listen
+
+        Args:
+            change (Dict): Thay đổi của một phiên, phiên đã kết thúc có '.dead'
+        """
+        id = change.get('id')
+        if id is None:
+            return
+        # Router gửi '=.dead=yes' cho phiên đã kết thúc, routeros_api giữ nguyên dạng chuỗi
+        if change.get('.dead', change.get('dead')) in ('yes', 'true', True):
+            session = self.sessions.pop(id, None)
+            if session is not None:
+                self.publish(LEAVE, session)
+            return
+        if self.name is not None:
+            change['router'] = self.name
+        session = self.sessions.get(id)
+        if session is None:
+            self.sessions[id] = change
+            self.publish(JOIN, change)
+        else:
+            session.update(change)
+            self.publish(UPDATE, session)
+
+    def publish(self, kind: str, session: Dict) -> None:
+        """Gửi sự kiện đến mọi client, dữ liệu chỉ được chuyển sang JSON một lần
+
+        Args:
+            kind (str): JOIN, LEAVE hoặc UPDATE
+            session (Dict): Thông tin phiên
+        """
+        self.events += 1
+        self.lastEventAt = time.time()
+        for listener in self.listeners:
+            listener(kind, session)
+        if not self.subscribers:
+            return
+        data = dumps({'SuKien': kind, 'PhienDangNhap': session})
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                # Client không đọc kịp, ngắt để client kết nối lại và nhận bảng mới
+                self.dropped += 1
+                self.drop(queue)
+
+    def addListener(self, listener: Callable[[str, Dict], None]) -> None:
+        self.listeners.append(listener)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Đăng ký nhận sự kiện
+
+        Returns:
+            asyncio.Queue: Hàng đợi các sự kiện đã ở dạng JSON, None khi client bị ngắt
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queueSize)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def drop(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def activeSessions(self) -> List[Dict]:
+        return list(self.sessions.values())
+
+    def snapshot(self) -> bytes:
+        return dumps({'SuKien': 'snapshot', 'DanhSachPhien': self.activeSessions()})
+
+    def stats(self) -> Dict:
+        """Trạng thái theo dõi phiên đăng nhập
+
+        Returns:
+            Dict: Số phiên, số client đang theo dõi, số sự kiện và trạng thái kết nối
+        """
+        return {
+            'DaKetNoi': self.connected,
+            'SoPhien': len(self.sessions),
+            'SoNguoiTheoDoi': len(self.subscribers),
+            'SoSuKien': self.events,
+            'SoNguoiBiNgat': self.dropped,
+            'SuKienCuoi': self.lastEventAt
+        }
+
+
+class PresenceGroup:
+    def __init__(self, presences: Dict[str, Presence]) -> None:
+        """Theo dõi phiên đăng nhập trên nhiều router (RouterRegistry), mỗi router một Presence.
+        Có cùng giao diện với Presence, client theo dõi nhận sự kiện của mọi router trong một hàng đợi
+
+        Args:
+            presences (Dict[str, Presence]): Tên router -> Presence của router đó (đã có name)
+        """
+        self.presences = presences
+        first = next(iter(presences.values()))
+        self.queueSize = first.queueSize
+        self.heartbeat = first.heartbeat
+
+    @property
+    def connected(self) -> bool:
+        return all(presence.connected for presence in self.presences.values())
+
+    async def start(self) -> None:
+        await asyncio.gather(*[presence.start() for presence in self.presences.values()])
+
+    async def close(self) -> None:
+        await asyncio.gather(*[presence.close() for presence in self.presences.values()])
+
+    def addListener(self, listener: Callable[[str, Dict], None]) -> None:
+        for presence in self.presences.values():
+            presence.addListener(listener)
+
+    def subscribe(self) -> asyncio.Queue:
+        # Cùng một hàng đợi được đăng ký trên mọi router. Router nào ngắt client thì client kết nối lại
+        # và unsubscribe khỏi mọi router
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queueSize)
+        for presence in self.presences.values():
+            presence.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        for presence in self.presences.values():
+            presence.unsubscribe(queue)
+
+    def activeSessions(self) -> List[Dict]:
+        return [session for presence in self.presences.values() for session in presence.activeSessions()]
+
+    def snapshot(self) -> bytes:
+        return dumps({'SuKien': 'snapshot', 'DanhSachPhien': self.activeSessions()})
+
+    def stats(self) -> Dict:
+        """Trạng thái theo dõi phiên đăng nhập, cộng dồn trên mọi router
+
+        Returns:
+            Dict: Như Presence.stats, thêm trạng thái của từng router trong 'Router'
+        """
+        routers = {name: presence.stats() for name, presence in self.presences.items()}
+        return {
+            'DaKetNoi': self.connected,
+            'SoPhien': sum(stats['SoPhien'] for stats in routers.values()),
+            'SoNguoiTheoDoi': max(stats['SoNguoiTheoDoi'] for stats in routers.values()),
+            'SoSuKien': sum(stats['SoSuKien'] for stats in routers.values()),
+            'SoNguoiBiNgat': sum(stats['SoNguoiBiNgat'] for stats in routers.values()),
+            'SuKienCuoi': max((stats['SuKienCuoi'] for stats in routers.values() if stats['SuKienCuoi']), default=None),
+            'Router': routers
+        }
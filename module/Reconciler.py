@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from .model.UserHotspot import UserHotspot
+from .RouterPool import RouterPool
+
+# Profile mặc định của RouterOS, tài khoản có profile này (hoặc không có profile) chưa được quản lý
+UNMANAGED_PROFILES = (None, '', 'default')
+
+
+def logResult(result: Dict, router: Optional[str] = None) -> None:
+    logging.info('Đồng bộ tài khoản%s: tạo %d, xoá %d, sửa %d, lỗi %d', f' trên router {router}' if router else '',
+                 len(result['Tao']), len(result['Xoa']), len(result['SuaProfile']), len(result['Loi']))
+
+
+class Reconciler:
+    def __init__(self, router: RouterPool, loader: Callable[[], Awaitable[List[Dict]]],
+                 profile: str = 'student', password: str = '1', batchSize: int = 50,
+                 allowedProfiles: Optional[Iterable[str]] = None) -> None:
+        """Đồng bộ danh sách thành viên trong database với tài khoản trên router Mikrotik
+
+        Chỉ các tài khoản có profile được quản lý (profile và allowedProfiles) mới bị xoá, các tài khoản khác
+        (admin, khách...) được giữ nguyên. Tài khoản của thành viên chỉ bị sửa profile khi profile hiện tại
+        không hợp lệ, nên profile đã đổi qua /chinh-sua-nhieu-tai-khoan không bị đặt lại.
+
+        Args:
+            router (RouterPool): Pool kết nối đến router
+            loader (Callable): Coroutine function lấy danh sách thành viên, mỗi thành viên có Username
+            profile (str): Profile của tài khoản thành viên
+            password (str): Mật khẩu của tài khoản được tạo mới
+            batchSize (int): Số tài khoản được xử lý trên một kết nối mỗi lần
+            allowedProfiles (Iterable[str], optional): Các profile khác được dùng cho thành viên (ví dụ 'alumni').
+                                                       Không khai báo thì chỉ sửa tài khoản chưa có profile
+                                                       hoặc có profile 'default'
+        """
+        self.router = router
+        self.loader = loader
+        self.profile = profile
+        self.password = password
+        self.batchSize = batchSize
+        self.allowedProfiles = frozenset(allowedProfiles) if allowedProfiles is not None else None
+        self.managedProfiles = frozenset({profile}) | (self.allowedProfiles or frozenset())
+        # Danh sách username của lần đồng bộ trước, dùng cho chế độ incremental
+        self.snapshot: Optional[FrozenSet[str]] = None
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def run(self, dryRun: bool = True, incremental: bool = False, members: Optional[List[Dict]] = None) -> Dict:
+        """Tính chênh lệch giữa hai bên và áp dụng (nếu không phải dry-run)
+
+        Args:
+            dryRun (bool): True để chỉ báo cáo, không thay đổi router
+            incremental (bool): True để chỉ xử lý các thành viên thay đổi so với lần đồng bộ trước.
+                                Nếu chưa có lần đồng bộ nào thì chạy đầy đủ
+            members (List[Dict], optional): Danh sách thành viên đã tải, mặc định gọi loader
+
+        Returns:
+            Dict: Danh sách tài khoản cần tạo, xoá, sửa profile và lỗi của từng tài khoản
+        """
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            startedAt = time.monotonic()
+            if members is None:
+                members = await self.loader()
+            expected = frozenset(str(member['Username']) for member in members)
+
+            if incremental and self.snapshot is not None:
+                # Chỉ so sánh với lần trước, không cần tải toàn bộ tài khoản trên router
+                creates = sorted(expected - self.snapshot)
+                removes = sorted(self.snapshot - expected)
+                fixes: List[str] = []
+            else:
+                incremental = False
+                routerUsers = await self.router.getHotspotUserList()
+                profiles = {user['name']: user.get('profile') for user in routerUsers}
+                creates = sorted(expected - profiles.keys())
+                removes = sorted(name for name, profile in profiles.items()
+                                 if profile in self.managedProfiles and name not in expected)
+                fixes = sorted(name for name in expected & profiles.keys() if self.needsFix(profiles[name]))
+
+            errors: Dict[str, str] = {}
+            if not dryRun:
+                await self.apply(creates, removes, fixes, errors, incremental)
+                # Tài khoản tạo / xoá lỗi không được tính là đã đồng bộ để lần incremental sau thử lại
+                self.snapshot = expected - (errors.keys() & set(creates)) | (errors.keys() & set(removes))
+
+            return {
+                'ThuNghiem': dryRun,
+                'Incremental': incremental,
+                'Tao': creates,
+                'Xoa': removes,
+                'SuaProfile': fixes,
+                'Loi': errors,
+                'ThoiGian': time.monotonic() - startedAt
+            }
+
+    def needsFix(self, profile: Optional[str]) -> bool:
+        if self.allowedProfiles is None:
+            return profile in UNMANAGED_PROFILES
+        return profile not in self.managedProfiles
+
+    async def apply(self, creates: List[str], removes: List[str], fixes: List[str],
+                    errors: Dict[str, str], incremental: bool) -> None:
+        for batch in self.batches(creates):
+            users = [UserHotspot(username=name, password=self.password, profile=self.profile) for name in batch]
+            for name, error in zip(batch, await self.router.createHotspotUsers(users)):
+                # Ở chế độ incremental tài khoản có thể đã được tạo bằng tay
+                if error is not None and not (incremental and 'already have' in error):
+                    errors[name] = error
+        for batch in self.batches(removes):
+            for name, error in zip(batch, await self.router.removeHotspotUsers(batch)):
+                if error is not None and not (incremental and 'did not exist' in error):
+                    errors[name] = error
+        for batch in self.batches(fixes):
+            for name, error in zip(batch, await self.router.setHotspotUsers(batch, {'profile': self.profile})):
+                if error is not None:
+                    errors[name] = error
+
+    def batches(self, names: List[str]):
+        for i in range(0, len(names), self.batchSize):
+            yield names[i:i + self.batchSize]
+
+    async def runPeriodically(self, interval: float) -> None:
+        """Chạy đồng bộ incremental định kỳ, dùng làm background task
+
+        Args:
+            interval (float): Chu kỳ (giây) giữa hai lần đồng bộ
+        """
+        while True:
+            try:
+                logResult(await self.run(dryRun=False, incremental=True))
+            except Exception as ex:
+                logging.error('Đồng bộ tài khoản thất bại: %s', ex)
+            await asyncio.sleep(interval)
+
+
+class ReconcilerGroup:
+    def __init__(self, routers: Dict[str, RouterPool], loader: Callable[[], Awaitable[List[Dict]]],
+                 **kwargs) -> None:
+        """Đồng bộ từng router riêng khi có nhiều router (RouterRegistry)
+
+        Mỗi router được so sánh với database riêng, nên tài khoản có trên router này nhưng thiếu trên
+        router khác vẫn được tạo. Danh sách thành viên chỉ được tải một lần cho mỗi lần đồng bộ.
+
+        Args:
+            routers (Dict[str, RouterPool]): Tên router -> pool kết nối đến router đó
+            loader (Callable): Coroutine function lấy danh sách thành viên, mỗi thành viên có Username
+            **kwargs: Các tham số khác của Reconciler
+        """
+        self.loader = loader
+        self.reconcilers = {name: Reconciler(router=router, loader=loader, **kwargs) for name, router in routers.items()}
+
+    async def run(self, dryRun: bool = True, incremental: bool = False) -> Dict:
+        """Đồng bộ song song trên mọi router
+
+        Returns:
+            Dict: Kết quả của từng router (như Reconciler.run), router bị lỗi có 'LoiRouter'
+        """
+        startedAt = time.monotonic()
+        members = await self.loader()
+        names = list(self.reconcilers)
+        results = await asyncio.gather(
+            *[self.reconcilers[name].run(dryRun=dryRun, incremental=incremental, members=members) for name in names],
+            return_exceptions=True)
+        routers = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            routers[name] = {'LoiRouter': str(result)} if isinstance(result, Exception) else result
+        return {
+            'ThuNghiem': dryRun,
+            'Router': routers,
+            'ThoiGian': time.monotonic() - startedAt
+        }
+
+    async def runPeriodically(self, interval: float) -> None:
+        """Chạy đồng bộ incremental định kỳ trên mọi router, dùng làm background task
+
+        Args:
+            interval (float): Chu kỳ (giây) giữa hai lần đồng bộ
+        """
+        while True:
+            try:
+                result = await self.run(dryRun=False, incremental=True)
+                for name, routerResult in result['Router'].items():
+                    if 'LoiRouter' in routerResult:
+                        logging.error('Đồng bộ tài khoản trên router %s thất bại: %s', name, routerResult['LoiRouter'])
+                    else:
+                        logResult(routerResult, name)
+            except Exception as ex:
+                logging.error('Đồng bộ tài khoản thất bại: %s', ex)
+            await asyncio.sleep(interval)
@@ -1,19 +1,32 @@
-from typing import Any, List, Dict
+import socket
+from typing import Any, Callable, List, Dict, Optional
 import routeros_api                 # Gọi API từ Router Mikrotik
+from routeros_api.exceptions import (RouterOsApiCommunicationError, RouterOsApiConnectionError,
+                                     RouterOsApiFatalCommunicationError)
 from .model.UserHotspot import UserHotspot
+from .HotspotUserIndex import HotspotUserIndex
+
+# Số lệnh được gửi liên tiếp trước khi chờ phản hồi khi thay đổi nhiều tài khoản
+PIPELINE_SIZE = 100
 
 class RouterMikrotik:
-    def __init__(self, host: str, username: str, password: str):
+    def __init__(self, host: str, username: str, password: str, userIndex: Optional[HotspotUserIndex] = None,
+                 port: Optional[int] = None):
         """Khởi tạo object RouterMikrotik
 
         Args:
             host (str): Hostname hoặc địa chỉ IP của router
             username (str): Tên đăng nhập vào router
             password (str): Mật khẩu đăng nhập vào router
+            userIndex (HotspotUserIndex, optional): Bảng username -> ID dùng chung, mặc định tạo bảng riêng
+            port (int, optional): Cổng API của router, mặc định 8728
         """
         self.host = host
+        self.port = port
         self.username = username
         self.password = password
+        self.userIndex = userIndex if userIndex is not None else HotspotUserIndex()
+        self.connection = None
         self.api = self.connect()
 
     def connect(self) -> Any:
@@ -26,16 +39,73 @@ class RouterMikrotik:
         """
         try:
             # Tạo kết nối đến router với các parameter lấy được khi hàm được gọi
-            connection = routeros_api.RouterOsApiPool(
+            self.connection = routeros_api.RouterOsApiPool(
                 host=self.host,
                 username=self.username,
                 password=self.password,
+                port=self.port,
                 plaintext_login=True)
-            api = connection.get_api()
+            api = self.connection.get_api()
+            # Lệnh và phản hồi đều nhỏ, tắt Nagle để không bị giữ lại chờ gói tin tiếp theo
+            self.connection.socket.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             return api
         except Exception as ex:
             raise ex
 
+    def disconnect(self) -> None:
+        """Đóng kết nối đến Router Mikrotik
+        """
+        if self.connection is not None:
+            self.connection.disconnect()
+
+    def interrupt(self) -> None:
+        """Ngắt kết nối từ thread khác, lệnh đang chờ phản hồi (như listen) sẽ dừng với lỗi kết nối
+        """
+        sock = getattr(self.connection.socket, 'socket', None) if self.connection is not None else None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def ping(self) -> bool:
+        """Gửi một lệnh nhẹ để kiểm tra kết nối còn hoạt động
+
+        Returns:
+            bool: Trả về True nếu router phản hồi
+        """
+        try:
+            self.api.get_resource('/system/identity').get()
+            return True
+        except Exception as ex:
+            raise ex
+
+    def watchHotspotActive(self, onSnapshot: Callable[[List[Dict]], Any], onChange: Callable[[Dict], Any],
+                           maxEvents: Optional[int] = None) -> None:
+        """Theo dõi các phiên đăng nhập trên router bằng lệnh listen của /ip/hotspot/active
+
+        Lệnh listen được gửi trước lệnh print để không bỏ sót thay đổi xảy ra trong lúc print.
+        Hàm chạy (blocking) cho tới khi kết nối bị đóng hoặc đã nhận đủ maxEvents thay đổi,
+        vì routeros_api giữ lại mọi phản hồi của lệnh listen trong bộ nhớ.
+
+        Args:
+            onSnapshot (Callable[[List[Dict]], Any]): Được gọi một lần với danh sách phiên hiện tại
+            onChange (Callable[[Dict], Any]): Được gọi với mỗi thay đổi, phiên đã kết thúc có '.dead'
+            maxEvents (int, optional): Số thay đổi tối đa trước khi dừng theo dõi
+        """
+        try:
+            # Kết nối này chỉ dùng để chờ thay đổi nên không giới hạn thời gian đọc
+            self.connection.set_timeout(None)
+            active = self.api.get_resource('/ip/hotspot/active')
+            changes = active.call_async('listen')
+            onSnapshot(active.get())
+            for count, change in enumerate(changes, 1):
+                onChange(change)
+                if maxEvents is not None and count >= maxEvents:
+                    return
+        except Exception as ex:
+            raise ex
+
     def login(self, user: UserHotspot) -> bool:
         """Thành viên đăng nhập vào router Mikrotik để sử dụng Internet
 
@@ -79,11 +149,46 @@ class RouterMikrotik:
                 'password': user.password,
                 'profile': user.profile
             }
-            init.call('add', params)
+            response = init.call('add', params)
+            # Lệnh add trả về ID của tài khoản vừa tạo trong thuộc tính 'ret'
+            id = response.done_message.get('ret')
+            if id:
+                self.userIndex.set(user.username, id)
             return True
         except Exception as ex:
             raise ex
 
+    def createHotspotUsers(self, users: List[UserHotspot]) -> List[Optional[str]]:
+        """Tạo nhiều tài khoản trên cùng một kết nối, mỗi nhóm PIPELINE_SIZE lệnh add được gửi trước
+        rồi mới đọc phản hồi để không phải chờ router trả lời từng lệnh
+
+        Args:
+            users (List[UserHotspot]): Danh sách tài khoản cần tạo
+
+        Returns:
+            List[Optional[str]]: Lỗi của từng tài khoản theo thứ tự, None nếu tạo thành công
+        """
+        resource = self.api.get_resource('ip/hotspot/user')
+        errors: List[Optional[str]] = []
+        for start in range(0, len(users), PIPELINE_SIZE):
+            chunk = users[start:start + PIPELINE_SIZE]
+            promises = [(user, resource.call_async('add', {
+                'name': user.username,
+                'password': user.password,
+                'profile': user.profile
+            })) for user in chunk]
+            for user, promise in promises:
+                try:
+                    # Lệnh add trả về ID của tài khoản vừa tạo trong thuộc tính 'ret'
+                    id = promise.get().done_message.get('ret')
+                    if id:
+                        self.userIndex.set(user.username, id)
+                    errors.append(None)
+                except RouterOsApiCommunicationError as ex:
+                    # Lỗi riêng của tài khoản này (trùng tên...), tiếp tục với tài khoản tiếp theo
+                    errors.append(str(ex))
+        return errors
+
     def getHotspotUserList(self) -> List[Dict]:
         """Lấy danh sách tài khoản trên router Mikrotik
 
@@ -93,28 +198,61 @@ class RouterMikrotik:
         try:
             api = self.api.get_resource('ip/hotspot/user')
             userList = api.call('print')
+            self.userIndex.load(userList)
             return userList
         except Exception as ex:
             raise ex
 
-    def getHotspotUserID(self, username:str) -> str:
+    def getHotspotUserID(self, username:str, refresh: bool = False) -> str:
         """Lấy ID của tài khoản trên router Mikrotik
 
+        ID được tra trong userIndex. Nếu không có thì chỉ print đúng tài khoản cần tìm (lọc theo name)
+        thay vì tải toàn bộ danh sách.
+
         Args:
             username (str): Tên đăng nhập của tài khoản trên router Mikrotik
+            refresh (bool): True để bỏ qua userIndex và hỏi lại router
 
         Returns:
             str: Trả về ID của tài khoản dưới dạng chuỗi
         """
         try:
-            userList = self.getHotspotUserList()
-            for user in userList:
-                if user['name'] == username:
-                    return user['id']
-            raise Exception('User did not exist')
+            if not refresh:
+                if self.userIndex.needsResync():
+                    self.getHotspotUserList()
+                id = self.userIndex.get(username)
+                if id is not None:
+                    return id
+
+            api = self.api.get_resource('ip/hotspot/user')
+            userList = api.get(name=username)
+            if not userList:
+                self.userIndex.remove(username)
+                raise Exception('User did not exist')
+            id = userList[0]['id']
+            self.userIndex.set(username, id)
+            return id
         except Exception as ex:
             raise ex
 
+    def callWithUserID(self, username: str, command: Callable[[str], Any]) -> Any:
+        """Gọi lệnh cần ID của tài khoản, thử lại một lần nếu ID trong userIndex đã cũ
+
+        Args:
+            username (str): Tên đăng nhập của tài khoản
+            command (Callable[[str], Any]): Hàm nhận ID và gửi lệnh đến router
+
+        Returns:
+            Any: Kết quả trả về của command
+        """
+        try:
+            return command(self.getHotspotUserID(username=username))
+        except RouterOsApiCommunicationError as ex:
+            # Tài khoản đã bị xoá hoặc tạo lại ngoài ứng dụng nên ID không còn đúng
+            if 'no such item' not in str(ex):
+                raise ex
+            return command(self.getHotspotUserID(username=username, refresh=True))
+
     def removeHotspotUser(self, username:str) -> bool:
         """Xoá tài khoản trên router Mikrotik
 
@@ -125,15 +263,130 @@ class RouterMikrotik:
             bool: Trả về True nếu xoá tài khoản thành công
         """
         try:
-            id = self.getHotspotUserID(username=username)
             remove = self.api.get_resource('ip/hotspot/user')
-            params = {
-                'numbers': id
-            }
-            print(remove.call('remove', params))
+            self.callWithUserID(username, lambda id: remove.call('remove', {'numbers': id}))
+            self.userIndex.remove(username)
         except Exception as ex:
             raise ex
 
+    def removeHotspotUsers(self, usernames: List[str]) -> List[Optional[str]]:
+        """Xoá nhiều tài khoản liên tiếp trên cùng một kết nối
+
+        Args:
+            usernames (List[str]): Tên đăng nhập của các tài khoản cần xoá
+
+        Returns:
+            List[Optional[str]]: Lỗi của từng tài khoản theo thứ tự, None nếu xoá thành công
+        """
+        remove = self.api.get_resource('ip/hotspot/user')
+        errors = self.forEachUser(usernames, lambda id: remove.call('remove', {'numbers': id}))
+        for username, error in zip(usernames, errors):
+            if error is None:
+                self.userIndex.remove(username)
+        return errors
+
+    def setHotspotUsers(self, usernames: List[str], params: Dict) -> List[Optional[str]]:
+        """Gán cùng các thuộc tính cho nhiều tài khoản liên tiếp trên cùng một kết nối
+
+        Args:
+            usernames (List[str]): Tên đăng nhập của các tài khoản cần sửa
+            params (Dict): Các thuộc tính cần gán, ví dụ {'profile': 'student'}
+
+        Returns:
+            List[Optional[str]]: Lỗi của từng tài khoản theo thứ tự, None nếu sửa thành công
+        """
+        edit = self.api.get_resource('ip/hotspot/user')
+        return self.forEachUser(usernames, lambda id: edit.call('set', dict(params, numbers=id)))
+
+    def forEachUser(self, usernames: List[str], command: Callable[[str], Any]) -> List[Optional[str]]:
+        """Chạy command với ID của từng tài khoản, lỗi của một tài khoản không làm dừng cả danh sách
+
+        Args:
+            usernames (List[str]): Tên đăng nhập của các tài khoản
+            command (Callable[[str], Any]): Hàm nhận ID và gửi lệnh đến router
+
+        Returns:
+            List[Optional[str]]: Lỗi của từng tài khoản theo thứ tự, None nếu thành công
+        Raises:
+            Lỗi kết nối đến router thì dừng ngay để RouterPool bỏ kết nối này
+        """
+        errors = []
+        for username in usernames:
+            try:
+                self.callWithUserID(username, command)
+                errors.append(None)
+            except (RouterOsApiConnectionError, RouterOsApiFatalCommunicationError, OSError):
+                raise
+            except Exception as ex:
+                # Router báo lỗi của lệnh hoặc tài khoản không tồn tại
+                errors.append(str(ex))
+        return errors
+
+    def findHotspotUsers(self, usernames: Optional[List[str]] = None, profile: Optional[str] = None) -> Dict[str, str]:
+        """Tìm tài khoản theo tên và/hoặc profile bằng một lệnh print, đồng thời nạp lại userIndex
+
+        Args:
+            usernames (List[str], optional): Chỉ lấy các tài khoản có tên trong danh sách
+            profile (str, optional): Chỉ lấy các tài khoản thuộc profile này
+
+        Returns:
+            Dict[str, str]: Username -> ID của các tài khoản tìm thấy
+        """
+        wanted = set(usernames) if usernames is not None else None
+        return {user['name']: user['id'] for user in self.getHotspotUserList()
+                if (wanted is None or user['name'] in wanted)
+                and (profile is None or user.get('profile') == profile)}
+
+    def pipelineHotspotUsers(self, command: str, ids: Dict[str, str], params: Dict) -> Dict[str, Optional[str]]:
+        """Gửi command cho nhiều tài khoản liên tiếp, mỗi nhóm PIPELINE_SIZE lệnh được gửi trước
+        rồi mới đọc phản hồi để không phải chờ router trả lời từng lệnh
+
+        Args:
+            command (str): 'set' hoặc 'remove'
+            ids (Dict[str, str]): Username -> ID của các tài khoản
+            params (Dict): Các thuộc tính gửi kèm, ví dụ {'profile': 'student'}
+
+        Returns:
+            Dict[str, Optional[str]]: Username -> lỗi, None nếu thành công
+        """
+        resource = self.api.get_resource('ip/hotspot/user')
+        items = list(ids.items())
+        results: Dict[str, Optional[str]] = {}
+        for start in range(0, len(items), PIPELINE_SIZE):
+            chunk = items[start:start + PIPELINE_SIZE]
+            promises = [(username, resource.call_async(command, dict(params, numbers=id))) for username, id in chunk]
+            for username, promise in promises:
+                try:
+                    promise.get()
+                    results[username] = None
+                except RouterOsApiCommunicationError as ex:
+                    results[username] = str(ex)
+        for username, error in results.items():
+            if error is None and command == 'remove':
+                self.userIndex.remove(username)
+        return results
+
+    def bulkHotspotUsers(self, command: str, params: Dict, usernames: Optional[List[str]] = None,
+                         profile: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Sửa hoặc xoá các tài khoản theo tên và/hoặc profile: một lệnh print để lấy ID,
+        sau đó gửi liên tiếp các lệnh set/remove trên cùng kết nối
+
+        Args:
+            command (str): 'set' hoặc 'remove'
+            params (Dict): Các thuộc tính cần gán với lệnh set
+            usernames (List[str], optional): Tên đăng nhập của các tài khoản
+            profile (str, optional): Profile của các tài khoản
+
+        Returns:
+            Dict[str, Optional[str]]: Username -> lỗi, None nếu thành công
+        """
+        ids = self.findHotspotUsers(usernames=usernames, profile=profile)
+        results = self.pipelineHotspotUsers(command, ids, params)
+        for username in usernames or ():
+            if username not in ids:
+                results[username] = 'User did not exist'
+        return results
+
     def editHotspotUser(self, user: UserHotspot) -> bool:
         """Chỉnh sửa tài khoản của thành viên trên router Mikrotik
 
@@ -144,15 +397,13 @@ class RouterMikrotik:
             bool: Trả về True nếu chỉnh sửa thành công
         """
         try:
-            id = self.getHotspotUserID(username=user.username)
             edit = self.api.get_resource('ip/hotspot/user')
             params = {
-                'numbers': id,
                 'profile': user.profile,
                 'name': user.username,
                 'password': user.password
             }
-            edit.call('set', params)
+            self.callWithUserID(user.username, lambda id: edit.call('set', dict(params, numbers=id)))
             return True
         except Exception as ex:
             raise ex
\ No newline at end of file
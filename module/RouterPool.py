@@ -0,0 +1,247 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from routeros_api.exceptions import (FatalRouterOsApiError, RouterOsApiConnectionError,
+                                     RouterOsApiFatalCommunicationError)
+
+from .CircuitBreaker import CircuitBreaker, CLOSED, HALF_OPEN
+from .HotspotUserIndex import HotspotUserIndex
+from .Metrics import metrics
+from .model.UserHotspot import UserHotspot
+from .RouterMikrotik import RouterMikrotik, PIPELINE_SIZE
+from .SharedCache import SharedCache
+from .Tracing import span
+
+# Các lỗi cho thấy kết nối đến router không còn dùng được
+CONNECTION_ERRORS = (RouterOsApiConnectionError, RouterOsApiFatalCommunicationError, FatalRouterOsApiError, OSError)
+
+
+class RouterPool:
+    def __init__(self, host: str, username: str, password: str, size: int = 4, timeout: float = 10.0,
+                 userResyncInterval: Optional[float] = None, keepaliveInterval: Optional[float] = 30.0,
+                 failureThreshold: int = 3, resetTimeout: float = 5.0, port: Optional[int] = None,
+                 sharedCache: Optional[SharedCache] = None):
+        """Khởi tạo pool kết nối đến Router Mikrotik
+
+        Các lệnh của routeros_api là blocking nên được chạy trong thread riêng,
+        mỗi thread giữ một kết nối. Kết nối chỉ được tạo khi cần dùng lần đầu.
+
+        Args:
+            host (str): Hostname hoặc địa chỉ IP của router
+            username (str): Tên đăng nhập vào router
+            password (str): Mật khẩu đăng nhập vào router
+            size (int): Số kết nối tối đa đến router, cũng là số lệnh được chạy đồng thời
+            timeout (float): Thời gian tối đa (giây) chờ một lệnh gửi đến router
+            userResyncInterval (float, optional): Chu kỳ (giây) tải lại toàn bộ bảng username -> ID
+            keepaliveInterval (float, optional): Chu kỳ (giây) kiểm tra kết nối, None để tắt
+            failureThreshold (int): Số lỗi kết nối liên tiếp trước khi ngắt mạch
+            resetTimeout (float): Thời gian chờ (giây) trước khi thử kết nối lại sau khi ngắt mạch
+            port (int, optional): Cổng API của router, mặc định 8728
+            sharedCache (SharedCache, optional): Cache dùng chung bảng username -> ID giữa các worker
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='router')
+        self.idle: Deque[RouterMikrotik] = deque()
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        # Bảng username -> ID dùng chung cho mọi kết nối trong pool
+        self.userIndex = HotspotUserIndex(resyncInterval=userResyncInterval, shared=sharedCache,
+                                          sharedName=f'{host}:{port or 8728}')
+        self.breaker = CircuitBreaker(failureThreshold=failureThreshold, resetTimeout=resetTimeout)
+        self.keepaliveInterval = keepaliveInterval
+        self.keepaliveTask: Optional[asyncio.Task] = None
+
+    def createRouter(self) -> RouterMikrotik:
+        """Tạo một kết nối mới đến router (chạy trong thread của pool)
+
+        Returns:
+            RouterMikrotik: Object đã kết nối đến router
+        """
+        return RouterMikrotik(
+            host=self.host,
+            username=self.username,
+            password=self.password,
+            userIndex=self.userIndex,
+            port=self.port
+        )
+
+    async def run(self, func: Callable[..., Any], *args, timeout: Optional[float] = None, idempotent: bool = False,
+                  **kwargs) -> Any:
+        """Mượn một kết nối trong pool và chạy func(router, *args, **kwargs) trong thread riêng
+
+        Args:
+            func (Callable): Hàm nhận RouterMikrotik làm tham số đầu tiên
+            timeout (float, optional): Timeout cho lệnh này, mặc định dùng timeout của pool
+            idempotent (bool): True nếu lệnh chỉ đọc dữ liệu, được gửi lại trên kết nối mới khi kết nối cũ bị mất.
+                               Lệnh thay đổi không được gửi lại vì lần gửi đầu có thể đã đến router
+
+        Returns:
+            Any: Kết quả trả về của func
+        Raises:
+            Exception nếu router báo lỗi, mất kết nối, quá thời gian chờ hoặc đang ngắt mạch
+        """
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.size)
+        if not self.breaker.allow():
+            raise Exception('Router circuit open')
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        command = getattr(func, '__name__', 'unknown')
+
+        with span(f'router.{command}'):
+            async with self.semaphore:
+                startedAt = time.perf_counter()
+                for attempt in range(2):
+                    router = self.idle.pop() if self.idle else None
+                    reused = router is not None
+                    try:
+                        if router is None:
+                            router = await asyncio.wait_for(
+                                loop.run_in_executor(self.executor, self.createRouter), timeout)
+                        result = await asyncio.wait_for(
+                            loop.run_in_executor(self.executor, functools.partial(func, router, *args, **kwargs)), timeout)
+                    except asyncio.CancelledError:
+                        # Request bị huỷ (client ngắt kết nối, tắt webapp) khi thread có thể vẫn đang dùng
+                        # kết nối, ngắt socket để thread thoát và không trả kết nối này về pool
+                        if router is not None:
+                            router.interrupt()
+                            router.disconnect()
+                        # Lần thử lại khi đang half-open bị huỷ thì tính là thất bại, nếu không mạch sẽ
+                        # kẹt ở half-open và từ chối mọi lệnh sau đó
+                        if self.breaker.state == HALF_OPEN:
+                            self.breaker.recordFailure('Router probe cancelled')
+                        raise
+                    except asyncio.TimeoutError:
+                        # Ngắt socket để thread đang chờ phản hồi thoát ngay (close từ thread khác không làm
+                        # recv đang chờ dừng lại), kết nối này sẽ bị bỏ
+                        if router is not None:
+                            router.interrupt()
+                            router.disconnect()
+                        self.breaker.recordFailure('Router timed out')
+                        metrics.observe('router', command, time.perf_counter() - startedAt, True)
+                        raise Exception('Router timed out')
+                    except CONNECTION_ERRORS as ex:
+                        if router is not None:
+                            router.disconnect()
+                        # Kết nối cũ có thể đã bị router đóng (router khởi động lại, để lâu không dùng),
+                        # lệnh đọc được thử lại một lần bằng kết nối mới
+                        if reused and attempt == 0 and idempotent:
+                            continue
+                        reason = str(ex) or type(ex).__name__
+                        self.breaker.recordFailure(reason)
+                        metrics.observe('router', command, time.perf_counter() - startedAt, True)
+                        raise Exception(f'Router connection lost: {reason}')
+                    except Exception as ex:
+                        if router is None:
+                            # Không đăng nhập được vào router (sai tài khoản của router...)
+                            self.breaker.recordFailure(str(ex))
+                            metrics.observe('router', command, time.perf_counter() - startedAt, True)
+                            raise
+                        # Router trả về lỗi của lệnh (sai mật khẩu, sai MAC...), kết nối vẫn dùng được
+                        self.breaker.recordSuccess()
+                        self.idle.append(router)
+                        metrics.observe('router', command, time.perf_counter() - startedAt, True)
+                        raise
+                    self.breaker.recordSuccess()
+                    self.idle.append(router)
+                    metrics.observe('router', command, time.perf_counter() - startedAt)
+                    return result
+
+    async def start(self) -> None:
+        """Chạy background task kiểm tra kết nối định kỳ
+        """
+        if self.keepaliveTask is None and self.keepaliveInterval:
+            self.keepaliveTask = asyncio.ensure_future(self.keepalive())
+
+    async def keepalive(self) -> None:
+        """Định kỳ gửi lệnh kiểm tra trên từng kết nối đang rảnh để phát hiện kết nối đã chết.
+        Khi đang ngắt mạch, lệnh kiểm tra cũng là lần thử kết nối lại
+        """
+        while True:
+            await asyncio.sleep(self.keepaliveInterval)
+            # Xoay vòng để mỗi lần ping dùng một kết nối khác nhau
+            for _ in range(max(1, len(self.idle))):
+                try:
+                    self.idle.rotate(1)
+                    await self.run(RouterMikrotik.ping, idempotent=True)
+                except Exception as ex:
+                    logging.warning('Kiểm tra kết nối router thất bại: %s', ex)
+                    break
+
+    def status(self) -> Dict:
+        """Trạng thái kết nối đến router
+
+        Returns:
+            Dict: Trạng thái ngắt mạch, số lỗi liên tiếp, số kết nối đang rảnh
+        """
+        status = self.breaker.stats()
+        status['KetNoiRanh'] = len(self.idle)
+        status['SoKetNoiToiDa'] = self.size
+        return status
+
+    def isHealthy(self) -> bool:
+        return self.breaker.state == CLOSED
+
+    async def close(self) -> None:
+        """Đóng toàn bộ kết nối trong pool
+        """
+        if self.keepaliveTask is not None:
+            self.keepaliveTask.cancel()
+            self.keepaliveTask = None
+        while self.idle:
+            self.idle.pop().disconnect()
+        self.executor.shutdown(wait=False)
+
+    async def login(self, user: UserHotspot) -> bool:
+        return await self.run(RouterMikrotik.login, user=user)
+
+    async def createHotspotUser(self, user: UserHotspot) -> bool:
+        return await self.run(RouterMikrotik.createHotspotUser, user=user)
+
+    async def createHotspotUsers(self, users: List[UserHotspot]) -> List[Optional[str]]:
+        # Cả danh sách chạy trên một kết nối, mỗi nhóm PIPELINE_SIZE lệnh add được tính như một lệnh
+        chunks = -(-len(users) // PIPELINE_SIZE)
+        return await self.run(RouterMikrotik.createHotspotUsers, users=users,
+                              timeout=self.timeout * max(1, chunks))
+
+    async def getHotspotUserList(self) -> List[Dict]:
+        return await self.run(RouterMikrotik.getHotspotUserList, idempotent=True)
+
+    async def getHotspotUserID(self, username: str) -> str:
+        return await self.run(RouterMikrotik.getHotspotUserID, username=username, idempotent=True)
+
+    async def removeHotspotUser(self, username: str) -> bool:
+        return await self.run(RouterMikrotik.removeHotspotUser, username=username)
+
+    async def editHotspotUser(self, user: UserHotspot) -> bool:
+        return await self.run(RouterMikrotik.editHotspotUser, user=user)
+
+    async def removeHotspotUsers(self, usernames: List[str]) -> List[Optional[str]]:
+        return await self.run(RouterMikrotik.removeHotspotUsers, usernames=usernames,
+                              timeout=self.timeout * max(1, len(usernames)))
+
+    async def setHotspotUsers(self, usernames: List[str], params: Dict) -> List[Optional[str]]:
+        return await self.run(RouterMikrotik.setHotspotUsers, usernames=usernames, params=params,
+                              timeout=self.timeout * max(1, len(usernames)))
+
+    async def bulkHotspotUsers(self, command: str, params: Dict, usernames: Optional[List[str]] = None,
+                               profile: Optional[str] = None) -> Dict[str, Optional[str]]:
+        if usernames is None:
+            # Chỉ lọc theo profile thì chưa biết số tài khoản, tìm ID trước để tính timeout theo số tài khoản thật
+            ids = await self.run(RouterMikrotik.findHotspotUsers, profile=profile, idempotent=True)
+            chunks = -(-len(ids) // PIPELINE_SIZE)
+            return await self.run(RouterMikrotik.pipelineHotspotUsers, command=command, ids=ids, params=params,
+                                  timeout=self.timeout * max(1, chunks))
+        # Một lệnh print và mỗi nhóm PIPELINE_SIZE lệnh được tính như một lệnh
+        chunks = -(-len(usernames) // PIPELINE_SIZE)
+        return await self.run(RouterMikrotik.bulkHotspotUsers, command=command, params=params,
+                              usernames=usernames, profile=profile, timeout=self.timeout * (1 + max(1, chunks)))
@@ -0,0 +1,184 @@
+import asyncio
+import ipaddress
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .model.UserHotspot import UserHotspot
+from .RouterPool import RouterPool
+
+
+class NoRouterAvailable(Exception):
+    def __init__(self, errors: Dict[str, str]) -> None:
+        super().__init__('All routers failed: ' + '; '.join(f'{name}: {error}' for name, error in errors.items()))
+        self.errors = errors
+
+
+class RouterRegistry:
+    def __init__(self, routers: Dict[str, RouterPool], subnets: Optional[Dict[str, List[str]]] = None,
+                 default: Optional[str] = None) -> None:
+        """Quản lý nhiều router Mikrotik (nhiều phòng, nhiều toà nhà)
+
+        Lệnh login được gửi đến router quản lý mạng con chứa IP của client. Lệnh đọc được gửi
+        song song đến mọi router rồi gộp kết quả, lệnh thay đổi tài khoản được áp dụng đồng thời
+        trên mọi router. Lỗi của từng router được báo riêng, request chỉ lỗi khi mọi router đều lỗi.
+
+        Args:
+            routers (Dict[str, RouterPool]): Tên router -> pool kết nối đến router đó
+            subnets (Dict[str, List[str]], optional): Tên router -> các mạng con (vd: '10.0.1.0/24')
+            default (str, optional): Router nhận lệnh login khi IP không thuộc mạng con nào, mặc định là router đầu tiên
+        """
+        if not routers:
+            raise ValueError('At least one router is required')
+        self.routers = routers
+        self.default = default if default is not None else next(iter(routers))
+        # Mạng con dài hơn (cụ thể hơn) được kiểm tra trước
+        self.networks: List[Tuple[Any, str]] = sorted(
+            ((ipaddress.ip_network(subnet, strict=False), name)
+             for name, values in (subnets or {}).items() for subnet in values),
+            key=lambda item: item[0].prefixlen, reverse=True)
+        self.subnets = {name: list(values) for name, values in (subnets or {}).items()}
+
+    def routerFor(self, ip: str) -> str:
+        """Tìm router quản lý địa chỉ IP
+
+        Args:
+            ip (str): Địa chỉ IP của client
+
+        Returns:
+            str: Tên router
+        """
+        try:
+            address = ipaddress.ip_address(str(ip))
+        except ValueError:
+            return self.default
+        for network, name in self.networks:
+            if address.version == network.version and address in network:
+                return name
+        return self.default
+
+    async def fanOut(self, method: str, *args, **kwargs) -> Dict[str, Any]:
+        """Gọi cùng một lệnh song song trên mọi router
+
+        Args:
+            method (str): Tên method của RouterPool
+
+        Returns:
+            Dict[str, Any]: Tên router -> kết quả, hoặc Exception nếu router đó lỗi
+        """
+        names = list(self.routers)
+        results = await asyncio.gather(*[getattr(self.routers[name], method)(*args, **kwargs) for name in names],
+                                       return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return dict(zip(names, results))
+
+    @staticmethod
+    def split(results: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Tách kết quả thành công và lỗi, báo lỗi nếu mọi router đều lỗi
+        """
+        succeeded = {name: result for name, result in results.items() if not isinstance(result, Exception)}
+        errors = {name: str(result) for name, result in results.items() if isinstance(result, Exception)}
+        if not succeeded:
+            if len(errors) == 1:
+                raise next(iter(results.values()))
+            raise NoRouterAvailable(errors)
+        for name, error in errors.items():
+            logging.warning('Router %s lỗi: %s', name, error)
+        return succeeded, errors
+
+    async def mutate(self, method: str, *args, **kwargs) -> Dict[str, Optional[str]]:
+        succeeded, errors = self.split(await self.fanOut(method, *args, **kwargs))
+        return dict({name: None for name in succeeded}, **errors)
+
+    async def mutateBatch(self, method: str, count: int, *args, **kwargs) -> List[Optional[str]]:
+        """Gọi lệnh thay đổi nhiều tài khoản trên mọi router và gộp lỗi của từng tài khoản
+
+        Returns:
+            List[Optional[str]]: Lỗi của từng tài khoản theo thứ tự (ghi rõ router), None nếu thành công trên mọi router
+        """
+        succeeded, errors = self.split(await self.fanOut(method, *args, **kwargs))
+        merged: List[Optional[str]] = []
+        for i in range(count):
+            messages = [f'{name}: {error}' for name, error in errors.items()]
+            messages += [f'{name}: {result[i]}' for name, result in succeeded.items() if result[i]]
+            merged.append('; '.join(messages) if messages else None)
+        return merged
+
+    async def start(self) -> None:
+        await asyncio.gather(*[router.start() for router in self.routers.values()])
+
+    async def close(self) -> None:
+        await asyncio.gather(*[router.close() for router in self.routers.values()])
+
+    def status(self) -> Dict:
+        """Trạng thái kết nối đến từng router
+
+        Returns:
+            Dict: Tên router -> trạng thái kết nối và các mạng con của router đó
+        """
+        result = {}
+        for name, router in self.routers.items():
+            status = router.status()
+            status['MangCon'] = self.subnets.get(name, [])
+            status['MacDinh'] = name == self.default
+            result[name] = status
+        return result
+
+    def isHealthy(self) -> bool:
+        # Vẫn phục vụ được khi còn ít nhất một router hoạt động
+        return any(router.isHealthy() for router in self.routers.values())
+
+    async def login(self, user: UserHotspot) -> bool:
+        return await self.routers[self.routerFor(user.ip)].login(user=user)
+
+    async def getHotspotUserList(self) -> List[Dict]:
+        """Lấy tài khoản trên mọi router, mỗi tài khoản có thêm key 'router'
+
+        Returns:
+            List[Dict]: Danh sách tài khoản đã gộp, bỏ qua router bị lỗi
+        """
+        succeeded, _ = self.split(await self.fanOut('getHotspotUserList'))
+        merged = []
+        for name, users in succeeded.items():
+            for user in users:
+                merged.append(dict(user, router=name))
+        return merged
+
+    async def getHotspotUserID(self, username: str) -> str:
+        # ID khác nhau trên mỗi router, trả về ID trên router mặc định
+        return await self.routers[self.default].getHotspotUserID(username=username)
+
+    async def createHotspotUser(self, user: UserHotspot) -> Dict[str, Optional[str]]:
+        return await self.mutate('createHotspotUser', user=user)
+
+    async def removeHotspotUser(self, username: str) -> Dict[str, Optional[str]]:
+        return await self.mutate('removeHotspotUser', username=username)
+
+    async def editHotspotUser(self, user: UserHotspot) -> Dict[str, Optional[str]]:
+        return await self.mutate('editHotspotUser', user=user)
+
+    async def createHotspotUsers(self, users: List[UserHotspot]) -> List[Optional[str]]:
+        return await self.mutateBatch('createHotspotUsers', len(users), users=users)
+
+    async def removeHotspotUsers(self, usernames: List[str]) -> List[Optional[str]]:
+        return await self.mutateBatch('removeHotspotUsers', len(usernames), usernames=usernames)
+
+    async def setHotspotUsers(self, usernames: List[str], params: Dict) -> List[Optional[str]]:
+        return await self.mutateBatch('setHotspotUsers', len(usernames), usernames=usernames, params=params)
+
+    async def bulkHotspotUsers(self, command: str, params: Dict, usernames: Optional[List[str]] = None,
+                               profile: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Sửa hoặc xoá nhiều tài khoản trên mọi router và gộp lỗi của từng tài khoản
+
+        Returns:
+            Dict[str, Optional[str]]: Username -> lỗi (ghi rõ router), None nếu thành công trên mọi router
+        """
+        succeeded, errors = self.split(await self.fanOut('bulkHotspotUsers', command=command, params=params,
+                                                         usernames=usernames, profile=profile))
+        merged: Dict[str, Optional[str]] = {}
+        for username in sorted({username for result in succeeded.values() for username in result}):
+            messages = [f'{name}: {error}' for name, error in errors.items()]
+            messages += [f'{name}: {result[username]}' for name, result in succeeded.items() if result.get(username)]
+            merged[username] = '; '.join(messages) if messages else None
+        return merged
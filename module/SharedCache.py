@@ -0,0 +1,151 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SharedCache:
+    def __init__(self, path: str = 'cache.db') -> None:
+        """Cache dùng chung giữa các worker process trên cùng một máy, lưu bằng SQLite
+
+        Giữ danh sách thành viên (cho MemberCache) và bảng username -> ID (cho HotspotUserIndex)
+        để các worker không phải tự tải lại và thấy cùng một dữ liệu sau khi một worker thay đổi.
+        Các method async chạy trên một thread riêng, các method đồng bộ (UserID) được gọi từ
+        thread của RouterPool.
+
+        Args:
+            path (str): Đường dẫn đến file SQLite
+        """
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shared-cache')
+        self.db: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            # WAL cho phép nhiều process đọc trong lúc một process đang ghi
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updatedAt REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS user_ids (
+                    router TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    PRIMARY KEY (router, name)
+                );
+            ''')
+        return self.db
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _stamp(self, key: str, maxAge: float) -> Optional[float]:
+        with self.lock:
+            row = self.connect().execute('SELECT updatedAt FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or time.time() - row[0] >= maxAge:
+            return None
+        return row[0]
+
+    def _get(self, key: str, maxAge: float) -> Optional[Tuple[Any, float]]:
+        with self.lock:
+            row = self.connect().execute('SELECT value, updatedAt FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or time.time() - row[1] >= maxAge:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _set(self, key: str, value: Any) -> float:
+        updatedAt = time.time()
+        data = json.dumps(value)
+        with self.lock:
+            db = self.connect()
+            with db:
+                db.execute('INSERT OR REPLACE INTO cache (key, value, updatedAt) VALUES (?, ?, ?)',
+                           (key, data, updatedAt))
+        return updatedAt
+
+    def _delete(self, key: str) -> None:
+        with self.lock:
+            db = self.connect()
+            with db:
+                db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    async def stamp(self, key: str, maxAge: float) -> Optional[float]:
+        """Thời điểm giá trị được ghi, không đọc giá trị
+
+        Returns:
+            Optional[float]: None nếu không có hoặc đã cũ hơn maxAge giây
+        """
+        return await self.run(self._stamp, key, maxAge)
+
+    async def get(self, key: str, maxAge: float) -> Optional[Tuple[Any, float]]:
+        """Lấy giá trị và thời điểm được ghi
+
+        Returns:
+            Optional[Tuple[Any, float]]: None nếu không có hoặc đã cũ hơn maxAge giây
+        """
+        return await self.run(self._get, key, maxAge)
+
+    async def set(self, key: str, value: Any) -> float:
+        return await self.run(self._set, key, value)
+
+    async def delete(self, key: str) -> None:
+        await self.run(self._delete, key)
+
+    def userID(self, router: str, username: str) -> Optional[str]:
+        with self.lock:
+            row = self.connect().execute('SELECT id FROM user_ids WHERE router = ? AND name = ?',
+                                         (router, username)).fetchone()
+        return row[0] if row is not None else None
+
+    def setUserID(self, router: str, username: str, id: str) -> None:
+        with self.lock:
+            db = self.connect()
+            with db:
+                db.execute('INSERT OR REPLACE INTO user_ids (router, name, id) VALUES (?, ?, ?)',
+                           (router, username, id))
+
+    def removeUserID(self, router: str, username: str) -> None:
+        with self.lock:
+            db = self.connect()
+            with db:
+                db.execute('DELETE FROM user_ids WHERE router = ? AND name = ?', (router, username))
+
+    def loadUserIDs(self, router: str, ids: Dict[str, str]) -> None:
+        """Thay toàn bộ bảng username -> ID của một router và ghi lại thời điểm tải
+
+        Args:
+            router (str): Tên phân biệt router (host:port)
+            ids (Dict[str, str]): Bảng username -> ID
+        """
+        with self.lock:
+            db = self.connect()
+            with db:
+                db.execute('DELETE FROM user_ids WHERE router = ?', (router,))
+                db.executemany('INSERT INTO user_ids (router, name, id) VALUES (?, ?, ?)',
+                               [(router, name, id) for name, id in ids.items()])
+                db.execute('INSERT OR REPLACE INTO cache (key, value, updatedAt) VALUES (?, ?, ?)',
+                           (f'user_ids:{router}', 'null', time.time()))
+
+    def userIDsLoadedAt(self, router: str) -> Optional[float]:
+        with self.lock:
+            row = self.connect().execute('SELECT updatedAt FROM cache WHERE key = ?',
+                                         (f'user_ids:{router}',)).fetchone()
+        return row[0] if row is not None else None
+
+    async def close(self) -> None:
+        def close():
+            with self.lock:
+                if self.db is not None:
+                    self.db.close()
+                    self.db = None
+        await self.run(close)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import signal
+import socket
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional
+
+
+def canReusePort() -> bool:
+    """Kiểm tra hệ điều hành có hỗ trợ SO_REUSEPORT (Linux, BSD) để nhiều process cùng nghe một cổng
+    """
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+class Supervisor:
+    def __init__(self, target: Callable[[int], None], workers: int, restartDelay: float = 1.0,
+                 maxRestartDelay: float = 30.0, stableAfter: float = 10.0, stopTimeout: float = 30.0) -> None:
+        """Chạy nhiều worker process, khởi động lại worker bị dừng bất thường
+
+        Mỗi worker gọi target(index) và tự mở cổng với SO_REUSEPORT, kernel chia kết nối cho các worker.
+        Khi nhận SIGTERM/SIGINT, tín hiệu được chuyển cho các worker để chúng dừng nhẹ nhàng.
+
+        Args:
+            target (Callable): Hàm chạy trong mỗi worker, nhận số thứ tự của worker
+            workers (int): Số worker
+            restartDelay (float): Thời gian chờ (giây) trước khi khởi động lại worker bị dừng
+            maxRestartDelay (float): Thời gian chờ tối đa, tăng gấp đôi nếu worker liên tục bị dừng
+            stableAfter (float): Worker chạy quá bao nhiêu giây thì được xem là ổn định, đặt lại thời gian chờ
+            stopTimeout (float): Thời gian tối đa (giây) chờ worker dừng trước khi kill
+        """
+        self.target = target
+        self.workers = workers
+        self.restartDelay = restartDelay
+        self.maxRestartDelay = maxRestartDelay
+        self.stableAfter = stableAfter
+        self.stopTimeout = stopTimeout
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.startedAt: Dict[int, float] = {}
+        self.delays: Dict[int, float] = {}
+        # Thời điểm khởi động lại các worker đang chờ
+        self.restartAt: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        process = multiprocessing.Process(target=self.target, args=(index,), name=f'worker-{index}', daemon=False)
+        process.start()
+        self.processes[index] = process
+        self.startedAt[index] = time.monotonic()
+        logging.info('Worker %d đã khởi động (pid %s)', index, process.pid)
+
+    def stop(self, signum=None, frame=None) -> None:
+        self.stopping = True
+
+    def reap(self, process: multiprocessing.Process) -> None:
+        """Xử lý worker đã dừng: lên lịch khởi động lại với thời gian chờ tăng dần
+        """
+        index = next(index for index, item in self.processes.items() if item is process)
+        del self.processes[index]
+        process.join()
+        if self.stopping:
+            return
+        uptime = time.monotonic() - self.startedAt[index]
+        delay = self.restartDelay if uptime >= self.stableAfter \
+            else min(self.delays.get(index, self.restartDelay / 2) * 2, self.maxRestartDelay)
+        self.delays[index] = delay
+        self.restartAt[index] = time.monotonic() + delay
+        logging.warning('Worker %d đã dừng (mã %s), khởi động lại sau %.1f giây', index, process.exitcode, delay)
+
+    def run(self) -> None:
+        """Khởi động các worker và theo dõi đến khi nhận SIGTERM/SIGINT
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while not self.stopping:
+            now = time.monotonic()
+            for index, at in list(self.restartAt.items()):
+                if at <= now:
+                    del self.restartAt[index]
+                    self.spawn(index)
+            timeout: Optional[float] = 1.0
+            if self.restartAt:
+                timeout = max(0.0, min(min(self.restartAt.values()) - now, 1.0))
+            sentinels = {process.sentinel: process for process in self.processes.values()}
+            if sentinels:
+                for sentinel in wait(list(sentinels), timeout=timeout):
+                    self.reap(sentinels[sentinel])
+            else:
+                time.sleep(timeout)
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """Gửi SIGTERM cho các worker, chờ chúng dừng và kill worker quá thời gian
+        """
+        processes: List[multiprocessing.Process] = list(self.processes.values())
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.stopTimeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.warning('Worker %s không dừng kịp, kill', process.name)
+                process.kill()
+                process.join()
+        self.processes.clear()
@@ -0,0 +1,235 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from aiohttp import web
+
+from .Logging import requestID
+
+# Các endpoint quản trị không được trace, để không lấn các request cần xem trong buffer
+ADMIN_PREFIX = '/quan-tri/'
+
+# Số span tối đa được giữ trong một trace (thêm nhiều tài khoản có thể gọi router hàng trăm lần)
+MAX_SPANS = 200
+
+# Trace của request đang được xử lý, None nếu request không được trace
+currentTrace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('currentTrace', default=None)
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+class Trace:
+    __slots__ = ('id', 'method', 'path', 'status', 'startedAt', 'wallTime', 'duration', 'spans', 'dropped')
+
+    def __init__(self, id: Optional[str], method: str, path: str) -> None:
+        self.id = id
+        self.method = method
+        self.path = path
+        self.status = 0
+        self.startedAt = time.perf_counter()
+        self.wallTime = datetime.now()
+        self.duration = 0.0
+        # (tên, thời điểm bắt đầu tính từ đầu request, thời gian, có lỗi)
+        self.spans: List[tuple] = []
+        self.dropped = 0
+
+    def toDict(self) -> Dict:
+        return {
+            'Id': self.id,
+            'Method': self.method,
+            'Path': self.path,
+            'Status': self.status,
+            'BatDau': self.wallTime.isoformat(timespec='milliseconds'),
+            'ThoiGianMs': round(self.duration * 1000, 2),
+            'Spans': [{'Ten': name, 'BatDauMs': round(start * 1000, 2), 'ThoiGianMs': round(duration * 1000, 2),
+                       'Loi': error} for name, start, duration, error in self.spans],
+            'SoSpanBiBo': self.dropped
+        }
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'startedAt')
+
+    def __init__(self, trace: Trace, name: str) -> None:
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> 'Span':
+        self.startedAt = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, exc, tb) -> None:
+        trace = self.trace
+        if len(trace.spans) >= MAX_SPANS:
+            trace.dropped += 1
+            return
+        now = time.perf_counter()
+        trace.spans.append((self.name, self.startedAt - trace.startedAt, now - self.startedAt, excType is not None))
+
+
+def span(name: str):
+    """Đo thời gian của một đoạn xử lý trong request hiện tại, dùng với 'with span(...)'.
+    Không làm gì nếu request không được trace
+
+    Args:
+        name (str): Tên span, ví dụ 'router.login', 'tapi.CLB_Select_AllThanhVien'
+    """
+    trace = currentTrace.get()
+    if trace is None:
+        return NULL_SPAN
+    return Span(trace, name)
+
+
+def longLived(handler):
+    """Đánh dấu handler giữ kết nối lâu (như Server-Sent Events). Request của handler này không được
+    trace, profile hay đo vào histogram thời gian xử lý vì thời gian chỉ là thời gian client giữ kết nối
+    """
+    handler.longLived = True
+    return handler
+
+
+def isLongLived(request: web.Request) -> bool:
+    return getattr(request.match_info.handler, 'longLived', False)
+
+
+class ProfileReport:
+    __slots__ = ('id', 'method', 'path', 'wallTime', 'duration', 'stats')
+
+    def __init__(self, id: int, method: str, path: str, duration: float, profile: cProfile.Profile) -> None:
+        self.id = id
+        self.method = method
+        self.path = path
+        self.wallTime = datetime.now()
+        self.duration = duration
+        profile.create_stats()
+        self.stats = profile.stats
+
+    def summary(self) -> Dict:
+        return {'Id': self.id, 'Method': self.method, 'Path': self.path,
+                'BatDau': self.wallTime.isoformat(timespec='seconds'), 'ThoiGianMs': round(self.duration * 1000, 2)}
+
+    def text(self, limit: int = 50) -> str:
+        output = io.StringIO()
+        # pstats.Stats lấy mất dữ liệu của object truyền vào nên dùng bản sao
+        stats = pstats.Stats(stream=output)
+        stats.stats = dict(self.stats)
+        stats.get_top_level_stats()
+        stats.sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    def dump(self) -> bytes:
+        # Cùng định dạng với pstats.Stats.dump_stats, mở được bằng pstats hoặc snakeviz
+        return marshal.dumps(self.stats)
+
+
+class Tracer:
+    def __init__(self, slowThreshold: Optional[float] = 1.0, bufferSize: int = 100,
+                 profileEvery: Optional[int] = None, profileBufferSize: int = 10,
+                 adminToken: Optional[str] = None) -> None:
+        """Trace từng request theo span (router, tapi, đọc JSON, serialize) và profile mẫu một số request
+
+        Trace chậm hơn slowThreshold được giữ trong ring buffer để xem qua endpoint quản trị.
+        Khi bật profileEvery, cứ mỗi N request thì một request chạy dưới cProfile. cProfile đo mọi thứ chạy
+        trên event loop trong thời gian đó nên báo cáo có thể gồm cả request khác đang chạy song song.
+
+        Args:
+            slowThreshold (float, optional): Thời gian (giây) để một trace được giữ lại, None để tắt trace
+            bufferSize (int): Số trace chậm được giữ lại
+            profileEvery (int, optional): Profile một request trong mỗi N request, None để tắt
+            profileBufferSize (int): Số báo cáo profile được giữ lại
+            adminToken (str, optional): Giá trị header X-Admin-Token của endpoint quản trị, None thì mọi request bị từ chối
+        """
+        self.slowThreshold = slowThreshold
+        self.traces: Deque[Trace] = deque(maxlen=bufferSize)
+        self.profileEvery = profileEvery
+        self.profiles: Deque[ProfileReport] = deque(maxlen=profileBufferSize)
+        self.adminToken = adminToken
+        self.requests = itertools.count(1)
+        self.profileIds = itertools.count(1)
+        self.profiling = False
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        if ((self.slowThreshold is None and not self.profileEvery) or request.path.startswith(ADMIN_PREFIX)
+                or isLongLived(request)):
+            return await handler(request)
+        trace = Trace(requestID.get(), request.method, request.path)
+        token = currentTrace.set(trace)
+        profile = None
+        if self.profileEvery and not self.profiling and next(self.requests) % self.profileEvery == 0:
+            # Chỉ một profiler chạy tại một thời điểm
+            self.profiling = True
+            profile = cProfile.Profile()
+            profile.enable()
+        try:
+            response = await handler(request)
+            trace.status = response.status
+            return response
+        except web.HTTPException as ex:
+            trace.status = ex.status
+            raise
+        except Exception:
+            trace.status = 500
+            raise
+        finally:
+            trace.duration = time.perf_counter() - trace.startedAt
+            if profile is not None:
+                profile.disable()
+                self.profiling = False
+                self.profiles.append(ProfileReport(next(self.profileIds), request.method, request.path,
+                                                   trace.duration, profile))
+            if self.slowThreshold is not None and trace.duration >= self.slowThreshold:
+                self.traces.append(trace)
+            currentTrace.reset(token)
+
+    def authorized(self, request: web.Request) -> bool:
+        return self.adminToken is not None and request.headers.get('X-Admin-Token') == self.adminToken
+
+    async def getSlowTraces(self, request) -> 'web.HTTPException':
+        """Danh sách các request chậm gần đây (mới nhất trước) cùng thời gian của từng span
+
+        Returns:
+            web.HTTPException: HTTP 403 nếu sai X-Admin-Token
+        """
+        if not self.authorized(request):
+            return web.HTTPForbidden(text='Forbidden')
+        return web.json_response({
+            'NguongMs': round(self.slowThreshold * 1000, 2) if self.slowThreshold is not None else None,
+            'Traces': [trace.toDict() for trace in reversed(self.traces)]
+        })
+
+    async def getProfiles(self, request) -> 'web.HTTPException':
+        if not self.authorized(request):
+            return web.HTTPForbidden(text='Forbidden')
+        return web.json_response({
+            'MoiNRequest': self.profileEvery,
+            'BaoCao': [report.summary() for report in reversed(self.profiles)]
+        })
+
+    async def getProfile(self, request) -> 'web.HTTPException':
+        """Tải một báo cáo profile: dạng text (mặc định) hoặc file .prof với ?format=prof
+
+        Returns:
+            web.HTTPException: HTTP 404 nếu báo cáo không còn trong buffer
+        """
+        if not self.authorized(request):
+            return web.HTTPForbidden(text='Forbidden')
+        try:
+            id = int(request.match_info['id'])
+        except ValueError:
+            return web.HTTPNotFound(text='Profile not found')
+        report = next((report for report in self.profiles if report.id == id), None)
+        if report is None:
+            return web.HTTPNotFound(text='Profile not found')
+        if request.query.get('format') == 'prof':
+            return web.Response(body=report.dump(), content_type='application/octet-stream',
+                                headers={'Content-Disposition': f'attachment; filename="profile-{id}.prof"'})
+        return web.Response(text=report.text())
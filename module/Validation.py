@@ -0,0 +1,254 @@
+import ipaddress
+import json
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from .model.UserHotspot import UserHotspot
+from .Tracing import span
+
+# Mã lỗi trả về cho client
+INVALID_BODY = 'INVALID_BODY'
+MISSING_FIELD = 'MISSING_FIELD'
+INVALID_IP = 'INVALID_IP'
+INVALID_MAC = 'INVALID_MAC'
+INVALID_USERNAME = 'INVALID_USERNAME'
+INVALID_PASSWORD = 'INVALID_PASSWORD'
+INVALID_DATE = 'INVALID_DATE'
+INVALID_FILTER = 'INVALID_FILTER'
+
+USERNAME_PATTERN = re.compile(r'[\w.@+-]{1,64}')
+MAC_PATTERN = re.compile(r'[0-9A-Fa-f]{12}')
+MAC_SEPARATORS = re.compile(r'[:\-.]')
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+class ValidationError(Exception):
+    def __init__(self, code: str, field: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.field = field
+        self.message = message
+
+    def toDict(self) -> Dict:
+        return {'MaLoi': self.code, 'TruongDuLieu': self.field, 'ThongBao': self.message}
+
+    def response(self) -> web.Response:
+        return web.json_response(self.toDict(), status=400)
+
+
+async def readJSON(request) -> Dict:
+    """Đọc body JSON của request, body phải là một object
+
+    Raises:
+        ValidationError nếu body không phải JSON object
+    """
+    try:
+        with span('parse'):
+            data = await request.json()
+    except (ValueError, json.JSONDecodeError):
+        raise ValidationError(INVALID_BODY, 'body', 'Dữ liệu không phải JSON hợp lệ')
+    if not isinstance(data, dict):
+        raise ValidationError(INVALID_BODY, 'body', 'Dữ liệu phải là một object JSON')
+    return data
+
+
+def require(data: Dict, field: str) -> Any:
+    value = data.get(field)
+    if value is None or value == '':
+        raise ValidationError(MISSING_FIELD, field, f'Thiếu trường {field}')
+    return value
+
+
+def present(data: Dict, fields: Tuple[str, ...]) -> None:
+    """Kiểm tra các trường phải có trong request nhưng được phép rỗng
+    """
+    for field in fields:
+        if field not in data:
+            raise ValidationError(MISSING_FIELD, field, f'Thiếu trường {field}')
+
+
+def normalizeIP(value: Any, field: str = 'IP') -> str:
+    """Kiểm tra địa chỉ IPv4 của client
+
+    Returns:
+        str: Địa chỉ IP dạng chuẩn
+    """
+    try:
+        return str(ipaddress.IPv4Address(str(value).strip()))
+    except ValueError:
+        raise ValidationError(INVALID_IP, field, 'Địa chỉ IP không hợp lệ')
+
+
+def normalizeMAC(value: Any, field: str = 'Mac-Address') -> str:
+    """Kiểm tra và chuẩn hoá địa chỉ MAC về dạng AA:BB:CC:DD:EE:FF như router Mikrotik
+
+    Chấp nhận chữ hoa hoặc chữ thường, phân cách bằng ':', '-', '.' hoặc không phân cách.
+
+    Returns:
+        str: Địa chỉ MAC đã chuẩn hoá
+    """
+    raw = MAC_SEPARATORS.sub('', str(value).strip())
+    if not MAC_PATTERN.fullmatch(raw):
+        raise ValidationError(INVALID_MAC, field, 'Địa chỉ MAC không hợp lệ')
+    raw = raw.upper()
+    return ':'.join(raw[i:i + 2] for i in range(0, 12, 2))
+
+
+def normalizeUsername(value: Any, field: str = 'Username') -> str:
+    """Kiểm tra tên tài khoản: 1-64 ký tự gồm chữ, số và . @ + - _
+
+    Returns:
+        str: Tên tài khoản đã bỏ khoảng trắng ở hai đầu
+    """
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise ValidationError(INVALID_USERNAME, field, 'Tên tài khoản không hợp lệ')
+    username = str(value).strip()
+    if not USERNAME_PATTERN.fullmatch(username):
+        raise ValidationError(INVALID_USERNAME, field, 'Tên tài khoản không hợp lệ')
+    return username
+
+
+def username(data: Dict) -> str:
+    """Lấy và kiểm tra trường Username của request
+    """
+    return normalizeUsername(require(data, 'Username'))
+
+
+def normalizePassword(value: Any, field: str = 'Password') -> str:
+    if isinstance(value, bool) or not isinstance(value, (str, int)) or len(str(value)) > 64:
+        raise ValidationError(INVALID_PASSWORD, field, 'Mật khẩu không hợp lệ')
+    return str(value)
+
+
+def normalizeDate(value: Any, field: str = 'Date') -> str:
+    """Kiểm tra ngày có format yyyy-MM-dd, chấp nhận cả dạng yyyy-MM-ddTHH:MM:SS
+
+    Returns:
+        str: Ngày có format yyyy-MM-dd
+    """
+    text = str(value).strip()
+    try:
+        if not DATE_PATTERN.match(text):
+            raise ValueError
+        if len(text) == 10:
+            return date.fromisoformat(text).isoformat()
+        # Phần sau ngày phải là giờ hợp lệ, không chấp nhận ký tự thừa
+        if text[10] not in 'T ':
+            raise ValueError
+        return datetime.fromisoformat(text).date().isoformat()
+    except ValueError:
+        raise ValidationError(INVALID_DATE, field, 'Ngày không hợp lệ, cần có format yyyy-MM-dd')
+
+
+def bulkFilter(data: Dict) -> Tuple[Optional[str], Optional[List[str]], Optional[str]]:
+    """Lấy điều kiện chọn tài khoản của các lệnh thay đổi nhiều tài khoản
+
+    Args:
+        data (Dict): Có 'Loc' dạng {'Lop': '...', 'Profile': '...', 'Username': ['...']}, cần ít nhất một điều kiện
+
+    Returns:
+        Tuple: Lớp, danh sách username và profile, None nếu không lọc theo điều kiện đó
+    """
+    condition = require(data, 'Loc')
+    if not isinstance(condition, dict) or not any(condition.get(key) for key in ('Lop', 'Profile', 'Username')):
+        raise ValidationError(INVALID_FILTER, 'Loc', 'Cần lọc theo ít nhất một trong Lop, Profile, Username')
+    lop = condition.get('Lop') or None
+    profile = condition.get('Profile') or None
+    if lop is not None and not isinstance(lop, str):
+        raise ValidationError(INVALID_FILTER, 'Loc.Lop', 'Lớp không hợp lệ')
+    if profile is not None:
+        profile = normalizeUsername(profile, 'Loc.Profile')
+    usernames = condition.get('Username') or None
+    if usernames is not None:
+        if not isinstance(usernames, list):
+            raise ValidationError(INVALID_FILTER, 'Loc.Username', 'Username phải là một danh sách')
+        usernames = list(dict.fromkeys(normalizeUsername(username, 'Loc.Username') for username in usernames))
+    return lop, usernames, profile
+
+
+def loginPayload(data: Dict) -> UserHotspot:
+    """Tạo UserHotspot từ body của request đăng nhập
+
+    Args:
+        data (Dict): Có IP, Mac-Address, Username, Password
+
+    Returns:
+        UserHotspot: Thông tin đăng nhập đã chuẩn hoá
+    """
+    return UserHotspot(
+        ip=normalizeIP(require(data, 'IP')),
+        mac=normalizeMAC(require(data, 'Mac-Address')),
+        username=normalizeUsername(require(data, 'Username')),
+        password=normalizePassword(require(data, 'Password'))
+    )
+
+
+def memberPayload(data: Dict) -> UserHotspot:
+    """Tạo UserHotspot cho thành viên mới từ dữ liệu của request thêm thành viên
+
+    Args:
+        data (Dict): Có Username, MSSV, Ho, Ten, NgaySinh, Lop, Email, DienThoai
+
+    Returns:
+        UserHotspot: Thành viên mới với profile 'student'
+    """
+    present(data, ('Ho', 'Ten', 'Lop', 'Email', 'DienThoai'))
+    return UserHotspot(
+        username=normalizeUsername(require(data, 'Username')),
+        profile='student',
+        mssv=normalizeUsername(require(data, 'MSSV'), 'MSSV'),
+        ho=data['Ho'],
+        ten=data['Ten'],
+        ngaysinh=normalizeDate(require(data, 'NgaySinh'), 'NgaySinh'),
+        lop=data['Lop'],
+        email=data['Email'],
+        sdt=data['DienThoai'],
+        password='1'
+    )
+
+
+def hotspotUserPayload(data: Dict) -> UserHotspot:
+    """Tạo UserHotspot từ dữ liệu của request sửa tài khoản trên router
+
+    Args:
+        data (Dict): Có Username, Profile, MSSV, Ho, Ten, NgaySinh, Lop, Email, DienThoai
+
+    Returns:
+        UserHotspot: Thông tin tài khoản đã chuẩn hoá
+    """
+    present(data, ('Ho', 'Ten', 'Lop', 'Email', 'DienThoai'))
+    return UserHotspot(
+        username=normalizeUsername(require(data, 'Username')),
+        profile=normalizeUsername(require(data, 'Profile'), 'Profile'),
+        mssv=normalizeUsername(require(data, 'MSSV'), 'MSSV'),
+        ho=data['Ho'],
+        ten=data['Ten'],
+        ngaysinh=normalizeDate(require(data, 'NgaySinh'), 'NgaySinh'),
+        lop=data['Lop'],
+        email=data['Email'],
+        sdt=data['DienThoai']
+    )
+
+
+def memberUpdatePayload(data: Dict) -> Dict:
+    """Tạo dữ liệu gửi đến database từ request sửa thông tin thành viên
+
+    Args:
+        data (Dict): Có UserID, Ho, Ten, Lop, NgaySinh, Email, DienThoai
+
+    Returns:
+        Dict: Dữ liệu theo tên trường của database
+    """
+    present(data, ('Ho', 'Ten', 'Lop', 'Email', 'DienThoai'))
+    return {
+        'UserID': require(data, 'UserID'),
+        'HoSV': data['Ho'],
+        'TenSV': data['Ten'],
+        'Lop': data['Lop'],
+        'NgaySinh': normalizeDate(require(data, 'NgaySinh'), 'NgaySinh'),
+        'Email': data['Email'],
+        'DienThoai': data['DienThoai']
+    }
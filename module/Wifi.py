@@ -1,24 +1,95 @@
 import socket                       # Lấy MAC và IP
 import logging                      # Hiển thị thông báo trên Terminal
-import aiohttp
 import json
 import copy
-from datetime import datetime
+import asyncio
+import csv
+import io
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
 from aiohttp import web             # Viết và gọi API
 from .APIException import APIException
 from .model.UserHotspot import UserHotspot
-from .RouterMikrotik import RouterMikrotik
-from .LHURequest import LRequest
-
-# Format định dạng cơ bản của Log
-logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s',
-                    datefmt='%y-%m-%d %H:%M:%S', level=logging.DEBUG)
+from .RouterRegistry import RouterRegistry
+from .MemberCache import MemberCache
+from .LoginScheduler import LoginScheduler, LoginQueueFull
+from .Attendance import AttendanceSchedule
+from .Reconciler import Reconciler, ReconcilerGroup
+from .AttendanceStats import AttendanceStats, RANKINGS
+from . import Attendance
+from . import LHURequest
+from . import Validation
+from .Validation import ValidationError
+from .JSONStream import dumps, streamMode, streamList
+from .Tracing import longLived
+
+if TYPE_CHECKING:
+    # Chỉ dùng cho chú thích kiểu
+    from .AttendanceStore import AttendanceStore
+    from .LHUClient import LHUClient
+    from .LoginCache import LoginCache
+    from .Presence import Presence, PresenceGroup
+    from .RouterPool import RouterPool
+    from .SharedCache import SharedCache
 
 
 class Wifi:
-    def __init__(self, router: 'RouterMikrotik') -> None:
+    def __init__(self, router: Union['RouterPool', 'RouterRegistry'], client: 'LHUClient', memberCacheTtl: float = 60.0,
+                 loginScheduler: Optional['LoginScheduler'] = None,
+                 attendanceSchedule: Optional['AttendanceSchedule'] = None,
+                 attendanceStore: Optional['AttendanceStore'] = None,
+                 bulkConcurrency: int = 8, bulkChunkSize: int = 50,
+                 presence: Union['Presence', 'PresenceGroup', None] = None, loginCache: Optional['LoginCache'] = None,
+                 sharedCache: Optional['SharedCache'] = None, statsStartDate: Optional[str] = None,
+                 reconcileProfiles: Optional[List[str]] = None, fetchConcurrency: int = 8) -> None:
         self.router = router
+        self.presence = presence
+        self.loginCache = loginCache
+        if presence is not None and loginCache is not None:
+            # Phiên kết thúc trên router thì client phải đăng nhập lại qua router
+            presence.addListener(loginCache.observe)
+        self.client = client
+        self.attendanceSchedule = attendanceSchedule if attendanceSchedule is not None else AttendanceSchedule()
+        self.attendanceStore = attendanceStore
+        # Số request đồng thời đến database và số dòng mỗi nhóm khi thêm nhiều thành viên
+        self.bulkConcurrency = bulkConcurrency
+        self.bulkChunkSize = bulkChunkSize
+        # Số ngày được tải đồng thời từ tapi khi lấy điểm danh theo khoảng ngày
+        self.fetchConcurrency = fetchConcurrency
+        self.loginScheduler = loginScheduler if loginScheduler is not None else LoginScheduler(router=router)
+        self.members = MemberCache(loader=self.loadMembers, ttl=memberCacheTtl, shared=sharedCache)
+        # Nhiều router thì mỗi router được đồng bộ riêng
+        if isinstance(router, RouterRegistry):
+            self.reconciler = ReconcilerGroup(routers=router.routers, loader=self.loadMembers,
+                                              allowedProfiles=reconcileProfiles)
+        else:
+            self.reconciler = Reconciler(router=router, loader=self.loadMembers, allowedProfiles=reconcileProfiles)
+        # Thống kê điểm danh theo thành viên, cộng dồn mỗi ngày một lần
+        self.attendanceStats = AttendanceStats(loadDay=self.fetchAttendance, loadRoster=self.members.get,
+                                               schedule=self.attendanceSchedule, store=attendanceStore,
+                                               startDate=statsStartDate, fetchConcurrency=fetchConcurrency)
+
+    async def loadMembers(self) -> list:
+        """Tải danh sách thành viên từ database và tách họ tên, được gọi bởi MemberCache
+
+        Returns:
+            list: Danh sách thành viên đã có Username, Ho, Ten
+        """
+        requestData = await self.client.call(LHURequest.SELECT_ALL_MEMBERS)
+        listUsers = requestData['data']
+        # Tạm tạo thêm username bằng mssv
+        # Sau khi anh Lực thêm cột username vào database sẽ xoá đoạn này
+        for user in listUsers:
+            user['Username'] = user['MSSV']
+            hoten = user.pop('HoTen')
+            try:
+                user['Ho'] = hoten[:hoten.rindex(' ')]
+                user['Ten'] = hoten[hoten.rindex(' ')+1:]
+            except:
+                user['Ho'] = None
+                user['Ten'] = None
+        return listUsers
 
     async def getHomepage(self, request) -> 'web.HTTPException':
         text = 'Đây là homepage clb mạng LHU-CISCO'
@@ -53,67 +124,150 @@ class Wifi:
                     Nếu không trả về lỗi.
         """
         try:
-            print('----------------------')
-            logging.info('Đã nhận được yêu cầu. Đang xử lý...')
-
-            # Trích xuất dữ liệu của request từ json thành dict
-            dataRequest = await request.json()
-            # Tách dữ liệu thành các biến
-            user = UserHotspot(
-                ip=dataRequest['IP'],
-                mac=dataRequest['Mac-Address'],
-                username=dataRequest['Username'],
-                password=dataRequest['Password']
-            )
+            # Kiểm tra và chuẩn hoá dữ liệu trước khi gửi đến router
+            user = Validation.loginPayload(await Validation.readJSON(request))
 
-            logging.info(
-                f'Yêu cầu được gửi bởi người dùng tên {user.username} có địa chỉ IP là {user.ip}')
+            # Client vừa đăng nhập thành công bấm lại, không cần gửi lệnh đến router
+            if self.loginCache is not None and self.loginCache.check(user):
+                logging.info('Client đã đăng nhập trước đó', extra={'user': user.username, 'ip': user.ip, 'sample': True})
+                return web.HTTPOk(text='Login thành công')
 
-            self.router.login(user=user)
+            await self.loginScheduler.login(user=user)
+            if self.loginCache is not None:
+                self.loginCache.add(user.mac, user.ip, user.username)
 
-            # Thông báo nếu đăng nhập thành công
-            logging.info('Login thành công!')
+            # Log thành công có số lượng lớn nên được lấy mẫu
+            logging.info('Login thành công', extra={'user': user.username, 'ip': user.ip, 'sample': True})
             return web.HTTPOk(text='Login thành công')
+        except ValidationError as ex:
+            logging.warning('Yêu cầu không hợp lệ: %s', ex)
+            return ex.response()
+        except LoginQueueFull as ex:
+            # Hàng đợi đã đầy, báo client chờ rồi gửi lại
+            logging.warning('Hàng đợi đăng nhập đã đầy')
+            return web.HTTPTooManyRequests(
+                text='Hệ thống đang quá tải, vui lòng thử lại sau',
+                headers={'Retry-After': str(ex.retryAfter)})
         except Exception as ex:
             # Kiểm tra lý do gây lỗi
             err = APIException.identify(str(ex))
-            logging.error(err)
+            logging.error('Login thất bại: %s', err)
             return web.HTTPInternalServerError(text=str(err))
 
+    async def getLoginQueueStats(self, request) -> 'web.HTTPException':
+        """Lấy thông số của hàng đợi đăng nhập
+
+        Args:
+            request (_type_): HTTP Request
+
+        Returns:
+            web.HTTPException: Trả về số yêu cầu đang chờ, đang xử lý, thời gian chờ
+                               và số lần trả kết quả ngay từ LoginCache
+        """
+        result = self.loginScheduler.stats()
+        if self.loginCache is not None:
+            result['BoNhoDangNhap'] = self.loginCache.stats()
+        return web.HTTPOk(body=json.dumps(result), content_type='application/json')
+
+    async def getRouterStatus(self, request) -> 'web.HTTPException':
+        """Lấy trạng thái kết nối đến router Mikrotik
+
+        Args:
+            request (_type_): HTTP Request
+
+        Returns:
+            web.HTTPException: Trả về trạng thái kết nối, HTTP 503 nếu router đang mất kết nối
+        """
+        body = json.dumps(self.router.status())
+        if not self.router.isHealthy():
+            return web.HTTPServiceUnavailable(body=body, content_type='application/json')
+        return web.HTTPOk(body=body, content_type='application/json')
+
+    async def getOnlineList(self, request) -> 'web.HTTPException':
+        """Lấy danh sách các phiên đăng nhập đang hoạt động trên router, đọc từ bảng trong bộ nhớ
+
+        Args:
+            request (_type_): HTTP Request
+
+        Returns:
+            web.HTTPException: Trả về số lượng, danh sách phiên và trạng thái theo dõi
+        """
+        if self.presence is None:
+            return web.HTTPNotFound(text='Presence feed is disabled')
+        result = self.presence.stats()
+        result['DanhSachPhien'] = self.presence.activeSessions()
+        body = dumps(result)
+        if not self.presence.connected:
+            return web.HTTPServiceUnavailable(body=body, content_type='application/json')
+        return web.HTTPOk(body=body, content_type='application/json')
+
+    @longLived
+    async def streamPresence(self, request) -> 'web.StreamResponse':
+        """Gửi các phiên đăng nhập vào/ra theo thời gian thực bằng Server-Sent Events
+
+        Sự kiện đầu tiên là toàn bộ bảng phiên hiện tại (SuKien = snapshot), sau đó là từng
+        sự kiện join, leave, update. Client bị ngắt khi không đọc kịp và cần kết nối lại.
+
+        Args:
+            request (_type_): HTTP Request
+
+        Returns:
+            web.StreamResponse: Response dạng text/event-stream
+        """
+        if self.presence is None:
+            return web.HTTPNotFound(text='Presence feed is disabled')
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        await response.prepare(request)
+        queue = self.presence.subscribe()
+        try:
+            await response.write(b'data: ' + self.presence.snapshot() + b'\n\n')
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), self.presence.heartbeat)
+                except asyncio.TimeoutError:
+                    await response.write(b': ping\n\n')
+                    continue
+                if data is None:
+                    break
+                await response.write(b'data: ' + data + b'\n\n')
+        except ConnectionResetError:
+            pass
+        finally:
+            self.presence.unsubscribe(queue)
+        return response
+
     async def getMemberList(self, request) -> 'web.HTTPException':
         """Lấy danh sách thành viên hiện tại của câu lạc bộ
 
         Args:
-            request (_type_): HTTP Request
+            request (_type_): HTTP Request. Thêm ?stream=json hoặc ?stream=ndjson để nhận
+                              danh sách thành viên dạng stream (không có số lượng)
 
         Returns:
             web.HTTPException: Trả về số lượng, danh sách các thành viên hiện tại
         """
-        request = LRequest(
-            url='https://tapi.lhu.edu.vn/nema/auth/CLB_Select_AllThanhVien')
         result = dict()
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url=request.url) as response:
-                requestData = await response.json()
-                listUsers = copy.copy(requestData['data'])
-                count = len(listUsers)
-                # Tạm tạo thêm username bằng mssv
-                # Sau khi anh Lực thêm cột username vào database sẽ xoá đoạn này
-                for user in listUsers:
-                    user['Username'] = user['MSSV']
-                    hoten = user.pop('HoTen')
-                    try:
-                        user['Ho'] = hoten[:hoten.rindex(' ')]
-                        user['Ten'] = hoten[hoten.rindex(' ')+1:]
-                    except:
-                        user['Ho'] = None
-                        user['Ten'] = None
-
-                result['SoLuongThanhVien'] = count
-                result['DanhSachThanhVien'] = listUsers
+        listUsers = await self.members.get()
+        mode = streamMode(request)
+        if mode is not None:
+            return await streamList(request, listUsers, mode)
+        count = len(listUsers)
 
-        return web.HTTPOk(body=json.dumps(result), content_type='application/json')
+        result['SoLuongThanhVien'] = count
+        result['DanhSachThanhVien'] = listUsers
+
+        return web.HTTPOk(body=dumps(result), content_type='application/json')
+
+    async def memberListVersion(self, request) -> tuple:
+        """Phiên bản của danh sách thành viên cho ResponseCache, đổi khi cache được tải lại hoặc bị xoá
+        """
+        await self.members.get()
+        return (self.members.generation, self.members.loadedAt)
 
     async def getTotalNumberOfMembers(self, request) -> 'web.HTTPException':
         """Lấy tổng số lượng thành viên hiện tại
@@ -124,14 +278,8 @@ class Wifi:
         Returns:
             web.HTTPException: Trả về tổng số lượng thành viên hiện tại
         """
-        request = LRequest(
-            url='https://tapi.lhu.edu.vn/nema/auth/CLB_Select_AllThanhVien')
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url=request.url) as response:
-                requestData = await response.json()
-                listUsers = requestData['data']
-                count = len(listUsers)
+        listUsers = await self.members.get()
+        count = len(listUsers)
 
         return web.HTTPOk(text=str(count))
 
@@ -139,67 +287,209 @@ class Wifi:
         """Lấy danh sách các thành viên đã đăng nhập theo ngày
 
         Args:
-            request (_type_): HTTP Request. Date có format là yyyy-MM-dd
+            request (_type_): HTTP Request. Date có format là yyyy-MM-dd. Thêm ?stream=json hoặc
+                              ?stream=ndjson để nhận danh sách có mặt dạng stream (không có số lượng)
 
         Returns:
             web.HTTPException: Trả về danh sách các thành viên đã đăng nhập, có check đi trễ
         """
 
-        if request.method == 'GET':
-            date = str(request.match_info['date'])
-        else:
-            requestData = await request.json()
-            date = requestData['Date']
-
-        request = LRequest(
-            url='https://tapi.lhu.edu.vn/nema/auth/CLB_DiemDanh_Select_byDate',
-        )
-
-        lateTime = datetime.strptime('18:30:00', '%H:%M:%S').time()
-        checkinTime = datetime.strptime('18:00:00', '%H:%M:%S').time()
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=request.url, json={'Date': date}) as response:
-                requestData = await response.json()
-                users = requestData['data']
-                result = dict()
-                countLate = 0
-
-                for user in users[:]:
-                    _date = user.pop('ThoiGian')
-                    date = _date.split('T')[0]
-                    user['Ngay'] = date
-
-                    _time = user.pop('ThoiGianDiemDanh')
-                    loggonTime = datetime.strptime(_time, '%H:%M:%S').time()
-                    user['Gio'] = str(loggonTime)
-
-                    if loggonTime < checkinTime:
-                        users.remove(user)
-                        continue
-                    elif loggonTime > lateTime:
-                        user['DiTre'] = True
-                        countLate += 1
-                    else:
-                        user['DiTre'] = False
-
-                result['SoLuongCoMat'] = len(users)
-                result['SoLuongTre'] = countLate
-                result['DanhSachCoMat'] = users
-        return web.HTTPOk(body=json.dumps(result), content_type='application/json')
+        try:
+            if request.method == 'GET':
+                date = Validation.normalizeDate(request.match_info['date'])
+            else:
+                date = Validation.normalizeDate(Validation.require(await Validation.readJSON(request), 'Date'))
+        except ValidationError as ex:
+            return ex.response()
+
+        records = await self.fetchAttendance(date)
+        mode = streamMode(request)
+        if mode is not None:
+            return await streamList(request, Attendance.presentRows(records, self.attendanceSchedule), mode)
+        result = Attendance.summarize(records, self.attendanceSchedule).toDict()
+        return web.HTTPOk(body=dumps(result), content_type='application/json')
+
+    async def attendanceVersion(self, request) -> Optional[str]:
+        """Phiên bản dữ liệu điểm danh cho ResponseCache: dữ liệu của ngày đã qua không còn thay đổi
+
+        Returns:
+            Optional[str]: Ngày nếu đã qua, None nếu là hôm nay hoặc ngày không hợp lệ
+        """
+        try:
+            ngay = Validation.normalizeDate(request.match_info['date'])
+        except ValidationError:
+            return None
+        return ngay if date.fromisoformat(ngay) < date.today() else None
+
+    async def fetchAttendance(self, ngay: str) -> List[Dict]:
+        """Lấy dữ liệu điểm danh của một ngày. Ngày đã qua được lấy từ AttendanceStore nếu đã lưu
+
+        Args:
+            ngay (str): Ngày có format là yyyy-MM-dd
+
+        Returns:
+            List[Dict]: Dữ liệu điểm danh chưa phân loại
+        """
+        isPast = date.fromisoformat(ngay) < date.today()
+        if isPast and self.attendanceStore is not None:
+            records = await self.attendanceStore.getDate(ngay)
+            if records is not None:
+                return records
+
+        requestData = await self.client.call(LHURequest.SELECT_ATTENDANCE_BY_DATE, {'Date': ngay})
+        records = requestData['data']
+        # Dữ liệu của ngày đã qua không còn thay đổi nên chỉ cần lưu một lần
+        if isPast and self.attendanceStore is not None:
+            await self.attendanceStore.saveDate(ngay, records)
+        return records
+
+    async def fetchAttendanceDays(self, ngays: List[str]) -> List[List[Dict]]:
+        """Lấy dữ liệu điểm danh của nhiều ngày, tối đa fetchConcurrency ngày cùng lúc
+        để một khoảng ngày dài không chiếm hết kết nối đến tapi
+
+        Returns:
+            List[List[Dict]]: Dữ liệu của từng ngày theo thứ tự
+        """
+        semaphore = asyncio.Semaphore(self.fetchConcurrency)
+
+        async def fetch(ngay: str) -> List[Dict]:
+            async with semaphore:
+                return await self.fetchAttendance(ngay)
+
+        return await asyncio.gather(*[fetch(ngay) for ngay in ngays])
+
+    async def getLoggonListByRange(self, request) -> 'web.HTTPException':
+        """Lấy danh sách các thành viên đã đăng nhập trong một khoảng ngày (một tuần, một học kỳ)
+
+        Args:
+            request (_type_): HTTP Request với tuNgay, denNgay có format là yyyy-MM-dd.
+                              Có thể lọc theo thành viên bằng query ?MSSV=111222333,
+                              thêm ?stream=json hoặc ?stream=ndjson để nhận dạng stream
+
+        Returns:
+            web.HTTPException: Trả về danh sách các thành viên đã đăng nhập, có check đi trễ
+        """
+        try:
+            tuNgay = date.fromisoformat(Validation.normalizeDate(request.match_info['tuNgay'], 'tuNgay'))
+            denNgay = date.fromisoformat(Validation.normalizeDate(request.match_info['denNgay'], 'denNgay'))
+            if denNgay < tuNgay or (denNgay - tuNgay).days > 366:
+                raise ValidationError(Validation.INVALID_DATE, 'denNgay', 'Khoảng ngày không hợp lệ')
+        except ValidationError as ex:
+            return ex.response()
+
+        mssv = request.query.get('MSSV')
+        today = date.today()
+        ngays = [(tuNgay + timedelta(days=i)).isoformat() for i in range((denNgay - tuNgay).days + 1)]
+
+        try:
+            if self.attendanceStore is None:
+                days = await self.fetchAttendanceDays(ngays)
+                records = [record for day in days for record in day]
+            else:
+                # Lấy các ngày đã qua còn thiếu từ tapi, sau đó đọc cả khoảng ngày bằng một truy vấn
+                pastDays = [ngay for ngay in ngays if ngay < today.isoformat()]
+                missing = await self.attendanceStore.missingDates(pastDays)
+                await self.fetchAttendanceDays(missing)
+                records = await self.attendanceStore.getRange(ngays[0], ngays[-1], mssv)
+                if tuNgay <= today <= denNgay:
+                    records.extend(await self.fetchAttendance(today.isoformat()))
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=str(ex))
+
+        if mssv is not None:
+            records = [record for record in records if record.get('MSSV') == mssv]
+        mode = streamMode(request)
+        if mode is not None:
+            return await streamList(request, Attendance.presentRows(records, self.attendanceSchedule), mode)
+        result = Attendance.summarize(records, self.attendanceSchedule).toDict()
+        return web.HTTPOk(body=dumps(result), content_type='application/json')
+
+    @staticmethod
+    def statsNotReady() -> 'web.HTTPException':
+        return web.json_response({'ThongBao': 'Đang tính thống kê điểm danh, vui lòng thử lại sau'}, status=503,
+                                 headers={'Retry-After': '30'})
+
+    async def getAttendanceStats(self, request) -> 'web.HTTPException':
+        """Xếp hạng thành viên theo số buổi có mặt, đi trễ, vắng hoặc chuỗi có mặt
+
+        Args:
+            request (_type_): HTTP Request với query ?theo=comat|tre|vang|chuoi|vanglientiep (mặc định comat)
+                              và ?top=20
+
+        Returns:
+            web.HTTPException: Khoảng ngày đã thống kê, số buổi và bảng xếp hạng.
+                               HTTP 503 khi đang cộng dồn lần đầu sau khi khởi động
+        """
+        try:
+            by = request.query.get('theo', 'comat')
+            if by not in RANKINGS:
+                raise ValidationError(Validation.INVALID_FILTER, 'theo', f'Chỉ xếp hạng theo {", ".join(RANKINGS)}')
+            try:
+                top = int(request.query.get('top', 20))
+            except ValueError:
+                top = 0
+            if not 1 <= top <= 1000:
+                raise ValidationError(Validation.INVALID_FILTER, 'top', 'top phải từ 1 đến 1000')
+            if not await self.attendanceStats.refresh():
+                return self.statsNotReady()
+            members = {member['MSSV']: member for member in await self.members.get()}
+        except ValidationError as ex:
+            return ex.response()
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=str(ex))
+
+        ranking = self.attendanceStats.leaderboard(by=by, top=top)
+        for row in ranking:
+            member = members.get(row['MSSV'], {})
+            row['Ho'], row['Ten'], row['Lop'] = member.get('Ho'), member.get('Ten'), member.get('Lop')
+        return web.HTTPOk(body=dumps({
+            'TuNgay': self.attendanceStats.startDate,
+            'DenNgay': self.attendanceStats.lastDate,
+            'SoBuoi': self.attendanceStats.sessions(),
+            'XepHang': ranking
+        }), content_type='application/json')
+
+    async def getMemberAttendanceStats(self, request) -> 'web.HTTPException':
+        """Thống kê điểm danh của một thành viên
+
+        Args:
+            request (_type_): HTTP Request với mssv
+
+        Returns:
+            web.HTTPException: Số buổi có mặt, đi trễ, vắng, chuỗi có mặt. HTTP 404 nếu chưa có dữ liệu,
+                               HTTP 503 khi đang cộng dồn lần đầu sau khi khởi động
+        """
+        try:
+            mssv = Validation.normalizeUsername(request.match_info['mssv'], 'MSSV')
+            if not await self.attendanceStats.refresh():
+                return self.statsNotReady()
+        except ValidationError as ex:
+            return ex.response()
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=str(ex))
+
+        summary = self.attendanceStats.summary(mssv)
+        if summary is None:
+            return web.HTTPNotFound(text='Chưa có dữ liệu điểm danh của thành viên')
+        summary['MSSV'] = mssv
+        summary['DenNgay'] = self.attendanceStats.lastDate
+        return web.HTTPOk(body=dumps(summary), content_type='application/json')
 
     async def getHotspotUserList(self, request) -> 'web.HTTPException':
         """Lấy danh sách tài khoản của thành viên trên router Mikrotik
 
         Args:
-            request (_type_): HTTP Request
+            request (_type_): HTTP Request. Thêm ?stream=json hoặc ?stream=ndjson để nhận dạng stream
 
         Returns:
             web.HTTPException: Trả về HTTP Response danh sách các tài khoản trên router Mikrotik
         """
         try:
-            list = self.router.getHotspotUserList()
-            return web.HTTPOk(text=json.dumps(list))
+            list = await self.router.getHotspotUserList()
+            mode = streamMode(request)
+            if mode is not None:
+                return await streamList(request, list, mode)
+            return web.HTTPOk(body=dumps(list), content_type='application/json')
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
 
@@ -225,42 +515,168 @@ class Wifi:
             web.HTTPException: Nếu tạo thành công, trả về kết quả tạo thành công. Nếu tạo không thành công, trả về lỗi
         """
         try:
-            dataRequest = await request.json()
-            user = UserHotspot(
-                username=dataRequest['Username'],
-                profile='student',
-                mssv=dataRequest['MSSV'],
-                ho=dataRequest['Ho'],
-                ten=dataRequest['Ten'],
-                ngaysinh=dataRequest['NgaySinh'],
-                lop=dataRequest['Lop'],
-                email=dataRequest['Email'],
-                sdt=dataRequest['DienThoai'],
-                password='1'
-            )
+            dataRequest = await Validation.readJSON(request)
+            user = self.newMember(dataRequest)
 
-            data = {
-                'MSSV': user.mssv,
-                'HoSV': user.ho,
-                'TenSV': user.ten,
-                'NgaySinh': user.ngaysinh,
-                'Lop': user.lop,
-                'Email': user.email,
-                'DienThoai': user.sdt
-            }
+            result = await self.insertMember(user)
+            self.members.invalidate()
 
-            request = LRequest(
-                url='https://tapi.lhu.edu.vn/nema/auth/CLB_ThanhVien_Insert')
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url=request.url, json=data) as response:
-                    result = await response.json()
-
-            # self.router.createHotspotUser(user=user)
+            # await self.router.createHotspotUser(user=user)
             return web.HTTPOk(text=str(result))
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
 
+    @staticmethod
+    def newMember(dataRequest: Dict) -> UserHotspot:
+        """Tạo object UserHotspot cho thành viên mới từ dữ liệu của request
+
+        Args:
+            dataRequest (Dict): Dữ liệu có dạng như request của addMember
+
+        Returns:
+            UserHotspot: Thành viên mới với profile 'student'
+        Raises:
+            ValidationError nếu thiếu trường hoặc dữ liệu không hợp lệ
+        """
+        return Validation.memberPayload(dataRequest)
+
+    async def insertMember(self, user: UserHotspot) -> Dict:
+        """Thêm thành viên vào database qua CLB_ThanhVien_Insert
+
+        Args:
+            user (UserHotspot): Thành viên cần thêm
+
+        Returns:
+            Dict: Dữ liệu database trả về
+        """
+        data = {
+            'MSSV': user.mssv,
+            'HoSV': user.ho,
+            'TenSV': user.ten,
+            'NgaySinh': user.ngaysinh,
+            'Lop': user.lop,
+            'Email': user.email,
+            'DienThoai': user.sdt
+        }
+        return await self.client.call(LHURequest.INSERT_MEMBER, data)
+
+    async def addMembers(self, request) -> 'web.StreamResponse':
+        """Thêm nhiều thành viên cùng lúc, gồm thêm vào database và tạo tài khoản trên router Mikrotik
+
+        Dữ liệu được xử lý theo từng nhóm. Kết quả của từng dòng được gửi về ngay dưới dạng NDJSON,
+        dòng cuối cùng là tổng kết.
+
+        Args:
+            request (_type_): HTTP Request với body là mảng JSON các thành viên có dạng như addMember,
+                              hoặc file CSV (content-type text/csv) có dòng tiêu đề
+                              Username,MSSV,Ho,Ten,NgaySinh,Lop,Email,DienThoai
+
+        Returns:
+            web.StreamResponse: Kết quả của từng dòng, mỗi dòng một object JSON
+        """
+        try:
+            if request.content_type == 'text/csv':
+                rows = list(csv.DictReader(io.StringIO(await request.text())))
+            else:
+                rows = await request.json()
+            if not isinstance(rows, list):
+                raise ValueError('Body must be a list')
+        except Exception as ex:
+            return web.HTTPBadRequest(text='Dữ liệu không hợp lệ')
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+
+        semaphore = asyncio.Semaphore(self.bulkConcurrency)
+        succeeded = 0
+
+        async def insert(index: int, row: Dict) -> Dict:
+            result = {'Dong': index, 'MSSV': row.get('MSSV') if isinstance(row, dict) else None,
+                      'ThemThanhVien': False, 'TaoTaiKhoan': False, 'Loi': None}
+            try:
+                row = dict(row)
+                row.setdefault('Username', row.get('MSSV'))
+                result['user'] = self.newMember(row)
+                async with semaphore:
+                    responseData = await self.insertMember(result['user'])
+                if 'data' not in responseData:
+                    raise Exception(responseData.get('Message', 'Insert failed'))
+                result['ThemThanhVien'] = True
+            except ValidationError as ex:
+                result['Loi'] = ex.message
+                result['MaLoi'] = ex.code
+            except Exception as ex:
+                result['Loi'] = str(ex)
+            return result
+
+        for start in range(0, len(rows), self.bulkChunkSize):
+            chunk = rows[start:start + self.bulkChunkSize]
+            results = await asyncio.gather(*[insert(start + i, row) for i, row in enumerate(chunk)])
+
+            # Tạo tài khoản cho cả nhóm trên một kết nối đến router
+            inserted = [result for result in results if result['ThemThanhVien']]
+            try:
+                errors = await self.router.createHotspotUsers([result['user'] for result in inserted])
+            except Exception as ex:
+                errors = [APIException.identify(str(ex))] * len(inserted)
+            for result, error in zip(inserted, errors):
+                result['TaoTaiKhoan'] = error is None
+                result['Loi'] = error
+
+            lines = []
+            for result in results:
+                result.pop('user', None)
+                succeeded += result['TaoTaiKhoan']
+                lines.append(json.dumps(result))
+            await response.write(('\n'.join(lines) + '\n').encode())
+
+        self.members.invalidate()
+        summary = {'TongSo': len(rows), 'ThanhCong': succeeded, 'ThatBai': len(rows) - succeeded}
+        await response.write((json.dumps(summary) + '\n').encode())
+        await response.write_eof()
+        return response
+
+    async def syncHotspotUsers(self, request) -> 'web.HTTPException':
+        """Đồng bộ tài khoản trên router Mikrotik với danh sách thành viên trong database
+
+        Args:
+            request (_type_): HTTP Request với dữ liệu dưới dạng:
+                {
+                    'DryRun': true,         # Mặc định true, chỉ báo cáo chênh lệch
+                    'Incremental': false    # Chỉ xử lý thay đổi so với lần đồng bộ trước
+                }
+
+        Returns:
+            web.HTTPException: Trả về danh sách tài khoản cần tạo, xoá, sửa profile và lỗi
+        """
+        try:
+            dataRequest = await request.json() if request.can_read_body else {}
+            result = await self.reconciler.run(
+                dryRun=bool(dataRequest.get('DryRun', True)),
+                incremental=bool(dataRequest.get('Incremental', False)))
+            return web.HTTPOk(body=json.dumps(result), content_type='application/json')
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=APIException.identify(str(ex)))
+
+    @staticmethod
+    def routerResponse(result, text: str) -> 'web.HTTPException':
+        """Tạo response cho lệnh thay đổi tài khoản trên router
+
+        Args:
+            result (_type_): Kết quả của lệnh. Với RouterRegistry là lỗi (hoặc None) theo từng router
+            text (str): Thông báo khi thành công
+
+        Returns:
+            web.HTTPException: HTTP 200, hoặc HTTP 207 kèm lỗi của từng router nếu chỉ thành công trên một số router
+        """
+        if isinstance(result, dict):
+            errors = {name: error for name, error in result.items() if error}
+            if errors:
+                return web.json_response({'ThongBao': text, 'Loi': errors}, status=207)
+        return web.HTTPOk(text=text)
+
     async def getHotspotUserID(self, request) -> 'web.HTTPException':
         """Lấy ID của tài khoản trên router Mikrotik
 
@@ -274,9 +690,11 @@ class Wifi:
             web.HTTPException: Trả về UserID của tài khoản
         """
         try:
-            dataRequest = await request.json()
-            id = self.router.getHotspotUserID(username=dataRequest['Username'])
+            username = Validation.username(await Validation.readJSON(request))
+            id = await self.router.getHotspotUserID(username=username)
             return web.HTTPOk(text=id)
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
 
@@ -293,9 +711,13 @@ class Wifi:
             web.HTTPException: Nếu xoá thành công, trả về thông báo xoá thành công. Nếu không thành công, trả về lỗi
         """
         try:
-            dataRequest = await request.json()
-            self.router.removeHotspotUser(username=dataRequest['Username'])
-            return web.HTTPOk(text='Remove completed')
+            username = Validation.username(await Validation.readJSON(request))
+            result = await self.router.removeHotspotUser(username=username)
+            if self.loginCache is not None:
+                self.loginCache.discardUser(username)
+            return self.routerResponse(result, 'Remove completed')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text='User did not exist')
 
@@ -312,72 +734,161 @@ class Wifi:
             web.HTTPException: Nếu tạo thành công, trả về thông báo tạo thành công. Nếu không thành công, trả về lỗi
         """
         try:
-            dataRequest = await request.json()
-            user = UserHotspot(username=dataRequest['Username'])
-            self.router.createHotspotUser(user=user)
-            return web.HTTPOk(text='User created')
+            user = UserHotspot(username=Validation.username(await Validation.readJSON(request)))
+            result = await self.router.createHotspotUser(user=user)
+            return self.routerResponse(result, 'User created')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text='User exists')
 
     async def editHotspotUser(self, request) -> 'web.HTTPException':
         try:
-            dataRequest = await request.json()
-            user = UserHotspot(
-                username=dataRequest['Username'],
-                profile=dataRequest['Profile'],
-                mssv=dataRequest['MSSV'],
-                ho=dataRequest['Ho'],
-                ten=dataRequest['Ten'],
-                ngaysinh=dataRequest['NgaySinh'],
-                lop=dataRequest['Lop'],
-                email=dataRequest['Email'],
-                sdt=dataRequest['DienThoai']
-            )
-
-            self.router.editHotspotUser(user=user)
-            return web.HTTPOk(text='Edit successful')
+            user = Validation.hotspotUserPayload(await Validation.readJSON(request))
+            result = await self.router.editHotspotUser(user=user)
+            return self.routerResponse(result, 'Edit successful')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
 
     async def changePassword(self, request):
         try:
-            dataRequest = await request.json()
+            dataRequest = await Validation.readJSON(request)
             user = UserHotspot(
-                username=dataRequest['Username'],
-                password=dataRequest['Password']
+                username=Validation.username(dataRequest),
+                password=Validation.normalizePassword(Validation.require(dataRequest, 'Password'))
             )
 
-            self.router.editHotspotUser(user=user)
-            return web.HTTPOk(text='Change password successful')
+            result = await self.router.editHotspotUser(user=user)
+            return self.routerResponse(result, 'Change password successful')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
 
     async def changeUsername(self, request):
         try:
-            dataRequest = await request.json()
             user = UserHotspot(
-                username=dataRequest['Username']
+                username=Validation.username(await Validation.readJSON(request))
             )
 
-            self.router.editHotspotUser(user=user)
-            return web.HTTPOk(text='Change username successful')
+            result = await self.router.editHotspotUser(user=user)
+            return self.routerResponse(result, 'Change username successful')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
 
+    async def bulkHotspotUsers(self, dataRequest: Dict, command: str, params: Dict) -> 'web.HTTPException':
+        """Chạy set/remove cho các tài khoản theo điều kiện 'Loc' của request trên router Mikrotik
+
+        Args:
+            dataRequest (Dict): Body của request, có 'Loc'
+            command (str): 'set' hoặc 'remove'
+            params (Dict): Các thuộc tính cần gán với lệnh set
+
+        Returns:
+            web.HTTPException: Số tài khoản thành công, thất bại và kết quả của từng tài khoản
+        """
+        lop, usernames, profile = Validation.bulkFilter(dataRequest)
+        if lop is not None:
+            # Router không có thông tin lớp, lấy danh sách thành viên của lớp từ database
+            members = [member['Username'] for member in await self.members.get() if member.get('Lop') == lop]
+            if usernames is not None:
+                inClass = set(members)
+                usernames = [username for username in usernames if username in inClass]
+            else:
+                usernames = members
+        results = await self.router.bulkHotspotUsers(command=command, params=params,
+                                                     usernames=usernames, profile=profile) if usernames != [] else {}
+        if self.loginCache is not None and (command == 'remove' or 'password' in params):
+            for username, error in results.items():
+                if error is None:
+                    self.loginCache.discardUser(username)
+        succeeded = sum(error is None for error in results.values())
+        return web.HTTPOk(body=json.dumps({
+            'TongSo': len(results),
+            'ThanhCong': succeeded,
+            'ThatBai': len(results) - succeeded,
+            'KetQua': [{'Username': username, 'Loi': error} for username, error in results.items()]
+        }), content_type='application/json')
+
+    async def editHotspotUsers(self, request) -> 'web.HTTPException':
+        """Đổi profile của nhiều tài khoản cùng lúc (ví dụ cả một lớp khi kết thúc học kỳ)
+
+        Args:
+            request (_type_): HTTP Request với dữ liệu dưới dạng:
+                {
+                    'Loc': {'Lop': '19CT111', 'Profile': 'student', 'Username': ['111222333']},
+                    'ProfileMoi': 'alumni'
+                }
+
+        Returns:
+            web.HTTPException: Kết quả của từng tài khoản
+        """
+        try:
+            dataRequest = await Validation.readJSON(request)
+            profile = Validation.normalizeUsername(Validation.require(dataRequest, 'ProfileMoi'), 'ProfileMoi')
+            return await self.bulkHotspotUsers(dataRequest, 'set', {'profile': profile})
+        except ValidationError as ex:
+            return ex.response()
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=APIException.identify(str(ex)))
+
+    async def resetPasswords(self, request) -> 'web.HTTPException':
+        """Đặt lại mật khẩu của nhiều tài khoản cùng lúc
+
+        Args:
+            request (_type_): HTTP Request với dữ liệu dưới dạng:
+                {
+                    'Loc': {'Lop': '19CT111'},
+                    'Password': '1'
+                }
+
+        Returns:
+            web.HTTPException: Kết quả của từng tài khoản
+        """
+        try:
+            dataRequest = await Validation.readJSON(request)
+            password = Validation.normalizePassword(Validation.require(dataRequest, 'Password'))
+            return await self.bulkHotspotUsers(dataRequest, 'set', {'password': password})
+        except ValidationError as ex:
+            return ex.response()
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=APIException.identify(str(ex)))
+
+    async def removeHotspotUsers(self, request) -> 'web.HTTPException':
+        """Xoá nhiều tài khoản cùng lúc trên router Mikrotik
+
+        Args:
+            request (_type_): HTTP Request với dữ liệu dưới dạng:
+                {
+                    'Loc': {'Username': ['111222333', '111222334']}
+                }
+
+        Returns:
+            web.HTTPException: Kết quả của từng tài khoản
+        """
+        try:
+            return await self.bulkHotspotUsers(await Validation.readJSON(request), 'remove', {})
+        except ValidationError as ex:
+            return ex.response()
+        except Exception as ex:
+            return web.HTTPInternalServerError(text=APIException.identify(str(ex)))
+
     async def getMemberInfo(self, request) -> 'web.HTTPException':
         try:
-            dataRequest = await request.json()
-            request = LRequest(
-                url="https://tapi.lhu.edu.vn/nema/auth/CLB_Select_ThanhVien_byMSSV"
-            )
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url=request.url, json={'MSSV': dataRequest['MSSV']}) as response:
-                    responseData = await response.json()
-                    member = copy.copy(responseData['data'][0])
-                    hoten = member.pop('HoTen')
-                    member['Ho'] = hoten[:hoten.rindex(' ')]
-                    member['Ten'] = hoten[hoten.rindex(' ')+1:]
+            dataRequest = await Validation.readJSON(request)
+            mssv = Validation.normalizeUsername(Validation.require(dataRequest, 'MSSV'), 'MSSV')
+            responseData = await self.client.call(LHURequest.SELECT_MEMBER_BY_MSSV, {'MSSV': mssv})
+            member = copy.copy(responseData['data'][0])
+            hoten = member.pop('HoTen')
+            member['Ho'] = hoten[:hoten.rindex(' ')]
+            member['Ten'] = hoten[hoten.rindex(' ')+1:]
             return web.HTTPOk(body=json.dumps(member), content_type='application/json')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             try:
                 # Trả về thông báo lỗi đã nhận được từ database (nếu có)
@@ -388,42 +899,33 @@ class Wifi:
 
     async def removeMember(self, request) -> 'web.HTTPException':
         try:
-            dataRequest = await request.json()
-            request = LRequest(
-                url="https://tapi.lhu.edu.vn/nema/auth/CLB_ThanhVien_Delete"
-            )
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url=request.url, json={'UserID': dataRequest['UserID']}) as response:
-                    responseData = await response.json()
-                    result = responseData['data']
-
-            self.router.removeHotspotUser(username=dataRequest['Username'])
-            return web.HTTPOk(text='Member deleted') 
+            dataRequest = await Validation.readJSON(request)
+            username = Validation.username(dataRequest)
+            responseData = await self.client.call(LHURequest.DELETE_MEMBER,
+                                                  {'UserID': Validation.require(dataRequest, 'UserID')})
+            result = responseData['data']
+            self.members.invalidate()
+
+            result = await self.router.removeHotspotUser(username=username)
+            if self.loginCache is not None:
+                self.loginCache.discardUser(username)
+            return self.routerResponse(result, 'Member deleted')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text='Member not found')
 
     async def editMember(self, request) -> 'web.HTTPException':
         try:
-            dataRequest = await request.json()
-            data = {
-                "UserID": dataRequest['UserID'],
-                "HoSV": dataRequest['Ho'],
-                "TenSV": dataRequest['Ten'],
-                "Lop": dataRequest['Lop'],
-                "NgaySinh": dataRequest['NgaySinh'],
-                "Email": dataRequest['Email'],
-                "DienThoai": dataRequest['DienThoai']
-            }
-
-            request = LRequest(url='https://tapi.lhu.edu.vn/nema/auth/CLB_ThanhVien_Update')
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url=request.url, json=data) as response:
-                    responseData = await response.json()
-                    try:
-                        responseData['data']
-                    except:
-                        raise Exception(responseData['Message'])
-                    return web.HTTPOk(text='Edit successful')
+            data = Validation.memberUpdatePayload(await Validation.readJSON(request))
+            responseData = await self.client.call(LHURequest.UPDATE_MEMBER, data)
+            try:
+                responseData['data']
+            except:
+                raise Exception(responseData['Message'])
+            self.members.invalidate()
+            return web.HTTPOk(text='Edit successful')
+        except ValidationError as ex:
+            return ex.response()
         except Exception as ex:
             return web.HTTPInternalServerError(text=str(ex))
\ No newline at end of file
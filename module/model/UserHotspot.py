@@ -1,4 +1,8 @@
 class UserHotspot:
+    # Model được tạo cho mỗi request nên dùng __slots__ để nhẹ và tạo nhanh hơn
+    __slots__ = ('ip', 'mac', 'username', 'password', 'profile', 'userid', 'mssv', 'ho', 'ten',
+                 'ngaysinh', 'lop', 'email', 'sdt', 'accountID')
+
     # def __init__(self, ip='', mac='', username='', password='', profile='default', mssv='', ho='', ten='', ngaysinh='', lop='', email='', sdt='', accountID='') -> None:
     def __init__(self, ip='', mac='', username='', password='', profile='default', **kwargs) -> None:
         self.ip = ip
@@ -14,4 +18,4 @@ class UserHotspot:
         self.lop = kwargs.get('lop','')
         self.email = kwargs.get('email','')
         self.sdt = kwargs.get('sdt','')
-        self.accountID = kwargs.get('accountID','')
\ No newline at end of file
+        self.accountID = kwargs.get('accountID','')
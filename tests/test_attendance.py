@@ -0,0 +1,57 @@
+from module.Attendance import AttendanceSchedule, EARLY, LATE, ON_TIME, classify, presentRows, summarize
+
+
+def record(mssv, ngay, gio):
+    return {'MSSV': mssv, 'ThoiGian': f'{ngay}T00:00:00', 'ThoiGianDiemDanh': gio}
+
+
+def testDefaultWindow():
+    window = AttendanceSchedule().windowFor('2024-09-05')
+    assert str(window.checkinTime) == '18:00:00'
+    assert str(window.lateTime) == '18:30:00'
+
+
+def testWindowPriority():
+    # 2024-09-02 và 2024-09-09 là thứ Hai
+    schedule = AttendanceSchedule({
+        'default': ('17:00:00', '17:15:00'),
+        0: ('19:00:00', '19:30:00'),
+        '2024-09-09': ('08:00:00', '08:10:00')
+    })
+    assert str(schedule.windowFor('2024-09-09').checkinTime) == '08:00:00'
+    assert str(schedule.windowFor('2024-09-02').checkinTime) == '19:00:00'
+    assert str(schedule.windowFor('2024-09-03').checkinTime) == '17:00:00'
+    # Ngày không hợp lệ dùng khung giờ mặc định
+    assert str(schedule.windowFor('khong-phai-ngay').checkinTime) == '17:00:00'
+
+
+def testClassifyBoundaries():
+    schedule = AttendanceSchedule()
+    records = [record('1', '2024-09-05', '17:59:59'), record('2', '2024-09-05', '18:00:00'),
+               record('3', '2024-09-05', '18:30:00'), record('4', '2024-09-05', '18:30:01')]
+    statuses = [status for status, _ in classify(records, schedule)]
+    assert statuses == [EARLY, ON_TIME, ON_TIME, LATE]
+
+
+def testClassifyRow():
+    (status, row), = classify([record('1', '2024-09-05', '18:45:00')], AttendanceSchedule())
+    assert status == LATE
+    assert row == {'MSSV': '1', 'Ngay': '2024-09-05', 'Gio': '18:45:00', 'DiTre': True}
+
+
+def testSummarize():
+    records = [record('1', '2024-09-05', '17:00:00'), record('2', '2024-09-05', '18:10:00'),
+               record('3', '2024-09-05', '18:40:00'), record('4', '2024-09-05', '19:00:00')]
+    result = summarize(records, AttendanceSchedule())
+    assert [row['MSSV'] for row in result.early] == ['1']
+    assert result.toDict()['SoLuongCoMat'] == 3
+    assert result.toDict()['SoLuongTre'] == 2
+    assert [row['MSSV'] for row in result.toDict()['DanhSachCoMat']] == ['2', '3', '4']
+
+
+def testSummarizeUsesWindowOfEachDay():
+    schedule = AttendanceSchedule({'2024-09-06': ('07:00:00', '07:30:00')})
+    records = [record('1', '2024-09-05', '07:10:00'), record('2', '2024-09-06', '07:10:00')]
+    result = summarize(records, schedule)
+    assert [row['MSSV'] for row in result.present] == ['2']
+    assert [row['MSSV'] for row in presentRows(records, schedule)] == ['2']
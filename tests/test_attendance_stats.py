@@ -0,0 +1,90 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from module.Attendance import AttendanceSchedule
+from module.AttendanceStats import AttendanceStats
+from module.AttendanceStore import AttendanceStore
+
+
+def daysAgo(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+# Hai buổi sinh hoạt trong ba ngày gần nhất, ngày ở giữa không có ai đăng nhập
+DAYS = {
+    daysAgo(3): [('1', '18:05:00'), ('2', '18:45:00')],
+    daysAgo(2): [],
+    daysAgo(1): [('1', '18:10:00')]
+}
+
+
+def stats(store=None, loaded=None):
+    async def loadDay(ngay):
+        if loaded is not None:
+            loaded.append(ngay)
+        return [{'MSSV': mssv, 'ThoiGian': f'{ngay}T00:00:00', 'ThoiGianDiemDanh': gio}
+                for mssv, gio in DAYS.get(ngay, [])]
+
+    async def loadRoster():
+        return [{'MSSV': '1'}, {'MSSV': '2'}, {'MSSV': '3'}]
+
+    return AttendanceStats(loadDay, loadRoster, AttendanceSchedule(), store=store, startDate=daysAgo(3))
+
+
+def testFoldsEachDayOnce(tmp_path):
+    async def scenario():
+        store = AttendanceStore(str(tmp_path / 'attendance.db'))
+        first = stats(store)
+        await first.update()
+        assert first.lastDate == daysAgo(1)
+        assert first.summary('1')['CoMat'] == 2 and first.summary('1')['ChuoiCoMat'] == 2
+        assert (first.summary('2')['DiTre'], first.summary('2')['VangLienTiep']) == (1, 1)
+        assert first.summary('3')['Vang'] == 2
+
+        # Worker khác đọc thống kê đã lưu, không tải lại các ngày đã cộng dồn
+        loaded = []
+        second = stats(store, loaded)
+        await second.update()
+        assert loaded == []
+        assert second.summary('1') == first.summary('1')
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def testFailedSaveKeepsTotals():
+    class Store:
+        """Store giả lập: lưu thống kê luôn lỗi"""
+
+        async def lastStatsDate(self):
+            return None
+
+        async def loadStats(self):
+            return None, {}
+
+        async def saveStats(self, ngay, rows):
+            raise OSError('disk full')
+
+    async def scenario():
+        attendance = stats(Store())
+        with pytest.raises(OSError):
+            await attendance.update()
+        # Thống kê chỉ được thay sau khi lưu thành công
+        assert attendance.members == {}
+        assert attendance.lastDate is None
+
+    asyncio.run(scenario())
+
+
+def testNotReadyUntilFirstFold():
+    async def scenario():
+        attendance = stats()
+        assert await attendance.refresh() is False
+        await attendance.task
+        assert attendance.ready
+        assert await attendance.refresh() is True
+        assert attendance.summary('1')['SoBuoi'] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+from module.CircuitBreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def expire(breaker):
+    # Giả lập đã hết thời gian chờ
+    breaker.openedAt -= breaker.resetTimeout + 1
+
+
+def testTripsAfterThreshold():
+    breaker = CircuitBreaker(failureThreshold=3, resetTimeout=5.0)
+    for _ in range(2):
+        breaker.recordFailure('timeout')
+        assert breaker.state == CLOSED and breaker.allow()
+    breaker.recordFailure('timeout')
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retryIn() <= 5.0
+    assert breaker.stats()['LoiGanNhat'] == 'timeout'
+
+
+def testSuccessResetsFailures():
+    breaker = CircuitBreaker(failureThreshold=2)
+    breaker.recordFailure()
+    breaker.recordSuccess()
+    breaker.recordFailure()
+    assert breaker.state == CLOSED
+
+
+def testHalfOpenAllowsSingleProbe():
+    breaker = CircuitBreaker(failureThreshold=1, resetTimeout=5.0)
+    breaker.recordFailure()
+    expire(breaker)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.recordSuccess()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def testFailedProbeBacksOff():
+    breaker = CircuitBreaker(failureThreshold=1, resetTimeout=5.0, maxResetTimeout=12.0)
+    breaker.recordFailure()
+    for expected in (10.0, 12.0, 12.0):
+        expire(breaker)
+        assert breaker.allow()
+        breaker.recordFailure()
+        assert breaker.state == OPEN
+        assert breaker.resetTimeout == expected
+    expire(breaker)
+    breaker.allow()
+    breaker.recordSuccess()
+    assert breaker.resetTimeout == 5.0
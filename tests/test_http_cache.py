@@ -0,0 +1,92 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from module.HTTPCache import ResponseCache
+
+
+def run(cache, scenario):
+    calls = {'count': 0}
+    version = {'value': 1}
+
+    async def handler(request):
+        calls['count'] += 1
+        return web.json_response({'version': version['value'], 'query': request.query_string})
+
+    async def getVersion(request):
+        return version['value']
+
+    async def main():
+        cache.add(handler, version=getVersion)
+        app = web.Application(middlewares=[cache.middleware])
+        app.router.add_get('/', handler)
+        async with TestClient(TestServer(app)) as client:
+            await scenario(client, calls, version)
+
+    asyncio.run(main())
+
+
+def testETagAndNotModified():
+    async def scenario(client, calls, version):
+        first = await client.get('/')
+        body = await first.read()
+        assert first.status == 200
+        assert first.headers['Cache-Control'] == 'no-cache'
+        assert first.headers['Vary'] == 'Accept'
+        etag = first.headers['ETag']
+
+        again = await client.get('/', headers={'If-None-Match': etag})
+        assert again.status == 304
+        assert await again.read() == b''
+        again = await client.get('/', headers={'If-None-Match': 'W/' + etag})
+        assert again.status == 304
+        again = await client.get('/', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert again.status == 304
+        # Cùng phiên bản dữ liệu thì handler chỉ được gọi một lần
+        assert calls['count'] == 1
+
+        full = await client.get('/')
+        assert await full.read() == body
+
+    run(ResponseCache(), scenario)
+
+
+def testVersionChangeCallsHandler():
+    async def scenario(client, calls, version):
+        etag = (await client.get('/')).headers['ETag']
+        version['value'] = 2
+        changed = await client.get('/', headers={'If-None-Match': etag})
+        assert changed.status == 200
+        assert changed.headers['ETag'] != etag
+        assert (await changed.json())['version'] == 2
+        assert calls['count'] == 2
+
+    run(ResponseCache(), scenario)
+
+
+def testLeastRecentlyUsedEviction():
+    async def scenario(client, calls, version):
+        for query in ('a', 'b', 'a', 'c'):
+            await client.get('/?' + query)
+        # 'b' ít dùng nhất nên bị bỏ khi thêm 'c'
+        assert [key[1] for key in cache.entries] == ['a', 'c']
+        await client.get('/?a')
+        assert calls['count'] == 3
+        await client.get('/?b')
+        assert calls['count'] == 4
+
+    cache = ResponseCache(maxEntries=2)
+    run(cache, scenario)
+
+
+def testStreamRequestsBypassCache():
+    async def scenario(client, calls, version):
+        await client.get('/')
+        await client.get('/', headers={'Accept': 'application/x-ndjson'})
+        await client.get('/?stream=json')
+        assert calls['count'] == 3
+        assert len(cache.entries) == 1
+
+    cache = ResponseCache()
+    run(cache, scenario)
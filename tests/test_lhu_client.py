@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from module.LHUClient import LHUClient, UpstreamError
+from module.LHURequest import LRequest
+from module.Metrics import metrics
+
+
+class Tapi:
+    """tapi giả lập: mỗi lần gọi lấy một phản hồi (mã HTTP, thời gian chờ) theo thứ tự, lần cuối được lặp lại"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def handle(self, request):
+        status, delay = self.replies[min(self.calls, len(self.replies) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return web.json_response({'data': self.calls}, status=status)
+
+
+def counter(name, endpoint):
+    return metrics.counters.get((name, endpoint), 0)
+
+
+async def call(tapi, request, **kwargs):
+    app = web.Application()
+    app.router.add_route('*', f'/{request.name}', tapi.handle)
+    async with TestServer(app) as server:
+        client = LHUClient(baseUrl=str(server.make_url('')), backoff=0.01, **kwargs)
+        try:
+            return await client.call(request)
+        finally:
+            await client.close()
+
+
+def testRetriesIdempotentEndpoint():
+    request = LRequest('Test_Retry', idempotent=True, retries=2, timeout=1.0, deadline=5.0)
+    retries = counter('upstream_retries', request.name)
+    tapi = Tapi((500, 0), (503, 0), (200, 0))
+    assert asyncio.run(call(tapi, request)) == {'data': 3}
+    assert tapi.calls == 3
+    assert counter('upstream_retries', request.name) == retries + 2
+
+
+def testGivesUpAfterRetries():
+    request = LRequest('Test_GiveUp', idempotent=True, retries=1, timeout=1.0, deadline=5.0)
+    tapi = Tapi((500, 0))
+    with pytest.raises(UpstreamError) as info:
+        asyncio.run(call(tapi, request))
+    assert info.value.status == 500
+    assert tapi.calls == 2
+
+
+def testWritesAreNotRetried():
+    # Endpoint thay đổi dữ liệu không được gọi lại dù có khai báo retries và hedge
+    request = LRequest('Test_Insert', retries=2, hedge=True, timeout=1.0)
+    tapi = Tapi((500, 0), (200, 0))
+    assert asyncio.run(call(tapi, request)) == {'data': 1}
+    assert tapi.calls == 1
+
+
+def testTimeoutIsRetriedWithinDeadline():
+    request = LRequest('Test_Timeout', idempotent=True, retries=3, timeout=0.1, deadline=0.25)
+    tapi = Tapi((200, 1.0))
+    with pytest.raises((asyncio.TimeoutError, UpstreamError)):
+        asyncio.run(call(tapi, request))
+    # Hết deadline trước khi dùng hết số lần gọi lại
+    assert 1 <= tapi.calls <= 3
+
+
+def testHedgedRequestWins():
+    request = LRequest('Test_Hedge', idempotent=True, hedge=True, timeout=2.0)
+    hedges, wins = counter('upstream_hedges', request.name), counter('upstream_hedge_wins', request.name)
+    tapi = Tapi((200, 1.0), (200, 0))
+    result = asyncio.run(call(tapi, request, policies={request.name: {'hedgeDelay': 0.05}}))
+    assert result == {'data': 2}
+    assert counter('upstream_hedges', request.name) == hedges + 1
+    assert counter('upstream_hedge_wins', request.name) == wins + 1
+
+
+def testHedgeDelayFromRecentLatency():
+    client = LHUClient(minHedgeDelay=0.05)
+    request = LRequest('Test_P95', idempotent=True, hedge=True)
+    policy = client.policy(request)
+    # Chưa đủ mẫu thì không gửi request dự phòng
+    assert client.hedgeDelay(request.name, policy) is None
+    client.latencies[request.name] = [0.01 * i for i in range(1, 101)]
+    assert client.hedgeDelay(request.name, policy) == pytest.approx(0.95)
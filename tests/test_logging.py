@@ -0,0 +1,25 @@
+import json
+import logging
+import queue
+
+from module.Logging import JSONFormatter, QueueHandler
+
+
+def testExceptionSurvivesQueue():
+    records = queue.SimpleQueue()
+    logger = logging.getLogger('test.logging')
+    logger.propagate = False
+    logger.addHandler(QueueHandler(records))
+    try:
+        raise ValueError('router trả về lỗi')
+    except ValueError:
+        logger.exception('Đồng bộ tài khoản thất bại: %s', 'router-a')
+
+    record = records.get_nowait()
+    # Record trong hàng đợi không còn giữ traceback object và tham số
+    assert record.exc_info is None and record.args is None
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['message'] == 'Đồng bộ tài khoản thất bại: router-a'
+    assert entry['exception'].startswith('Traceback')
+    assert "ValueError: router trả về lỗi" in entry['exception']
+    assert entry['message'] not in entry['exception']
@@ -0,0 +1,57 @@
+from module.LoginCache import LoginCache
+from module.model.UserHotspot import UserHotspot
+
+
+def user(mac='AA:BB:CC:DD:EE:01', ip='10.0.0.1', username='111222333'):
+    return UserHotspot(ip=ip, mac=mac, username=username, password='1')
+
+
+def testKeyedByMacIpAndUsername():
+    cache = LoginCache()
+    cache.add('aa:bb:cc:dd:ee:01', '10.0.0.1', 111222333)
+    # MAC không phân biệt hoa thường, username có thể là số
+    assert cache.check(user())
+    assert not cache.check(user(ip='10.0.0.2'))
+    assert not cache.check(user(username='444555666'))
+    assert not cache.check(user(mac='AA:BB:CC:DD:EE:02'))
+    assert (cache.stats()['TraNgay'], cache.stats()['GuiRouter']) == (1, 3)
+
+
+def testExpiredEntryIsRemoved():
+    cache = LoginCache(ttl=0.0)
+    cache.add('AA:BB:CC:DD:EE:01', '10.0.0.1', '111222333')
+    assert not cache.check(user())
+    assert cache.stats()['SoClient'] == 0
+
+
+def testOldestEntryIsEvicted():
+    cache = LoginCache(maxSize=2)
+    for i in range(1, 4):
+        cache.add(f'AA:BB:CC:DD:EE:0{i}', '10.0.0.1', '111222333')
+    assert not cache.check(user(mac='AA:BB:CC:DD:EE:01'))
+    assert cache.check(user(mac='AA:BB:CC:DD:EE:02'))
+    # Thêm lại client đã có thì client đó trở thành mới nhất
+    cache.add('AA:BB:CC:DD:EE:02', '10.0.0.1', '111222333')
+    cache.add('AA:BB:CC:DD:EE:04', '10.0.0.1', '111222333')
+    assert cache.check(user(mac='AA:BB:CC:DD:EE:02'))
+    assert not cache.check(user(mac='AA:BB:CC:DD:EE:03'))
+
+
+def testPresenceEvents():
+    cache = LoginCache()
+    session = {'mac-address': 'AA:BB:CC:DD:EE:01', 'address': '10.0.0.1', 'user': '111222333'}
+    cache.observe('join', session)
+    assert cache.check(user())
+    cache.observe('leave', session)
+    assert not cache.check(user())
+    cache.observe('join', {'address': '10.0.0.1', 'user': '111222333'})
+    assert cache.stats()['SoClient'] == 0
+
+
+def testDiscardUser():
+    cache = LoginCache()
+    cache.add('AA:BB:CC:DD:EE:01', '10.0.0.1', '111222333')
+    cache.add('AA:BB:CC:DD:EE:02', '10.0.0.2', '111222333')
+    cache.add('AA:BB:CC:DD:EE:03', '10.0.0.3', '444555666')
+    cache.discardUser(111222333)
+    assert [key[2] for key in cache.entries] == ['444555666']
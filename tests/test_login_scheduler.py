@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from module.LoginScheduler import LoginQueueFull, LoginScheduler
+from module.model.UserHotspot import UserHotspot
+
+
+class Router:
+    """Router giả lập: lệnh login chờ cho tới khi được mở, sai mật khẩu thì báo lỗi"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+    async def login(self, user):
+        self.calls += 1
+        await self.gate.wait()
+        if user.password != 'dung':
+            raise Exception('invalid password')
+        return True
+
+
+def user(password='dung', mac='AA:BB:CC:DD:EE:01'):
+    return UserHotspot(ip='10.0.0.1', mac=mac, username='111222333', password=password)
+
+
+def testRejectsWhenQueueIsFull():
+    async def scenario():
+        router = Router()
+        scheduler = LoginScheduler(router, concurrency=1, maxQueue=1, retryAfter=3)
+        running = asyncio.ensure_future(scheduler.login(user(mac='AA:BB:CC:DD:EE:01')))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(scheduler.login(user(mac='AA:BB:CC:DD:EE:02')))
+        await asyncio.sleep(0)
+        assert (scheduler.stats()['DangXuLy'], scheduler.stats()['DangCho']) == (1, 1)
+
+        with pytest.raises(LoginQueueFull) as info:
+            await scheduler.login(user(mac='AA:BB:CC:DD:EE:03'))
+        assert info.value.retryAfter == 3
+
+        router.gate.set()
+        assert await asyncio.gather(running, waiting) == [True, True]
+        stats = scheduler.stats()
+        assert (stats['HoanThanh'], stats['TuChoi'], stats['DangCho']) == (2, 1, 0)
+
+    asyncio.run(scenario())
+
+
+def testCollapsesIdenticalRequests():
+    async def scenario():
+        router = Router()
+        scheduler = LoginScheduler(router)
+        requests = [asyncio.ensure_future(scheduler.login(user())) for _ in range(3)]
+        await asyncio.sleep(0)
+        router.gate.set()
+        assert await asyncio.gather(*requests) == [True, True, True]
+        assert router.calls == 1
+        assert scheduler.stats()['DaGop'] == 2
+
+    asyncio.run(scenario())
+
+
+def testDifferentPasswordsAreNotCollapsed():
+    async def scenario():
+        router = Router()
+        scheduler = LoginScheduler(router)
+        wrong = asyncio.ensure_future(scheduler.login(user('sai')))
+        right = asyncio.ensure_future(scheduler.login(user('dung')))
+        await asyncio.sleep(0)
+        router.gate.set()
+        results = await asyncio.gather(wrong, right, return_exceptions=True)
+        assert isinstance(results[0], Exception) and results[1] is True
+        assert router.calls == 2
+
+    asyncio.run(scenario())
+
+
+def testDrainingRejectsNewRequests():
+    async def scenario():
+        router = Router()
+        scheduler = LoginScheduler(router)
+        pending = asyncio.ensure_future(scheduler.login(user()))
+        await asyncio.sleep(0)
+        draining = asyncio.ensure_future(scheduler.drain(timeout=1.0))
+        await asyncio.sleep(0)
+        with pytest.raises(LoginQueueFull):
+            await scheduler.login(user(mac='AA:BB:CC:DD:EE:09'))
+        router.gate.set()
+        assert await pending is True
+        assert await draining is True
+
+    asyncio.run(scenario())
+
+
+def testCancelledBeforeStartLeavesQueue():
+    async def scenario():
+        router = Router()
+        scheduler = LoginScheduler(router)
+        request = asyncio.ensure_future(scheduler.login(user()))
+        await asyncio.sleep(0)
+        assert scheduler.stats()['DangCho'] == 1
+        # Huỷ task đăng nhập trước khi nó kịp chạy lần nào
+        for future in scheduler.inFlight.values():
+            future.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        stats = scheduler.stats()
+        assert (stats['DangCho'], stats['DangXuLy']) == (0, 0)
+        assert not scheduler.inFlight
+
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+import asyncio
+
+from module.MemberCache import SHARED_KEY, MemberCache
+from module.SharedCache import SharedCache
+
+
+def testSharedRecheckKeepsVersion(tmp_path):
+    async def scenario():
+        shared = SharedCache(str(tmp_path / 'cache.db'))
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return [{'MSSV': '1'}]
+
+        cache = MemberCache(loader, shared=shared, sharedCheckInterval=0.0)
+        members = await cache.get()
+        loadedAt = cache.loadedAt
+        # Mỗi lần get đều so lại với SharedCache, bản chưa đổi thì phiên bản giữ nguyên
+        for _ in range(3):
+            assert await cache.get() is members
+        assert cache.loadedAt == loadedAt
+        assert len(calls) == 1
+
+        # Worker khác ghi bản mới
+        await shared.set(SHARED_KEY, [{'MSSV': '1'}, {'MSSV': '2'}])
+        assert len(await cache.get()) == 2
+        assert cache.loadedAt > loadedAt
+        await shared.close()
+
+    asyncio.run(scenario())
+
+
+def testConcurrentRequestsShareOneLoad():
+    async def scenario():
+        gate = asyncio.Event()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await gate.wait()
+            return [{'MSSV': str(len(calls))}]
+
+        cache = MemberCache(loader, ttl=60.0)
+        requests = [asyncio.ensure_future(cache.get()) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*requests)
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        # Còn trong ttl nên không gọi lại loader
+        assert await cache.get() is results[0]
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def testCancelledRequestDoesNotCancelLoad():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def loader():
+            await gate.wait()
+            return [{'MSSV': '1'}]
+
+        cache = MemberCache(loader)
+        first = asyncio.ensure_future(cache.get())
+        second = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        assert await second == [{'MSSV': '1'}]
+        assert first.cancelled()
+
+    asyncio.run(scenario())
+
+
+def testInvalidateDropsLoadInProgress():
+    async def scenario():
+        gate = asyncio.Event()
+        started = asyncio.Event()
+        version = ['cu']
+
+        async def loader():
+            value = version[0]
+            started.set()
+            await gate.wait()
+            return [{'Ten': value}]
+
+        cache = MemberCache(loader)
+        stale = asyncio.ensure_future(cache.get())
+        await started.wait()
+        # Thành viên bị sửa trong lúc đang tải, kết quả của lần tải cũ không được giữ lại
+        version[0] = 'moi'
+        cache.invalidate()
+        fresh = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0)
+        gate.set()
+        assert await stale == [{'Ten': 'cu'}]
+        assert await fresh == [{'Ten': 'moi'}]
+        assert cache.members == [{'Ten': 'moi'}]
+
+    asyncio.run(scenario())
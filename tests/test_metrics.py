@@ -0,0 +1,32 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from module.Metrics import metrics, metricsMiddleware
+from module.Tracing import longLived
+
+
+async def listMembers(request):
+    return web.Response(text='ok')
+
+
+@longLived
+async def followMembers(request):
+    response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+    await response.prepare(request)
+    await response.write(b'data: 1\n\n')
+    return response
+
+
+def testLongLivedHandlersAreNotTimed():
+    async def scenario():
+        app = web.Application(middlewares=[metricsMiddleware])
+        app.add_routes([web.get('/a', listMembers), web.get('/b', followMembers)])
+        async with TestClient(TestServer(app)) as http:
+            await (await http.get('/a')).read()
+            await (await http.get('/b')).read()
+
+    asyncio.run(scenario())
+    assert ('handler', 'listMembers') in metrics.series
+    assert ('handler', 'followMembers') not in metrics.series
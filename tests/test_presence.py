@@ -0,0 +1,45 @@
+import asyncio
+
+from bench.FakeRouterOS import FakeRouterOS
+from module.Presence import JOIN, LEAVE, Presence
+
+
+def testDeadChangeEndsSession():
+    presence = Presence('router.test', 'admin', '', name='a')
+    events = []
+    presence.addListener(lambda kind, session: events.append((kind, session['id'])))
+    presence.applySnapshot([{'id': '*1', 'user': '111222333'}])
+    # routeros_api giữ nguyên giá trị chuỗi 'yes' của thuộc tính .dead
+    presence.applyChange({'id': '*1', '.dead': 'yes'})
+    assert presence.activeSessions() == []
+    assert events == [(JOIN, '*1'), (LEAVE, '*1')]
+
+
+def testLeaveFromRouter():
+    async def waitFor(events, count):
+        for _ in range(100):
+            if len(events) >= count:
+                return
+            await asyncio.sleep(0.05)
+
+    async def scenario():
+        fake = FakeRouterOS()
+        port = await fake.start()
+        presence = Presence('127.0.0.1', 'admin', '', port=port)
+        events = []
+        presence.addListener(lambda kind, session: events.append((kind, session.get('user'))))
+        await presence.start()
+        for _ in range(100):
+            if presence.connected:
+                break
+            await asyncio.sleep(0.05)
+        id = fake.addSession('111222333', '10.0.0.1', 'AA:BB:CC:DD:EE:01')
+        await waitFor(events, 1)
+        fake.removeSession(id)
+        await waitFor(events, 2)
+        assert events == [(JOIN, '111222333'), (LEAVE, '111222333')]
+        assert presence.activeSessions() == []
+        await presence.close()
+        await fake.stop()
+
+    asyncio.run(scenario())
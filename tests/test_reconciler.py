@@ -0,0 +1,103 @@
+import asyncio
+
+from module.Reconciler import Reconciler, ReconcilerGroup
+
+
+class Router:
+    """Router giả lập trong bộ nhớ, có thể cấu hình lỗi cho từng tài khoản"""
+
+    def __init__(self, users=None, failing=()):
+        self.users = dict(users or {})
+        self.failing = set(failing)
+        self.listed = 0
+
+    async def getHotspotUserList(self):
+        self.listed += 1
+        return [{'name': name, 'profile': profile} for name, profile in self.users.items()]
+
+    def apply(self, names, change):
+        errors = []
+        for name in names:
+            if name in self.failing:
+                errors.append('failure: router error')
+            else:
+                change(name)
+                errors.append(None)
+        return errors
+
+    async def createHotspotUsers(self, users):
+        return self.apply([user.username for user in users],
+                          lambda name: self.users.__setitem__(name, 'student'))
+
+    async def removeHotspotUsers(self, usernames):
+        return self.apply(usernames, lambda name: self.users.pop(name))
+
+    async def setHotspotUsers(self, usernames, params):
+        return self.apply(usernames, lambda name: self.users.__setitem__(name, params['profile']))
+
+
+def loader(names):
+    async def load():
+        return [{'Username': name} for name in names]
+    return load
+
+
+def testFullDiff():
+    router = Router({'a': 'student', 'b': 'default', 'c': 'alumni', 'old': 'student', 'admin': 'admin'})
+    result = asyncio.run(Reconciler(router, loader(['a', 'b', 'c', 'new'])).run(dryRun=True))
+    assert result['Tao'] == ['new']
+    # Tài khoản admin không thuộc profile được quản lý nên không bị xoá
+    assert result['Xoa'] == ['old']
+    # Chỉ sửa tài khoản có profile mặc định, profile đã đổi (alumni) được giữ nguyên
+    assert result['SuaProfile'] == ['b']
+    assert 'new' not in router.users
+
+
+def testAllowedProfiles():
+    router = Router({'a': 'student', 'c': 'alumni', 'd': 'vip', 'gone': 'alumni'})
+    reconciler = Reconciler(router, loader(['a', 'c', 'd']), allowedProfiles=['alumni'])
+    result = asyncio.run(reconciler.run(dryRun=True))
+    assert result['SuaProfile'] == ['d']
+    assert result['Xoa'] == ['gone']
+
+
+def testApplyAndIncremental():
+    router = Router({'a': 'student', 'old': 'student'})
+    members = ['a', 'b']
+    reconciler = Reconciler(router, lambda: loader(members)())
+
+    async def scenario():
+        await reconciler.run(dryRun=False)
+        assert router.users == {'a': 'student', 'b': 'student'}
+        members.append('c')
+        members.remove('a')
+        result = await reconciler.run(dryRun=False, incremental=True)
+        assert (result['Incremental'], result['Tao'], result['Xoa']) == (True, ['c'], ['a'])
+        # Incremental không đọc lại danh sách tài khoản trên router
+        assert router.listed == 1
+
+    asyncio.run(scenario())
+    assert set(router.users) == {'b', 'c'}
+
+
+def testFailedChangesAreRetried():
+    router = Router({'old': 'student'}, failing={'new', 'old'})
+    reconciler = Reconciler(router, loader(['new']))
+
+    async def scenario():
+        result = await reconciler.run(dryRun=False)
+        assert set(result['Loi']) == {'new', 'old'}
+        router.failing.clear()
+        result = await reconciler.run(dryRun=False, incremental=True)
+        assert (result['Tao'], result['Xoa'], result['Loi']) == (['new'], ['old'], {})
+
+    asyncio.run(scenario())
+    assert router.users == {'new': 'student'}
+
+
+def testGroupDiffsEachRouter():
+    routers = {'a': Router({'x': 'student', 'y': 'student'}), 'b': Router({'x': 'student'})}
+    result = asyncio.run(ReconcilerGroup(routers, loader(['x', 'y'])).run(dryRun=False))
+    assert result['Router']['a']['Tao'] == []
+    assert result['Router']['b']['Tao'] == ['y']
+    assert set(routers['b'].users) == {'x', 'y'}
@@ -0,0 +1,52 @@
+import asyncio
+
+from bench.FakeRouterOS import FakeRouterOS
+from module.model.UserHotspot import UserHotspot
+from module.RouterMikrotik import PIPELINE_SIZE
+from module.RouterPool import RouterPool
+
+
+def testCreateHotspotUsersInPipelinedGroups():
+    async def scenario():
+        fake = FakeRouterOS(users=1)
+        port = await fake.start()
+        pool = RouterPool('127.0.0.1', 'admin', '', port=port, keepaliveInterval=None)
+        # Tài khoản đầu tiên đã có sẵn trên router nên bị báo trùng tên
+        users = [UserHotspot(username=str(100000000 + i), password='1', profile='student')
+                 for i in range(PIPELINE_SIZE + 50)]
+        errors = await pool.createHotspotUsers(users)
+        assert 'already have user' in errors[0]
+        assert errors[1:] == [None] * (len(users) - 1)
+
+        ids = {user['name']: id for id, user in fake.users.items()}
+        assert len(ids) == len(users)
+        # ID trả về trong 'ret' của từng lệnh add được lưu lại, không cần print để tra ID
+        assert all(pool.userIndex.get(user.username) == ids[user.username] for user in users[1:])
+        await pool.close()
+        await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def testBulkByProfileSizesTimeoutFromFoundUsers():
+    async def scenario():
+        fake = FakeRouterOS(users=3 * PIPELINE_SIZE)
+        fake.addUser({'name': 'khach', 'password': '1', 'profile': 'guest'})
+        port = await fake.start()
+        pool = RouterPool('127.0.0.1', 'admin', '', port=port, timeout=5.0, keepaliveInterval=None)
+        timeouts = []
+        run = pool.run
+
+        async def record(func, *args, timeout=None, **kwargs):
+            timeouts.append((func.__name__, timeout))
+            return await run(func, *args, timeout=timeout, **kwargs)
+
+        pool.run = record
+        results = await pool.bulkHotspotUsers('set', {'profile': 'alumni'}, profile='student')
+        assert len(results) == 3 * PIPELINE_SIZE and not any(results.values())
+        assert timeouts == [('findHotspotUsers', None), ('pipelineHotspotUsers', 15.0)]
+        assert {user['profile'] for user in fake.users.values()} == {'alumni', 'guest'}
+        await pool.close()
+        await fake.stop()
+
+    asyncio.run(scenario())
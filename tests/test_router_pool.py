@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import pytest
+
+from module.CircuitBreaker import HALF_OPEN, OPEN
+from module.RouterPool import RouterPool
+
+
+class Router:
+    """Kết nối giả lập, lệnh đang chờ sẽ dừng khi bị ngắt từ thread khác"""
+
+    def __init__(self):
+        self.interrupted = threading.Event()
+        self.disconnected = False
+
+    def interrupt(self):
+        self.interrupted.set()
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def block(router):
+    router.interrupted.wait(5)
+    raise OSError('socket closed')
+
+
+def pool(**kwargs):
+    routers = []
+
+    def create():
+        routers.append(Router())
+        return routers[-1]
+
+    result = RouterPool('router.test', 'admin', '', keepaliveInterval=None, **kwargs)
+    result.createRouter = create
+    return result, routers
+
+
+def testTimeoutInterruptsBlockedThread():
+    async def scenario():
+        routerPool, routers = pool(size=1, timeout=0.2)
+        with pytest.raises(Exception, match='timed out'):
+            await routerPool.run(block)
+        assert routers[0].interrupted.is_set() and routers[0].disconnected
+        # Thread duy nhất của pool đã được giải phóng nên lệnh tiếp theo chạy được ngay
+        assert await routerPool.run(lambda router: router is routers[1], timeout=1.0) is True
+        assert list(routerPool.idle) == [routers[1]]
+        await routerPool.close()
+
+    asyncio.run(scenario())
+
+
+def testReadIsRetriedOnStaleConnection():
+    async def scenario():
+        routerPool, routers = pool(size=1)
+        await routerPool.run(lambda router: True)
+
+        def read(router):
+            if router is routers[0]:
+                raise OSError('connection reset')
+            return 'ok'
+
+        assert await routerPool.run(read, idempotent=True) == 'ok'
+        assert routers[0].disconnected and len(routers) == 2
+        assert routerPool.breaker.failures == 0
+        await routerPool.close()
+
+    asyncio.run(scenario())
+
+
+def testWriteIsNotRetried():
+    async def scenario():
+        routerPool, routers = pool(size=1)
+        await routerPool.run(lambda router: True)
+        calls = []
+
+        def write(router):
+            calls.append(router)
+            raise OSError('connection reset')
+
+        with pytest.raises(Exception, match='connection lost'):
+            await routerPool.run(write)
+        # Lần gửi đầu có thể đã đến router nên không gửi lại
+        assert calls == [routers[0]]
+        assert routerPool.breaker.failures == 1
+        await routerPool.close()
+
+    asyncio.run(scenario())
+
+
+def testCancelledProbeReopensCircuit():
+    async def scenario():
+        routerPool, routers = pool(size=1, failureThreshold=1)
+        routerPool.breaker.recordFailure('timeout')
+        routerPool.breaker.openedAt -= routerPool.breaker.resetTimeout + 1
+        probe = asyncio.ensure_future(routerPool.run(block))
+        await asyncio.sleep(0.1)
+        assert routerPool.breaker.state == HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # Kết nối đang dùng bị ngắt và không được trả về pool
+        assert routers[0].interrupted.is_set() and routers[0].disconnected
+        assert not routerPool.idle
+        assert routerPool.breaker.state == OPEN
+        await routerPool.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from module.Tracing import Tracer, longLived
+
+
+async def normal(request):
+    return web.Response(text='ok')
+
+
+@longLived
+async def stream(request):
+    response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+    await response.prepare(request)
+    await response.write(b'data: 1\n\n')
+    return response
+
+
+def client(tracer):
+    app = web.Application(middlewares=[tracer.middleware])
+    app.add_routes([web.get('/normal', normal), web.get('/stream', stream),
+                    web.get('/quan-tri/truy-vet', tracer.getSlowTraces)])
+    return TestClient(TestServer(app))
+
+
+def testLongLivedRequestsAreNotTracedOrProfiled():
+    async def scenario():
+        tracer = Tracer(slowThreshold=0.0, profileEvery=1)
+        async with client(tracer) as http:
+            for path in ('/stream', '/normal', '/stream'):
+                assert (await http.get(path)).status == 200
+        assert [trace.path for trace in tracer.traces] == ['/normal']
+        assert [report.path for report in tracer.profiles] == ['/normal']
+        assert not tracer.profiling
+
+    asyncio.run(scenario())
+
+
+def testAdminEndpointsRequireToken():
+    async def scenario():
+        async with client(Tracer()) as http:
+            assert (await http.get('/quan-tri/truy-vet')).status == 403
+        async with client(Tracer(adminToken='bi-mat')) as http:
+            assert (await http.get('/quan-tri/truy-vet', headers={'X-Admin-Token': 'sai'})).status == 403
+            assert (await http.get('/quan-tri/truy-vet', headers={'X-Admin-Token': 'bi-mat'})).status == 200
+
+    asyncio.run(scenario())
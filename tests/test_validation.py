@@ -0,0 +1,67 @@
+import pytest
+
+from module import Validation
+from module.Validation import ValidationError
+
+
+@pytest.mark.parametrize('value', ['aa:bb:cc:dd:ee:ff', 'AA-BB-CC-DD-EE-FF', 'aabb.ccdd.eeff', 'AABBCCDDEEFF',
+                                   ' aa:bb:cc:dd:ee:ff '])
+def testNormalizeMAC(value):
+    assert Validation.normalizeMAC(value) == 'AA:BB:CC:DD:EE:FF'
+
+
+@pytest.mark.parametrize('value', ['', 'aa:bb:cc:dd:ee', 'gg:bb:cc:dd:ee:ff', 'aa:bb:cc:dd:ee:ff:00', None])
+def testNormalizeMACRejects(value):
+    with pytest.raises(ValidationError) as info:
+        Validation.normalizeMAC(value)
+    assert info.value.code == Validation.INVALID_MAC
+    assert info.value.field == 'Mac-Address'
+
+
+def testNormalizeIP():
+    assert Validation.normalizeIP(' 10.0.0.1 ') == '10.0.0.1'
+    for value in ('10.0.0.256', '::1', 'abc', ''):
+        with pytest.raises(ValidationError) as info:
+            Validation.normalizeIP(value)
+        assert info.value.code == Validation.INVALID_IP
+
+
+def testNormalizeDate():
+    assert Validation.normalizeDate('2024-09-05') == '2024-09-05'
+    assert Validation.normalizeDate('2024-09-05T18:00:00') == '2024-09-05'
+    assert Validation.normalizeDate('2024-09-05 18:00:00+07:00') == '2024-09-05'
+    for value in ('2024-9-5', '2024-02-30', '05/09/2024', '', '20240905', '2024-09-05xyz', '2024-09-05 garbage',
+                  '2024-09-05T25:00'):
+        with pytest.raises(ValidationError) as info:
+            Validation.normalizeDate(value, 'NgaySinh')
+        assert info.value.code == Validation.INVALID_DATE
+        assert info.value.field == 'NgaySinh'
+
+
+def testNormalizeUsername():
+    assert Validation.normalizeUsername(' 111222333 ') == '111222333'
+    assert Validation.normalizeUsername(111222333) == '111222333'
+    for value in ('', 'có dấu', 'a' * 65, True, None, ['x']):
+        with pytest.raises(ValidationError):
+            Validation.normalizeUsername(value)
+
+
+def testRequire():
+    assert Validation.require({'UserID': 0}, 'UserID') == 0
+    for data in ({}, {'Username': None}, {'Username': ''}):
+        with pytest.raises(ValidationError) as info:
+            Validation.require(data, 'Username')
+        assert info.value.toDict() == {'MaLoi': Validation.MISSING_FIELD, 'TruongDuLieu': 'Username',
+                                       'ThongBao': 'Thiếu trường Username'}
+
+
+def testLoginPayload():
+    user = Validation.loginPayload({'IP': '10.0.0.1', 'Mac-Address': 'aa-bb-cc-dd-ee-ff', 'Username': '111222333',
+                                    'Password': 1})
+    assert (user.ip, user.mac, user.username, user.password) == ('10.0.0.1', 'AA:BB:CC:DD:EE:FF', '111222333', '1')
+
+
+def testMemberUpdatePayloadReportsMissingField():
+    with pytest.raises(ValidationError) as info:
+        Validation.memberUpdatePayload({'UserID': 1, 'Ho': 'a', 'Ten': 'b', 'Lop': 'c', 'Email': ''})
+    assert info.value.field == 'DienThoai'